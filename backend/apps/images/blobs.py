@@ -0,0 +1,150 @@
+"""
+Content-addressed storage: files are stored once under their SHA-256 and
+shared by every Image/ProcessingResult row with the same bytes.
+"""
+import hashlib
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import StoredBlob
+from .services import aws_image_service
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_key(digest: str, ext: str) -> str:
+    """Storage key for a digest, fanned out over two directory levels"""
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def _acquire(digest: str) -> Optional[StoredBlob]:
+    """Take a reference on an existing blob, None if the bytes are unknown"""
+    # A single UPDATE: it waits on a concurrent collect_blob() row lock and
+    # bumps updated_at, so a blob referenced again is never collected
+    if not StoredBlob.objects.filter(sha256=digest).update(
+        ref_count=F('ref_count') + 1, dedupe_hits=F('dedupe_hits') + 1, updated_at=timezone.now()
+    ):
+        return None
+    return StoredBlob.objects.get(sha256=digest)
+
+
+def store_blob(image_file, ext: str = None) -> Tuple[Optional[StoredBlob], Optional[str]]:
+    """
+    Store a file under its content hash and take a reference on it. Bytes
+    already stored are not written again.
+    Returns (blob, url), or (None, None) when the storage write failed.
+    """
+    image_file.seek(0)
+    data = image_file.read()
+    image_file.seek(0)
+    digest = hashlib.sha256(data).hexdigest()
+    
+    blob = _acquire(digest)
+    if blob:
+        return blob, aws_image_service.storage.url(blob.s3_key)
+    
+    ext = (ext or os.path.splitext(image_file.name or '')[1].lstrip('.') or 'bin').lower()
+    key = blob_key(digest, ext)
+    url = aws_image_service.upload_to_s3(image_file, key)
+    if not url:
+        return None, None
+    
+    try:
+        with transaction.atomic():
+            blob = StoredBlob.objects.create(
+                sha256=digest,
+                s3_key=key,
+                size=len(data),
+                content_type=getattr(image_file, 'content_type', '') or '',
+                ref_count=1,
+            )
+    except IntegrityError:
+        # A concurrent upload of the same bytes created the row first
+        blob = _acquire(digest)
+        if not blob:
+            raise
+        return blob, aws_image_service.storage.url(blob.s3_key)
+    return blob, url
+
+
+def release_blobs(counts: Dict) -> int:
+    """Drop references ({blob_id: n}); blobs reaching 0 are left to collect_blob()"""
+    released = 0
+    for blob_id, n in counts.items():
+        released += StoredBlob.objects.filter(pk=blob_id).update(
+            ref_count=Greatest(F('ref_count') - n, 0), updated_at=timezone.now()
+        )
+    return released
+
+
+def release_blob_refs(queryset) -> int:
+    """Release the blob references held by the rows of `queryset` before they are deleted"""
+    counts = {
+        row['blob']: row['n']
+        for row in queryset.exclude(blob__isnull=True).values('blob').annotate(n=Count('pk')).order_by()
+    }
+    return release_blobs(counts)
+
+
+def recount_blob_refs(blob_ids) -> int:
+    """Recompute ref_count from the referencing rows (fixes drift from cascades). Returns rows fixed."""
+    blobs = StoredBlob.objects.filter(pk__in=blob_ids).annotate(
+        n_images=Count('images', distinct=True),
+        n_results=Count('processing_results', distinct=True),
+    )
+    fixed = 0
+    for blob in blobs:
+        actual = blob.n_images + blob.n_results
+        if actual != blob.ref_count:
+            fixed += StoredBlob.objects.filter(pk=blob.pk, ref_count=blob.ref_count).update(ref_count=actual)
+    return fixed
+
+
+def collect_blob(blob_id, cutoff) -> Optional[int]:
+    """
+    Delete an unreferenced blob released before `cutoff`: the row stays
+    locked while the stored file is removed. Returns the bytes freed, or
+    None when the blob is still (or again) referenced.
+    """
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(
+            pk=blob_id, ref_count=0, updated_at__lt=cutoff
+        ).first()
+        if not blob:
+            return None
+        if not aws_image_service.delete_from_s3(blob.s3_key):
+            logger.warning(f"Blob {blob.sha256} kept: delete of {blob.s3_key} failed")
+            return None
+        blob.delete()
+    return blob.size
+
+
+def dedupe_report() -> Dict:
+    """Logical vs physical bytes over all blobs: savings and dedupe ratio"""
+    totals = StoredBlob.objects.filter(ref_count__gt=0).aggregate(
+        blobs=Count('pk'),
+        references=Sum('ref_count'),
+        physical_bytes=Sum('size'),
+        logical_bytes=Sum(F('size') * F('ref_count')),
+        skipped_writes=Sum('dedupe_hits'),
+    )
+    physical = totals['physical_bytes'] or 0
+    logical = totals['logical_bytes'] or 0
+    return {
+        'blobs': totals['blobs'],
+        'references': totals['references'] or 0,
+        'physical_bytes': physical,
+        'logical_bytes': logical,
+        'bytes_saved': logical - physical,
+        'dedupe_ratio': round(logical / physical, 3) if physical else 1.0,
+        'skipped_writes': totals['skipped_writes'] or 0,
+        'unreferenced_blobs': StoredBlob.objects.filter(ref_count=0).count(),
+    }
@@ -0,0 +1,94 @@
+"""
+Benchmark the storage engine: sequential, threaded and asyncio writes/reads.
+
+Offline against MinIO:
+    docker compose --profile storage-bench up -d minio minio_init
+    AWS_S3_ENDPOINT_URL=http://localhost:9000 AWS_ACCESS_KEY_ID=minioadmin \
+    AWS_SECRET_ACCESS_KEY=minioadmin AWS_STORAGE_BUCKET_NAME=fotomorfia-bench \
+    python manage.py benchmark_storage --backend s3
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.images.storage import build_storage
+
+
+class Command(BaseCommand):
+    help = "Measure storage engine throughput (local or S3/MinIO)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=['local', 's3'], help='Backend to benchmark (default: from settings)')
+        parser.add_argument('--count', type=int, default=50, help='Objects per phase')
+        parser.add_argument('--size', type=int, default=1024 * 1024, help='Object size in bytes')
+        parser.add_argument('--concurrency', type=int, default=8, help='Threads / concurrent coroutines')
+        parser.add_argument('--prefix', default='benchmarks/', help='Key prefix for the benchmark objects')
+    
+    def handle(self, *args, **options):
+        storage = build_storage(options['backend'])
+        count, size, concurrency = options['count'], options['size'], options['concurrency']
+        run_prefix = f"{options['prefix']}{uuid.uuid4().hex}/"
+        payload = os.urandom(size)
+        
+        self.stdout.write(f"Backend: {storage.name}, {count} x {size} bytes, concurrency {concurrency}")
+        
+        def keys(phase):
+            return [f"{run_prefix}{phase}/{i}.bin" for i in range(count)]
+        
+        def sequential_write():
+            for key in keys('sequential'):
+                storage.save(key, payload, 'application/octet-stream')
+        
+        def threaded_write():
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(lambda key: storage.save(key, payload, 'application/octet-stream'), keys('threaded')))
+        
+        async def async_write():
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def save(key):
+                async with semaphore:
+                    await storage.asave(key, payload, 'application/octet-stream')
+            
+            await asyncio.gather(*(save(key) for key in keys('async')))
+        
+        def threaded_read():
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(storage.read, keys('threaded')))
+        
+        async def async_read():
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def read(key):
+                async with semaphore:
+                    await storage.aread(key)
+            
+            await asyncio.gather(*(read(key) for key in keys('threaded')))
+        
+        phases = [
+            ('write sequential', sequential_write),
+            ('write threaded', threaded_write),
+            ('write asyncio', lambda: asyncio.run(async_write())),
+            ('read threaded', threaded_read),
+            ('read asyncio', lambda: asyncio.run(async_read())),
+        ]
+        
+        try:
+            for label, phase in phases:
+                started = time.perf_counter()
+                phase()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:<18} {elapsed:8.3f}s  {count / elapsed:9.1f} ops/s  "
+                    f"{count * size / elapsed / (1024 * 1024):9.1f} MiB/s"
+                )
+        finally:
+            started = time.perf_counter()
+            all_keys = [key for phase in ('sequential', 'threaded', 'async') for key in keys(phase)]
+            deleted, failed = storage.delete_many(all_keys)
+            self.stdout.write(f"{'delete batched':<18} {time.perf_counter() - started:8.3f}s  ({deleted} deleted, {len(failed)} failed)")
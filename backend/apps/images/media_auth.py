@@ -0,0 +1,66 @@
+"""
+Authorization for the secure media endpoints, cached per storage key.
+
+A key maps to the rows that reference it, as (owner_id, is_public,
+is_deleted) tuples: usually one row, several for shared content-addressed
+blobs. The entry is dropped whenever one of those rows is saved (see
+signals.py); hard deletes age out with MEDIA_AUTH_CACHE_SECONDS.
+"""
+import hashlib
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Image
+
+CACHE_PREFIX = 'media-auth:'
+
+Entry = Tuple[int, bool, bool]
+
+
+def _cache_key(key: str) -> str:
+    # Storage keys can be long and contain characters some cache backends refuse
+    return CACHE_PREFIX + hashlib.md5(key.encode()).hexdigest()
+
+
+def _load_entries(key: str) -> List[Entry]:
+    from apps.processing.models import ProcessingResult
+
+    entries = [
+        (owner_id, is_public, is_deleted)
+        for owner_id, is_public, is_deleted in ProcessingResult.objects.filter(s3_key=key).values_list(
+            'job__user_id', 'is_public', 'is_deleted'
+        )
+    ]
+    # Original uploads are owner-only, whatever the image's own visibility
+    entries.extend(
+        (owner_id, False, is_deleted)
+        for owner_id, is_deleted in Image.objects.filter(s3_key=key).values_list('user_id', 'is_deleted')
+    )
+    return entries
+
+
+def media_access_entries(key: str) -> List[Entry]:
+    """Rows referencing `key`, from the cache when possible (an empty list is cached too)"""
+    cache_key = _cache_key(key)
+    entries = cache.get(cache_key)
+    if entries is None:
+        entries = _load_entries(key)
+        cache.set(cache_key, entries, settings.MEDIA_AUTH_CACHE_SECONDS)
+    return entries
+
+
+def can_access_media(user, key: str) -> bool:
+    """Public through any live row, or owned by the user through any live row"""
+    user_id = user.id if user.is_authenticated else None
+    return any(
+        not is_deleted and (is_public or owner_id == user_id)
+        for owner_id, is_public, is_deleted in media_access_entries(key)
+    )
+
+
+def invalidate_media_access(*keys: str) -> None:
+    keys = [key for key in keys if key]
+    if keys:
+        cache.delete_many([_cache_key(key) for key in keys])
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('images', '0003_stored_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadIntent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('staging_key', models.CharField(max_length=500)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20)),
+                ('error_message', models.TextField(blank=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='images.image')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_intents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload Intent',
+                'verbose_name_plural': 'Upload Intents',
+                'db_table': 'upload_intents',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
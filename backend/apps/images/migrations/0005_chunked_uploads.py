@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0004_uploadintent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadintent',
+            name='chunk_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadintent',
+            name='multipart_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='uploadintent',
+            name='total_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('etag', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('intent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='images.uploadintent')),
+            ],
+            options={
+                'db_table': 'upload_chunks',
+                'ordering': ['index'],
+                'unique_together': {('intent', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0005_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='s3_key',
+            field=models.CharField(blank=True, db_index=True, max_length=500),
+        ),
+    ]
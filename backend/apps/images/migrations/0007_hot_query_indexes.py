@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0006_image_s3_key_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'is_deleted', '-created_at'], name='images_user_id_e2f5d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['is_public', 'is_deleted', '-created_at'], name='images_is_publ_c9e9e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processedimage',
+            index=models.Index(fields=['user', '-created_at'], name='processed_i_user_id_f56a0c_idx'),
+        ),
+    ]
@@ -19,7 +19,50 @@ def upload_to_processed(instance, filename):
     return f"images/processed/{instance.user.id}/{filename}"
 
 
-class ActiveImageManager(models.Manager):
+class StoredBlob(models.Model):
+    """Content-addressed stored file, shared by every row with the same bytes"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sha256 = models.CharField(max_length=64, unique=True)
+    s3_key = models.CharField(max_length=500, unique=True)
+    size = models.PositiveBigIntegerField()  # in bytes
+    content_type = models.CharField(max_length=100, blank=True)
+    
+    # Rows (Image, ProcessingResult) pointing at this blob; 0 means collectable
+    ref_count = models.PositiveIntegerField(default=0)
+    # Writes skipped because the bytes were already stored
+    dedupe_hits = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'stored_blobs'
+        verbose_name = 'Stored Blob'
+        verbose_name_plural = 'Stored Blobs'
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
+class LightQuerySet(models.QuerySet):
+    """QuerySet that can skip the model's HEAVY_FIELDS (large payloads API responses never include)"""
+    
+    def light(self, *related):
+        """
+        Defer HEAVY_FIELDS, plus those of each select_related path in `related`
+        (e.g. light('job') on results also skips the job's raw responses)
+        """
+        fields = list(getattr(self.model, 'HEAVY_FIELDS', ()))
+        for path in related:
+            model = self.model
+            for name in path.split('__'):
+                model = model._meta.get_field(name).related_model
+            fields += [f"{path}__{field}" for field in getattr(model, 'HEAVY_FIELDS', ())]
+        return self.defer(*fields)
+
+
+class ActiveImageManager(models.Manager.from_queryset(LightQuerySet)):
     """Manager that only returns non-deleted images"""
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
@@ -60,9 +103,10 @@ class Image(models.Model):
     moderation_checked_at = models.DateTimeField(null=True, blank=True)
     
     # S3 storage details
-    s3_key = models.CharField(max_length=500, blank=True)
+    s3_key = models.CharField(max_length=500, blank=True, db_index=True)
     s3_url = models.URLField(max_length=1000, blank=True)
     s3_bucket = models.CharField(max_length=255, blank=True)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='images')
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -73,8 +117,11 @@ class Image(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     
+    # Moderation payload: only the moderation endpoints read it
+    HEAVY_FIELDS = ('moderation_result',)
+    
     # Managers
-    objects = models.Manager()  # Default manager (includes deleted)
+    objects = LightQuerySet.as_manager()  # Default manager (includes deleted)
     active_objects = ActiveImageManager()  # Only non-deleted
     
     class Meta:
@@ -82,6 +129,10 @@ class Image(models.Model):
         verbose_name = 'Image'
         verbose_name_plural = 'Images'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_deleted', '-created_at']),  # user gallery
+            models.Index(fields=['is_public', 'is_deleted', '-created_at']),  # public gallery
+        ]
     
     def __str__(self):
         return f"{self.title or self.original_filename} by {self.user.email}"
@@ -101,6 +152,89 @@ class Image(models.Model):
         super().save(*args, **kwargs)
 
 
+class UploadIntent(models.Model):
+    """Direct-to-storage upload: the client sends the bytes to storage, completion ingests them"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_intents')
+    
+    # Where the client uploads the bytes
+    staging_key = models.CharField(max_length=500)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    
+    # Chunked (resumable) sessions only: bytes arrive as numbered chunks
+    total_size = models.PositiveBigIntegerField(null=True, blank=True)
+    chunk_size = models.PositiveIntegerField(null=True, blank=True)
+    multipart_id = models.CharField(max_length=255, blank=True)
+    
+    # Applied to the Image on completion
+    title = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    is_public = models.BooleanField(default=False)
+    tags = models.JSONField(default=list, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error_message = models.TextField(blank=True)
+    
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'upload_intents'
+        verbose_name = 'Upload Intent'
+        verbose_name_plural = 'Upload Intents'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload {self.filename} ({self.status}) by {self.user.email}"
+    
+    @property
+    def is_chunked(self):
+        return self.chunk_size is not None
+    
+    @property
+    def total_chunks(self):
+        if not self.is_chunked:
+            return 0
+        return max((self.total_size + self.chunk_size - 1) // self.chunk_size, 1)
+    
+    def expected_chunk_size(self, index):
+        """Every chunk is chunk_size bytes except the last one"""
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self.total_chunks - 1)
+
+
+class UploadChunk(models.Model):
+    """A received chunk of a chunked upload session (one storage multipart part)"""
+    
+    intent = models.ForeignKey(UploadIntent, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()  # 0-based; storage part number is index + 1
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    etag = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'upload_chunks'
+        unique_together = ['intent', 'index']
+        ordering = ['index']
+    
+    def __str__(self):
+        return f"Chunk {self.index} of {self.intent_id}"
+
+
 class ProcessedImage(models.Model):
     """Model for processed/styled images"""
     
@@ -136,6 +270,9 @@ class ProcessedImage(models.Model):
         verbose_name = 'Processed Image'
         verbose_name_plural = 'Processed Images'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
         unique_together = ['original_image', 'style_name', 'user']
     
     def __str__(self):
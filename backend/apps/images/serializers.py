@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.conf import settings
-from django.utils import timezone
-from .models import Image, ProcessedImage, ImageTag, ImageTagAssignment
-from .services import aws_image_service, image_processing_service
+from django.db.models import Count, Prefetch
+from .models import Image, ProcessedImage, ImageTag, ImageTagAssignment, UploadChunk, UploadIntent
+from .services import aws_image_service
+from .uploads import UploadRejected, ingest_image
 
 
 class ImageTagSerializer(serializers.ModelSerializer):
@@ -63,80 +64,95 @@ class ImageUploadSerializer(serializers.ModelSerializer):
         #         f"Daily upload limit reached ({max_uploads} images)"
         #     )
         
-        # Optimize image
-        optimized_image = image_processing_service.optimize_image(image_file)
-        
-        # Content moderation
-        is_safe, moderation_result = aws_image_service.moderate_content(optimized_image)
-        
-        if not is_safe:
+        try:
+            return ingest_image(user, image_file, tags=tags_data, **validated_data)
+        except UploadRejected as e:
+            raise serializers.ValidationError(str(e))
+
+
+class UploadIntentCreateSerializer(serializers.Serializer):
+    """Serializer for starting a direct-to-storage upload"""
+    
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    is_public = serializers.BooleanField(required=False, default=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False
+    )
+    
+    def validate_filename(self, value):
+        extension = value.rsplit('.', 1)[-1].lower() if '.' in value else ''
+        if extension not in settings.ALLOWED_IMAGE_EXTENSIONS:
             raise serializers.ValidationError(
-                "Image contains inappropriate content and cannot be uploaded."
+                "Invalid image format. Allowed formats: " + ", ".join(settings.ALLOWED_IMAGE_EXTENSIONS)
             )
-        
-        # Extract metadata
-        metadata = image_processing_service.extract_image_metadata(optimized_image)
-        
-        # Create image instance
-        image = Image.objects.create(
-            user=user,
-            original_filename=image_file.name,
-            file_size=optimized_image.size,
-            width=metadata.get('width', 0),
-            height=metadata.get('height', 0),
-            format=metadata.get('format', ''),
-            is_content_safe=is_safe,
-            moderation_result=moderation_result,
-            moderation_checked_at=timezone.now(),
-            **validated_data
-        )
-        
-        # Upload to S3 or local storage
-        s3_key = f"images/uploads/{user.id}/{image.id}.jpg"
-        
-        s3_url = aws_image_service.upload_to_s3(optimized_image, s3_key)
-        
-        if s3_url:
-            image.s3_key = s3_key
-            
-            # In production without S3, s3_url contains absolute URL
-            # Store relative path to avoid path resolution issues
-            if not getattr(settings, 'USE_S3_STORAGE', False):
-                # Extract relative path from absolute URL
-                if s3_url.startswith(('http://', 'https://')):
-                    from urllib.parse import urlparse
-                    parsed = urlparse(s3_url)
-                    relative_path = parsed.path
-                    if relative_path.startswith('/media/'):
-                        relative_path = relative_path[7:]  # Remove /media/ prefix
-                    image.s3_url = relative_path
-                else:
-                    image.s3_url = s3_url
-            else:
-                # S3 storage: keep absolute URL
-                image.s3_url = s3_url
-            
-            image.s3_bucket = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', 'local-dev')
-            image.status = 'uploaded'
-        else:
-            image.status = 'failed'
-            image.error_message = "Failed to upload to storage"
-        
-        image.save()
-        
-        # Add tags
-        for tag_name in tags_data:
-            tag, created = ImageTag.objects.get_or_create(
-                name=tag_name.lower(),
-                defaults={'slug': tag_name.lower().replace(' ', '-')}
+        return value
+    
+    def validate_content_type(self, value):
+        if not value.startswith('image/'):
+            raise serializers.ValidationError("Content type must be an image type")
+        return value
+    
+    def validate_size(self, value):
+        if value > settings.MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"File too large. Max size: {settings.MAX_UPLOAD_SIZE // (1024*1024)}MB"
             )
-            ImageTagAssignment.objects.create(
-                image=image,
-                tag=tag,
-                created_by=user
+        return value
+
+
+class UploadIntentSerializer(serializers.ModelSerializer):
+    """Serializer for upload intent status"""
+    
+    class Meta:
+        model = UploadIntent
+        fields = [
+            'id', 'filename', 'content_type', 'status', 'image',
+            'error_message', 'expires_at', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
+class ChunkedUploadCreateSerializer(UploadIntentCreateSerializer):
+    """Serializer for opening a resumable chunked upload (larger size cap)"""
+    
+    def validate_size(self, value):
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"File too large. Max size: {settings.CHUNKED_UPLOAD_MAX_SIZE // (1024*1024)}MB"
             )
-        
-        return image
+        return value
+
+
+class UploadChunkSerializer(serializers.ModelSerializer):
+    """Serializer for a received chunk"""
+    
+    class Meta:
+        model = UploadChunk
+        fields = ['index', 'size', 'sha256', 'created_at']
+        read_only_fields = fields
+
+
+class ChunkedUploadSerializer(UploadIntentSerializer):
+    """Serializer for chunked upload status: what to resume from"""
+    
+    total_chunks = serializers.IntegerField(read_only=True)
+    chunks = UploadChunkSerializer(many=True, read_only=True)
+    missing_chunks = serializers.SerializerMethodField()
+    
+    class Meta(UploadIntentSerializer.Meta):
+        fields = UploadIntentSerializer.Meta.fields + [
+            'total_size', 'chunk_size', 'total_chunks', 'chunks', 'missing_chunks'
+        ]
+        read_only_fields = fields
+    
+    def get_missing_chunks(self, obj):
+        received = {chunk.index for chunk in obj.chunks.all()}
+        return [index for index in range(obj.total_chunks) if index not in received]
 
 
 class ImageSerializer(serializers.ModelSerializer):
@@ -156,15 +172,22 @@ class ImageSerializer(serializers.ModelSerializer):
             'tags', 'processed_count', 'signed_url'
         ]
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Owner, tags and processed count for a whole page in a fixed number of queries"""
+        return queryset.select_related('user').light().prefetch_related(
+            Prefetch('tag_assignments', queryset=ImageTagAssignment.objects.select_related('tag'))
+        ).annotate(processed_count=Count('processed_versions', distinct=True))
+    
     def get_tags(self, obj):
         """Get image tags"""
-        return [
-            assignment.tag.name 
-            for assignment in obj.tag_assignments.select_related('tag')
-        ]
+        # all() reuses the prefetched assignments (and their tags) when present
+        return [assignment.tag.name for assignment in obj.tag_assignments.all()]
     
     def get_processed_count(self, obj):
         """Get count of processed versions"""
+        if getattr(obj, 'processed_count', None) is not None:
+            return obj.processed_count
         return obj.processed_versions.count()
     
     def get_signed_url(self, obj):
@@ -1,39 +1,49 @@
 import boto3
+import datetime
 import logging
 import io
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from PIL import Image
 from botocore.exceptions import ClientError
 
+from .storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
 
 class AWSImageService:
     """Service for handling AWS S3 and Rekognition operations"""
     
     def __init__(self):
-        self.s3_client = None
-        self.rekognition_client = None
-        self.use_s3 = getattr(settings, 'USE_S3_STORAGE', False)
         self.use_moderation = getattr(settings, 'USE_CONTENT_MODERATION', False)
-        
-        # Only initialize AWS clients if we're using S3 storage
-        if self.use_s3 and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-        
+        self._rekognition_client = None
+    
+    @property
+    def storage(self) -> StorageBackend:
+        """Storage engine (local filesystem or S3), created on first use"""
+        return get_storage()
+    
+    @property
+    def use_s3(self) -> bool:
+        return self.storage.name == 's3'
+    
+    @property
+    def s3_client(self):
+        return self.storage.client if self.use_s3 else None
+    
+    @property
+    def rekognition_client(self):
         # Only initialize Rekognition if we're using content moderation
-        if self.use_moderation and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            self.rekognition_client = boto3.client(
+        if self._rekognition_client is None and self.use_moderation and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
+            self._rekognition_client = boto3.client(
                 'rekognition',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
                 region_name=settings.AWS_REKOGNITION_REGION
             )
+        return self._rekognition_client
     
     def upload_processed_image(self, image_file: InMemoryUploadedFile, user_id: str) -> Tuple[str, str]:
         """
@@ -49,8 +59,8 @@ class AWSImageService:
         url = self.upload_to_s3(image_file, s3_key)  # maneja dev/prod internamente
         return s3_key, url
 
-    def validate_image_format(self, image_file: InMemoryUploadedFile) -> bool:
-        """Validate image format and size"""
+    def validate_image_format(self, image_file: InMemoryUploadedFile, max_size: int = None) -> bool:
+        """Validate image format and size (MAX_UPLOAD_SIZE unless `max_size` is given)"""
         try:
             # Check file extension
             file_extension = image_file.name.split('.')[-1].lower()
@@ -58,7 +68,7 @@ class AWSImageService:
                 return False
             
             # Check file size
-            if image_file.size > settings.MAX_UPLOAD_SIZE:
+            if image_file.size > (max_size or settings.MAX_UPLOAD_SIZE):
                 return False
             
             # Validate image can be opened
@@ -129,147 +139,52 @@ class AWSImageService:
         except Exception as e:
             return False, {"error": str(e)}
     
-    def upload_to_s3(self, image_file: InMemoryUploadedFile, s3_key: str) -> Optional[str]:
+    def upload_to_s3(self, image_file: InMemoryUploadedFile, s3_key: str, extra_args: Dict = None) -> Optional[str]:
         """
         Upload image to S3 (production) or local storage (development)
+        `extra_args` overrides S3 ExtraArgs (e.g. StorageClass, CacheControl)
         Returns: URL or local path
         """
-        # In development, save to local media folder
-        if not self.use_s3:
-            result = self._save_to_local_storage(image_file, s3_key)
-            return result
-        
-        if not self.use_s3:
-            result = self._save_to_local_storage(image_file, s3_key)
-            return result
-        
-        if not self.s3_client:
-            return self._save_to_local_storage(image_file, s3_key)
-        
         try:
-            image_file.seek(0)
-            
-            # Upload file to S3
-            self.s3_client.upload_fileobj(
-                image_file,
-                settings.AWS_STORAGE_BUCKET_NAME,
-                s3_key,
-                ExtraArgs={
-                    'ContentType': image_file.content_type,
-                    'ACL': settings.AWS_DEFAULT_ACL,
-                    'CacheControl': 'max-age=86400'
-                }
-            )
-            
-            # Generate URL
-            if settings.AWS_S3_CUSTOM_DOMAIN:
-                s3_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"
-            else:
-                s3_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
-            
-            return s3_url
-            
-        except ClientError as e:
-            return None
+            return self.storage.save(s3_key, image_file, content_type=image_file.content_type, extra_args=extra_args)
         except Exception as e:
+            logger.error(f"Upload of {s3_key} to {self.storage.name} storage failed: {e}")
             return None
     
-    def _save_to_local_storage(self, image_file: InMemoryUploadedFile, s3_key: str) -> Optional[str]:
-        """Save image to local media folder for development"""
+    def read_bytes(self, s3_key: str) -> Optional[bytes]:
+        """Read a stored file from S3 or local storage, None if missing"""
         try:
-            import os
-            from django.conf import settings
-            # Create local path based on s3_key
-            local_path = os.path.join(settings.MEDIA_ROOT, s3_key)
-            local_dir = os.path.dirname(local_path)
-            
-            # Create directory if it doesn't exist
-            os.makedirs(local_dir, exist_ok=True)
-            
-            # Save file
-            image_file.seek(0)
-            
-            with open(local_path, 'wb') as f:
-                image_data = image_file.read()
-                f.write(image_data)
-            
-            image_file.seek(0)
-            
-            # Check if file was actually created
-            if os.path.exists(local_path):
-                file_size = os.path.getsize(local_path)
-            else:
-                return None
-            
-            # Return local URL
-            relative_path = s3_key
-            local_url = f"{settings.MEDIA_URL}{relative_path}"
-            
-            return local_url
-            
+            return self.storage.read(s3_key)
         except Exception as e:
+            logger.error(f"Read of {s3_key} from {self.storage.name} storage failed: {e}")
             return None
     
     def delete_from_s3(self, s3_key: str) -> bool:
         """Delete file from S3 or local storage"""
-        # In development, delete from local storage
-        if not self.use_s3:
-            return self._delete_from_local_storage(s3_key)
-        
-        if not self.s3_client:
-            return self._delete_from_local_storage(s3_key)
-        
         try:
-            self.s3_client.delete_object(
-                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                Key=s3_key
-            )
-            return True
-            
-        except ClientError as e:
-            return False
+            return self.storage.delete(s3_key)
         except Exception as e:
             return False
     
-    def _delete_from_local_storage(self, s3_key: str) -> bool:
-        """Delete file from local storage"""
-        try:
-            import os
-            from django.conf import settings
-            
-            local_path = os.path.join(settings.MEDIA_ROOT, s3_key)
-            
-            if os.path.exists(local_path):
-                os.remove(local_path)
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            return False
+    def delete_many(self, s3_keys: List[str]) -> Tuple[int, List[str]]:
+        """
+        Delete many files at once: S3 DeleteObjects in chunks of 1000 keys,
+        or a plain loop on local storage. Missing files count as deleted.
+        Returns (deleted_count, failed_keys).
+        """
+        return self.storage.delete_many(s3_keys)
+    
+    def iter_stored_objects(self, prefix: str, start_after: str = None) -> Iterator[Tuple[str, int, datetime.datetime]]:
+        """
+        List stored files under a prefix in key order, page by page:
+        (key, size, last_modified). S3 pages through ListObjectsV2, local
+        storage walks MEDIA_ROOT lazily.
+        """
+        return self.storage.iter_objects(prefix, start_after)
     
     def generate_presigned_url(self, s3_key: str, expiration: int = 3600) -> Optional[str]:
         """Generate presigned URL for S3 or return local URL for development"""
-        # In development, return local media URL
-        if not self.use_s3:
-            from django.conf import settings
-            return f"{settings.MEDIA_URL}{s3_key}"
-        
-        if not self.s3_client:
-            # Fallback to local URL
-            from django.conf import settings
-            return f"{settings.MEDIA_URL}{s3_key}"
-        
-        try:
-            url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': s3_key},
-                ExpiresIn=expiration
-            )
-            return url
-            
-        except ClientError as e:
-            return None
+        return self.storage.presigned_url(s3_key, expiration)
 
 
 class ImageProcessingService:
@@ -310,6 +225,31 @@ class ImageProcessingService:
         except Exception as e:
             return image_file
     
+    @staticmethod
+    def resize_image(image_file: InMemoryUploadedFile, max_width: int, max_height: int) -> InMemoryUploadedFile:
+        """Downscale to fit max_width x max_height in the original format (alpha kept); unchanged if it fits"""
+        image_file.seek(0)
+        with Image.open(image_file) as img:
+            if img.width <= max_width and img.height <= max_height:
+                image_file.seek(0)
+                return image_file
+            image_format = img.format or 'PNG'
+            resized = img.copy()
+        
+        resized.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, format=image_format, **({'quality': 95} if image_format in ('JPEG', 'WEBP') else {}))
+        output.seek(0)
+        
+        return InMemoryUploadedFile(
+            output,
+            'ImageField',
+            image_file.name,
+            Image.MIME.get(image_format, image_file.content_type),
+            output.getbuffer().nbytes,
+            None
+        )
+    
     @staticmethod
     def extract_image_metadata(image_file: InMemoryUploadedFile) -> Dict:
         """Extract metadata from image"""
@@ -0,0 +1,164 @@
+"""
+Media file serving, used after the views' authorization checks.
+
+Transfers are handed to the front proxy when MEDIA_SERVE_METHOD says so
+(nginx X-Accel-Redirect, Apache/lighttpd X-Sendfile). Otherwise files are
+streamed with FileResponse, which WSGI servers with a file_wrapper (e.g.
+gunicorn) send with os.sendfile. Single byte ranges, If-None-Match and
+If-Modified-Since are honoured either way.
+"""
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of an open file starting at `start`.
+    fileno() is the real file, already positioned at `start`, so a sendfile
+    file_wrapper sends exactly Content-Length bytes from there.
+    """
+    
+    def __init__(self, f, start: int, length: int):
+        self._file = f
+        self._remaining = length
+        f.seek(start)
+    
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+    
+    def fileno(self) -> int:
+        return self._file.fileno()
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+def media_path(key: str) -> str:
+    """Absolute path of a media key, refusing anything outside MEDIA_ROOT"""
+    root = os.path.normpath(str(settings.MEDIA_ROOT))
+    path = os.path.normpath(os.path.join(root, key))
+    if path != root and not path.startswith(root + os.sep):
+        raise Http404("Access denied")
+    return path
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single 'bytes=' range. None means serve the
+    whole file (no/unsupported header, multiple ranges); ValueError means
+    the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _etag(stat) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _if_range_matches(request, etag: str, last_modified: int) -> bool:
+    """A Range is only honoured if If-Range (when sent) still names this version"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, key: str, filename: str = None, as_attachment: bool = False,
+               cache_control: str = 'private, max-age=3600', content_type: str = None) -> HttpResponse:
+    """Serve a file under MEDIA_ROOT with conditional and Range support"""
+    path = media_path(key)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found")
+    
+    etag = _etag(stat)
+    last_modified = int(stat.st_mtime)
+    
+    def finish(response):
+        if response.status_code != 304:
+            response['Content-Type'] = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = cache_control
+        response['X-Content-Type-Options'] = 'nosniff'
+        response['X-Frame-Options'] = 'DENY'
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f'{disposition}; filename="{filename or os.path.basename(key)}"'
+        return response
+    
+    # 304 Not Modified / 412 Precondition Failed
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return finish(conditional)
+    
+    method = getattr(settings, 'MEDIA_SERVE_METHOD', 'python')
+    if method == 'x-accel-redirect':
+        # nginx serves the file (and any Range) from an internal location aliased to MEDIA_ROOT
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(key)
+        return finish(response)
+    if method == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return finish(response)
+    
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get('Range', ''), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+    
+    if byte_range and not _if_range_matches(request, etag, last_modified):
+        byte_range = None
+    
+    f = open(path, 'rb')
+    if byte_range is None or byte_range == (0, size - 1):
+        response = FileResponse(f)
+        response['Content-Length'] = size
+        return finish(response)
+    
+    start, end = byte_range
+    response = FileResponse(RangeFile(f, start, end - start + 1), status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return finish(response)
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from .media_auth import invalidate_media_access
+from .models import Image
+
+
+def _remember_key(instance):
+    # __dict__: never load a deferred s3_key just to remember it
+    instance._loaded_s3_key = instance.__dict__.get('s3_key')
+
+
+def _invalidate_on_commit(instance):
+    # After commit: invalidating earlier would let a concurrent request cache the old row again
+    keys = (instance._loaded_s3_key, instance.s3_key)
+    transaction.on_commit(lambda: invalidate_media_access(*keys))
+    _remember_key(instance)
+
+
+@receiver(post_init, sender=Image)
+@receiver(post_init, sender='processing.ProcessingResult')
+def media_row_loaded(sender, instance, **kwargs):
+    """Keep the loaded key: a key change must drop the entry of the previous one too"""
+    _remember_key(instance)
+
+
+@receiver(post_save, sender=Image)
+def image_saved(sender, instance, **kwargs):
+    """Visibility, soft delete or key changes: drop the cached media authorization"""
+    _invalidate_on_commit(instance)
+
+
+@receiver(post_save, sender='processing.ProcessingResult')
+def processing_result_saved(sender, instance, **kwargs):
+    """Visibility, soft delete or key changes: drop the cached media authorization"""
+    _invalidate_on_commit(instance)
@@ -0,0 +1,576 @@
+"""
+Storage engine: one interface over the local filesystem and S3 (or any
+S3-compatible endpoint such as MinIO), with sync and asyncio entry points.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+Data = Union[bytes, bytearray, memoryview, BinaryIO]
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Common interface of the storage backends. Keys are relative paths like 'processed/1/x.png'."""
+
+    name = 'base'
+
+    @abstractmethod
+    def save(self, key: str, data: Data, content_type: str = None, extra_args: Dict = None) -> str:
+        """Store bytes or a file object under `key` and return its URL"""
+
+    @abstractmethod
+    def read(self, key: str) -> Optional[bytes]:
+        """Whole object as bytes, None if missing"""
+
+    @abstractmethod
+    def download_to(self, key: str, fileobj: BinaryIO) -> bool:
+        """Stream an object into a writable file object. False if missing."""
+
+    @abstractmethod
+    def open_read(self, key: str) -> Optional[BinaryIO]:
+        """Readable stream over an object (caller closes it), None if missing"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, None if missing"""
+
+    @abstractmethod
+    def copy(self, src_key: str, dst_key: str, content_type: str = None, extra_args: Dict = None) -> str:
+        """Server-side copy of an object, replacing `dst_key`. Returns the new URL."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete_many(self, keys: List[str]) -> Tuple[int, List[str]]:
+        """Delete many objects. Missing objects count as deleted. Returns (deleted, failed_keys)."""
+
+    @abstractmethod
+    def iter_objects(self, prefix: str, start_after: str = None) -> Iterator[Tuple[str, int, datetime.datetime]]:
+        """(key, size, last_modified) under a prefix, in lexicographic key order"""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def presigned_url(self, key: str, expiration: int = 3600) -> Optional[str]:
+        ...
+
+    def presigned_upload(self, key: str, content_type: str, max_size: int, expiration: int = 900) -> Optional[Dict]:
+        """
+        Target a client can upload `key` to without going through Django:
+        {'method', 'url', 'fields', 'headers'}. None when the backend cannot
+        take direct uploads.
+        """
+        return None
+
+    # Multipart uploads: parts are sent one by one (in any order, retried at
+    # will) and joined into `key` on completion without buffering the object
+    @abstractmethod
+    def create_multipart(self, key: str, content_type: str = None) -> str:
+        """Start a multipart upload and return its id"""
+
+    @abstractmethod
+    def upload_part(self, key: str, upload_id: str, part_number: int, fileobj: BinaryIO, size: int) -> str:
+        """Store part `part_number` (1-based), replacing an earlier attempt. Returns its ETag."""
+
+    @abstractmethod
+    def complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        """Join the (part_number, etag) parts in order into `key` and return its URL"""
+
+    @abstractmethod
+    def abort_multipart(self, key: str, upload_id: str) -> bool:
+        """Discard an unfinished multipart upload and its parts"""
+
+    # asyncio entry points: the blocking call runs in the default thread pool,
+    # so many transfers can be awaited concurrently from one event loop
+    async def asave(self, key: str, data: Data, content_type: str = None, extra_args: Dict = None) -> str:
+        return await asyncio.to_thread(self.save, key, data, content_type, extra_args)
+
+    async def aread(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.read, key)
+
+    async def aexists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.exists, key)
+
+    async def adelete(self, key: str) -> bool:
+        return await asyncio.to_thread(self.delete, key)
+
+    async def adelete_many(self, keys: List[str]) -> Tuple[int, List[str]]:
+        return await asyncio.to_thread(self.delete_many, keys)
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files under MEDIA_ROOT, written atomically (temp file in the same directory + rename)"""
+
+    name = 'local'
+
+    def __init__(self, root: str = None, base_url: str = None):
+        self._root = root
+        self._base_url = base_url
+
+    @property
+    def root(self) -> str:
+        return str(self._root or settings.MEDIA_ROOT)
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url or settings.MEDIA_URL
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @property
+    def multipart_root(self) -> str:
+        """Parts of unfinished multipart uploads (outside MEDIA_ROOT, never served; shared with the workers)"""
+        return settings.CHUNKED_UPLOAD_DIR
+
+    @staticmethod
+    def _write_atomic(path: str, write) -> None:
+        """Call write(f) on a sibling temp file, then rename it over `path`"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Readers never see a partially written file: write a sibling temp file, then rename over
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def save(self, key: str, data: Data, content_type: str = None, extra_args: Dict = None) -> str:
+        def write(f):
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                if hasattr(data, 'seek'):
+                    data.seek(0)
+                shutil.copyfileobj(data, f, COPY_CHUNK_SIZE)
+                if hasattr(data, 'seek'):
+                    data.seek(0)
+
+        self._write_atomic(self.path(key), write)
+        return self.url(key)
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def open_read(self, key: str) -> Optional[BinaryIO]:
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def download_to(self, key: str, fileobj: BinaryIO) -> bool:
+        try:
+            with open(self.path(key), 'rb') as f:
+                shutil.copyfileobj(f, fileobj, COPY_CHUNK_SIZE)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def copy(self, src_key: str, dst_key: str, content_type: str = None, extra_args: Dict = None) -> str:
+        with open(self.path(src_key), 'rb') as src:
+            self._write_atomic(self.path(dst_key), lambda f: shutil.copyfileobj(src, f, COPY_CHUNK_SIZE))
+        return self.url(dst_key)
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete_many(self, keys: List[str]) -> Tuple[int, List[str]]:
+        keys = [key for key in dict.fromkeys(keys) if key]
+        failed = []
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                failed.append(key)
+        return len(keys) - len(failed), failed
+
+    def iter_objects(self, prefix: str, start_after: str = None) -> Iterator[Tuple[str, int, datetime.datetime]]:
+        def walk(directory):
+            with os.scandir(directory) as entries:
+                # A directory sorts as "name/" so its keys come in the same place S3 lists them
+                entries = sorted(entries, key=lambda entry: entry.name + ('/' if entry.is_dir() else ''))
+            for entry in entries:
+                if entry.is_dir():
+                    yield from walk(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+        root = self.path(prefix)
+        if not os.path.isdir(root):
+            return
+
+        for entry in walk(root):
+            key = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+            if start_after and key <= start_after:
+                continue
+            stat = entry.stat()
+            yield key, stat.st_size, datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}{key}"
+
+    def presigned_url(self, key: str, expiration: int = 3600) -> Optional[str]:
+        return self.url(key)
+
+    def _part_path(self, upload_id: str, part_number: int) -> str:
+        return os.path.join(self.multipart_root, upload_id, f"{part_number:05d}.part")
+
+    def create_multipart(self, key: str, content_type: str = None) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.multipart_root, upload_id), exist_ok=True)
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, fileobj: BinaryIO, size: int) -> str:
+        digest = hashlib.md5()
+
+        def write(f):
+            while True:
+                buf = fileobj.read(COPY_CHUNK_SIZE)
+                if not buf:
+                    break
+                digest.update(buf)
+                f.write(buf)
+
+        self._write_atomic(self._part_path(upload_id, part_number), write)
+        return f'"{digest.hexdigest()}"'
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        def write(f):
+            for part_number, _ in sorted(parts):
+                with open(self._part_path(upload_id, part_number), 'rb') as part:
+                    shutil.copyfileobj(part, f, COPY_CHUNK_SIZE)
+
+        self._write_atomic(self.path(key), write)
+        self.abort_multipart(key, upload_id)
+        return self.url(key)
+
+    def abort_multipart(self, key: str, upload_id: str) -> bool:
+        shutil.rmtree(os.path.join(self.multipart_root, upload_id), ignore_errors=True)
+        return True
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3 or an S3-compatible endpoint (AWS_S3_ENDPOINT_URL). One pooled client
+    per process (recreated after fork), retries with backoff and tuned
+    multipart transfers.
+    """
+
+    name = 's3'
+
+    def __init__(self, bucket: str = None, endpoint_url: str = None):
+        self.bucket = bucket or settings.AWS_STORAGE_BUCKET_NAME
+        self.endpoint_url = endpoint_url or settings.AWS_S3_ENDPOINT_URL or None
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+        self._transfer_config = None
+
+    @property
+    def client(self):
+        # botocore clients are thread-safe but must not cross a fork (Celery prefork workers)
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    self._client = self._create_client()
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def _create_client(self):
+        import boto3
+        from botocore.config import Config
+
+        config_params = {
+            'max_pool_connections': settings.STORAGE_S3_MAX_POOL_CONNECTIONS,
+            'retries': {'max_attempts': settings.STORAGE_S3_MAX_ATTEMPTS, 'mode': settings.STORAGE_S3_RETRY_MODE},
+            'connect_timeout': settings.STORAGE_S3_CONNECT_TIMEOUT,
+            'read_timeout': settings.STORAGE_S3_READ_TIMEOUT,
+        }
+        if self.endpoint_url:
+            # MinIO and most S3 stand-ins only support path-style addressing
+            config_params['s3'] = {'addressing_style': 'path'}
+
+        return boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+            endpoint_url=self.endpoint_url,
+            config=Config(**config_params),
+        )
+
+    @property
+    def transfer_config(self):
+        if self._transfer_config is None:
+            from boto3.s3.transfer import TransferConfig
+            self._transfer_config = TransferConfig(
+                multipart_threshold=settings.STORAGE_MULTIPART_THRESHOLD,
+                multipart_chunksize=settings.STORAGE_MULTIPART_CHUNKSIZE,
+                max_concurrency=settings.STORAGE_MAX_CONCURRENCY,
+                use_threads=True,
+            )
+        return self._transfer_config
+
+    @staticmethod
+    def _is_not_found(error) -> bool:
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def save(self, key: str, data: Data, content_type: str = None, extra_args: Dict = None) -> str:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            fileobj = io.BytesIO(data)
+        else:
+            fileobj = data
+            if hasattr(fileobj, 'seek'):
+                fileobj.seek(0)
+
+        upload_args = {
+            'ACL': settings.AWS_DEFAULT_ACL,
+            'CacheControl': 'max-age=86400',
+        }
+        if content_type:
+            upload_args['ContentType'] = content_type
+        upload_args.update(extra_args or {})
+
+        self.client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=upload_args, Config=self.transfer_config)
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+        return self.url(key)
+
+    def read(self, key: str) -> Optional[bytes]:
+        buf = io.BytesIO()
+        return buf.getvalue() if self.download_to(key, buf) else None
+
+    def open_read(self, key: str) -> Optional[BinaryIO]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+
+    def download_to(self, key: str, fileobj: BinaryIO) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.download_fileobj(self.bucket, key, fileobj, Config=self.transfer_config)
+            return True
+        except ClientError as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+
+    def copy(self, src_key: str, dst_key: str, content_type: str = None, extra_args: Dict = None) -> str:
+        # Managed copy: multipart UploadPartCopy above the transfer threshold, bytes never leave S3
+        copy_args = {
+            'ACL': settings.AWS_DEFAULT_ACL,
+            'MetadataDirective': 'REPLACE',
+        }
+        if content_type:
+            copy_args['ContentType'] = content_type
+        copy_args.update(extra_args or {})
+
+        self.client.copy(
+            {'Bucket': self.bucket, 'Key': src_key}, self.bucket, dst_key,
+            ExtraArgs=copy_args, Config=self.transfer_config
+        )
+        return self.url(dst_key)
+
+    def delete(self, key: str) -> bool:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def delete_many(self, keys: List[str]) -> Tuple[int, List[str]]:
+        keys = [key for key in dict.fromkeys(keys) if key]
+        deleted, failed = 0, []
+        for i in range(0, len(keys), 1000):
+            chunk = keys[i:i + 1000]
+            try:
+                response = self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+                )
+                errors = [error['Key'] for error in response.get('Errors', [])]
+            except Exception as e:
+                logger.error(f"DeleteObjects failed for {len(chunk)} keys: {e}")
+                errors = chunk
+            deleted += len(chunk) - len(errors)
+            failed.extend(errors)
+        return deleted, failed
+
+    def iter_objects(self, prefix: str, start_after: str = None) -> Iterator[Tuple[str, int, datetime.datetime]]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        params = {
+            'Bucket': self.bucket,
+            'Prefix': prefix,
+            'PaginationConfig': {'PageSize': 1000},
+        }
+        if start_after:
+            params['StartAfter'] = start_after
+
+        for page in paginator.paginate(**params):
+            for obj in page.get('Contents', []):
+                yield obj['Key'], obj['Size'], obj['LastModified']
+
+    def url(self, key: str) -> str:
+        if settings.AWS_S3_CUSTOM_DOMAIN:
+            return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{key}"
+
+    def presigned_url(self, key: str, expiration: int = 3600) -> Optional[str]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket, 'Key': key},
+                ExpiresIn=expiration
+            )
+        except ClientError:
+            return None
+
+    def presigned_upload(self, key: str, content_type: str, max_size: int, expiration: int = 900) -> Optional[Dict]:
+        # Presigned POST rather than PUT: the policy lets S3 itself enforce the size limit
+        post = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expiration,
+        )
+        return {'method': 'POST', 'url': post['url'], 'fields': post['fields'], 'headers': {}}
+
+    def create_multipart(self, key: str, content_type: str = None) -> str:
+        params = {'Bucket': self.bucket, 'Key': key}
+        if content_type:
+            params['ContentType'] = content_type
+        return self.client.create_multipart_upload(**params)['UploadId']
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, fileobj: BinaryIO, size: int) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=fileobj,
+            ContentLength=size,
+        )
+        return response['ETag']
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': etag} for n, etag in sorted(parts)]},
+        )
+        return self.url(key)
+
+    def abort_multipart(self, key: str, upload_id: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+                return True
+            raise
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def build_storage(backend: str = None) -> StorageBackend:
+    """Instantiate a backend: 's3', 'local', or None for the one the settings select"""
+    if backend is None:
+        use_s3 = settings.USE_S3_STORAGE and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY
+        backend = 's3' if use_s3 else 'local'
+    if backend == 's3':
+        return S3StorageBackend()
+    if backend == 'local':
+        return LocalStorageBackend()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage engine, created on first use"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = build_storage()
+    return _storage
@@ -0,0 +1,92 @@
+"""
+Celery tasks for image uploads
+"""
+
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+from .models import UploadIntent
+from .services import aws_image_service
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def finalize_upload_intent(intent_id: str):
+    """Ingest a direct upload from storage: inspection, moderation, blob store"""
+    from .uploads import UploadRejected, finalize_upload
+    
+    try:
+        intent = UploadIntent.objects.select_related('user').get(pk=intent_id)
+    except UploadIntent.DoesNotExist:
+        return {'error': f"Upload intent {intent_id} not found"}
+    
+    if intent.status != 'processing':
+        return {'upload_id': intent_id, 'status': intent.status, 'skipped': True}
+    
+    try:
+        image = finalize_upload(intent)
+    except UploadRejected as e:
+        UploadIntent.objects.filter(pk=intent.pk).update(
+            status='failed', error_message=str(e), completed_at=timezone.now()
+        )
+        return {'upload_id': intent_id, 'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Finalizing upload {intent_id} failed: {str(e)}")
+        UploadIntent.objects.filter(pk=intent.pk).update(
+            status='failed', error_message="Failed to process upload", completed_at=timezone.now()
+        )
+        return {'upload_id': intent_id, 'status': 'failed', 'error': str(e)}
+    
+    UploadIntent.objects.filter(pk=intent.pk).update(
+        status='completed', image=image, completed_at=timezone.now()
+    )
+    return {'upload_id': intent_id, 'status': 'completed', 'image_id': str(image.id)}
+
+
+@shared_task
+def expire_upload_intents():
+    """
+    Drop staged bytes of uploads never completed (or rejected) before they
+    expired, including the parts of abandoned chunked sessions
+    """
+    from .uploads import abort_chunked_upload
+    
+    try:
+        stale = UploadIntent.objects.filter(
+            status__in=['pending', 'failed'],
+            expires_at__lt=timezone.now()
+        )
+        
+        aborted, failed_aborts = 0, []
+        for intent in stale.filter(chunk_size__isnull=False):
+            try:
+                abort_chunked_upload(intent)
+                aborted += 1
+            except Exception as e:
+                logger.error(f"Aborting chunked upload {intent.pk} failed: {str(e)}")
+                failed_aborts.append(intent.pk)
+        
+        # Sessions whose parts could not be discarded are retried next run
+        stale = stale.exclude(pk__in=failed_aborts)
+        
+        expired, failed_deletes = 0, 0
+        for batch in _chunks(list(stale.values_list('pk', 'staging_key')), 1000):
+            deleted, failed = aws_image_service.delete_many([key for _, key in batch])
+            failed_deletes += len(failed)
+            expired += UploadIntent.objects.filter(
+                pk__in=[pk for pk, key in batch if key not in failed]
+            ).update(status='expired')
+        
+        logger.info(f"Expired {expired} upload intents, {aborted} chunked ({failed_deletes} staging deletes failed)")
+        return {'expired': expired, 'aborted_chunked': aborted, 'failed_deletes': failed_deletes}
+    
+    except Exception as e:
+        logger.error(f"Upload intent expiry failed: {str(e)}")
+        return {'error': str(e)}
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -0,0 +1,38 @@
+from config.testing import HeavyColumnTestCase, QueryCeilingTestCase, create_image
+from .models import ImageTag, ImageTagAssignment
+
+
+class ListQueryCountTests(QueryCeilingTestCase):
+    """Own and public image lists"""
+    
+    def setUp(self):
+        super().setUp()
+        self.tag = ImageTag.objects.create(name='test', slug='test')
+    
+    def seed(self, count):
+        for _ in range(count):
+            image = create_image(self.user, is_public=True)
+            ImageTagAssignment.objects.create(image=image, tag=self.tag, created_by=self.user)
+    
+    def test_image_list(self):
+        self.assertQueryCeiling('/api/v1/images/', 3)
+    
+    def test_public_images(self):
+        self.assertQueryCeiling('/api/v1/images/public/', 3)
+
+
+class HeavyColumnTests(HeavyColumnTestCase):
+    """Image list and detail reads"""
+    
+    def setUp(self):
+        super().setUp()
+        self.image = create_image(self.user, is_public=True, moderation_result={'flagged': False})
+    
+    def test_image_list(self):
+        self.assertNoHeavyColumns('/api/v1/images/')
+    
+    def test_public_images(self):
+        self.assertNoHeavyColumns('/api/v1/images/public/')
+    
+    def test_image_detail(self):
+        self.assertNoHeavyColumns(f'/api/v1/images/{self.image.pk}/')
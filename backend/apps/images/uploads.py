@@ -0,0 +1,281 @@
+"""
+Image ingestion shared by multipart uploads and direct-to-storage uploads
+(upload intents: the client puts the bytes in storage, completion ingests them).
+"""
+import hashlib
+import os
+import logging
+import tempfile
+from typing import Dict, List
+from urllib.parse import urlencode, urlparse
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+
+from .blobs import store_blob
+from .models import Image, ImageTag, ImageTagAssignment, UploadChunk, UploadIntent
+from .services import aws_image_service, image_processing_service
+
+logger = logging.getLogger(__name__)
+
+# Raw client uploads waiting for completion; never referenced by a row
+STAGING_PREFIX = 'images/staging/'
+
+_signer = signing.TimestampSigner(salt='images.upload-intent')
+
+
+class UploadRejected(Exception):
+    """The uploaded file failed validation or content moderation"""
+
+
+def ingest_image(user, image_file: InMemoryUploadedFile, tags: List[str] = None, **fields) -> Image:
+    """Optimize, moderate and store an uploaded image, then create its Image row and tags"""
+    # Optimize image
+    optimized_image = image_processing_service.optimize_image(image_file)
+    
+    # Content moderation
+    is_safe, moderation_result = aws_image_service.moderate_content(optimized_image)
+    
+    if not is_safe:
+        raise UploadRejected("Image contains inappropriate content and cannot be uploaded.")
+    
+    # Extract metadata
+    metadata = image_processing_service.extract_image_metadata(optimized_image)
+    
+    # Create image instance
+    image = Image.objects.create(
+        user=user,
+        original_filename=image_file.name,
+        file_size=optimized_image.size,
+        width=metadata.get('width', 0),
+        height=metadata.get('height', 0),
+        format=metadata.get('format', ''),
+        is_content_safe=is_safe,
+        moderation_result=moderation_result,
+        moderation_checked_at=timezone.now(),
+        **fields
+    )
+    
+    # Upload to S3 or local storage, once per distinct content
+    blob, s3_url = store_blob(optimized_image, ext='jpg')
+    
+    if s3_url:
+        image.blob = blob
+        image.s3_key = blob.s3_key
+        
+        # In production without S3, s3_url contains absolute URL
+        # Store relative path to avoid path resolution issues
+        if not getattr(settings, 'USE_S3_STORAGE', False):
+            # Extract relative path from absolute URL
+            if s3_url.startswith(('http://', 'https://')):
+                relative_path = urlparse(s3_url).path
+                if relative_path.startswith('/media/'):
+                    relative_path = relative_path[7:]  # Remove /media/ prefix
+                image.s3_url = relative_path
+            else:
+                image.s3_url = s3_url
+        else:
+            # S3 storage: keep absolute URL
+            image.s3_url = s3_url
+        
+        image.s3_bucket = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', 'local-dev')
+        image.status = 'uploaded'
+    else:
+        image.status = 'failed'
+        image.error_message = "Failed to upload to storage"
+    
+    image.save()
+    
+    # Add tags
+    for tag_name in tags or []:
+        tag, created = ImageTag.objects.get_or_create(
+            name=tag_name.lower(),
+            defaults={'slug': tag_name.lower().replace(' ', '-')}
+        )
+        ImageTagAssignment.objects.create(
+            image=image,
+            tag=tag,
+            created_by=user
+        )
+    
+    return image
+
+
+def create_upload_intent(user, filename: str, content_type: str, expiry_seconds: int = None, **fields) -> UploadIntent:
+    """Reserve a staging key the client uploads to directly"""
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    expiry_seconds = expiry_seconds or settings.UPLOAD_INTENT_EXPIRY_SECONDS
+    intent = UploadIntent(
+        user=user,
+        filename=filename,
+        content_type=content_type,
+        expires_at=timezone.now() + timezone.timedelta(seconds=expiry_seconds),
+        **fields
+    )
+    intent.staging_key = f"{STAGING_PREFIX}{user.id}/{intent.id}.{ext}"
+    intent.save()
+    return intent
+
+
+def upload_target(intent: UploadIntent, request) -> Dict:
+    """
+    Presigned POST on S3. Local storage has no presigned uploads, so the
+    stand-in is a signed PUT to upload_intent_data (development only).
+    """
+    expiration = max(int((intent.expires_at - timezone.now()).total_seconds()), 1)
+    target = aws_image_service.storage.presigned_upload(
+        intent.staging_key, intent.content_type, settings.MAX_UPLOAD_SIZE, expiration
+    )
+    if target:
+        return target
+    
+    path = reverse('images:upload-intent-data', args=[intent.id])
+    query = urlencode({'token': _signer.sign(str(intent.id))})
+    return {
+        'method': 'PUT',
+        'url': request.build_absolute_uri(f"{path}?{query}"),
+        'fields': {},
+        'headers': {'Content-Type': intent.content_type},
+    }
+
+
+def check_upload_token(intent_id, token: str) -> bool:
+    """Validate a signed local upload URL (signature and expiry)"""
+    try:
+        value = _signer.unsign(token, max_age=settings.UPLOAD_INTENT_EXPIRY_SECONDS)
+    except signing.BadSignature:
+        return False
+    return value == str(intent_id)
+
+
+def open_chunked_upload(user, filename: str, content_type: str, size: int, **fields) -> UploadIntent:
+    """Start a resumable session: the object is assembled from storage multipart parts"""
+    intent = create_upload_intent(
+        user,
+        filename,
+        content_type,
+        expiry_seconds=settings.CHUNKED_UPLOAD_EXPIRY_SECONDS,
+        total_size=size,
+        chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        **fields
+    )
+    intent.multipart_id = aws_image_service.storage.create_multipart(intent.staging_key, content_type)
+    intent.save(update_fields=['multipart_id'])
+    return intent
+
+
+def receive_chunk(intent: UploadIntent, index: int, stream, length: int, sha256: str) -> UploadChunk:
+    """
+    Spool one chunk to a temp file on disk while hashing it, check it
+    against the client's checksum and store it as a multipart part.
+    Re-sending a chunk replaces it.
+    """
+    if index >= intent.total_chunks:
+        raise UploadRejected(f"Chunk index out of range (0-{intent.total_chunks - 1})")
+    expected = intent.expected_chunk_size(index)
+    if length != expected:
+        raise UploadRejected(f"Chunk {index} must be {expected} bytes, got {length}")
+    
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile() as spool:
+        remaining = length
+        while remaining:
+            buf = stream.read(min(1024 * 1024, remaining))
+            if not buf:
+                break
+            digest.update(buf)
+            spool.write(buf)
+            remaining -= len(buf)
+        if remaining:
+            raise UploadRejected(f"Chunk {index} truncated: {remaining} bytes missing")
+        if digest.hexdigest() != sha256.lower():
+            raise UploadRejected(f"Chunk {index} checksum mismatch")
+        
+        spool.seek(0)
+        etag = aws_image_service.storage.upload_part(
+            intent.staging_key, intent.multipart_id, index + 1, spool, length
+        )
+    
+    values = {'size': length, 'sha256': digest.hexdigest(), 'etag': etag}
+    try:
+        chunk, _ = UploadChunk.objects.update_or_create(intent=intent, index=index, defaults=values)
+    except IntegrityError:
+        # A concurrent re-send of this chunk inserted the row first (its lookup could not see
+        # the row yet): the part was replaced in storage either way, so just update the row
+        chunk, _ = UploadChunk.objects.update_or_create(intent=intent, index=index, defaults=values)
+    
+    # Sessions expire after a period without chunks, not a fixed time after opening
+    UploadIntent.objects.filter(pk=intent.pk).update(
+        expires_at=timezone.now() + timezone.timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY_SECONDS)
+    )
+    return chunk
+
+
+def missing_chunks(intent: UploadIntent) -> List[int]:
+    """Chunk indexes the client still has to send"""
+    received = set(intent.chunks.values_list('index', flat=True))
+    return [index for index in range(intent.total_chunks) if index not in received]
+
+
+def abort_chunked_upload(intent: UploadIntent) -> None:
+    """Discard the parts of an unfinished session"""
+    if intent.multipart_id:
+        aws_image_service.storage.abort_multipart(intent.staging_key, intent.multipart_id)
+    intent.chunks.all().delete()
+
+
+def finalize_upload(intent: UploadIntent) -> Image:
+    """Inspect and moderate the staged bytes, ingest them and drop the staging copy"""
+    storage = aws_image_service.storage
+    
+    if intent.is_chunked:
+        if missing_chunks(intent):
+            raise UploadRejected("Upload incomplete: chunks missing")
+        parts = [(chunk.index + 1, chunk.etag) for chunk in intent.chunks.all()]
+        storage.complete_multipart(intent.staging_key, intent.multipart_id, parts)
+        intent.chunks.all().delete()
+        max_size = settings.CHUNKED_UPLOAD_MAX_SIZE
+    else:
+        max_size = settings.MAX_UPLOAD_SIZE
+    
+    size = storage.size(intent.staging_key)
+    if size is None:
+        raise UploadRejected("Upload not found in storage")
+    if size > max_size:
+        storage.delete(intent.staging_key)
+        raise UploadRejected(f"File too large. Max size: {max_size // (1024*1024)}MB")
+    
+    # Large uploads spill to disk in the worker too
+    buffer = tempfile.SpooledTemporaryFile(max_size=settings.MAX_UPLOAD_SIZE)
+    storage.download_to(intent.staging_key, buffer)
+    buffer.seek(0)
+    image_file = InMemoryUploadedFile(
+        buffer, 'original_image', intent.filename, intent.content_type, size, None
+    )
+    
+    try:
+        if not aws_image_service.validate_image_format(image_file, max_size=max_size):
+            raise UploadRejected(
+                "Invalid image format or size. Allowed formats: " +
+                ", ".join(settings.ALLOWED_IMAGE_EXTENSIONS)
+            )
+        image = ingest_image(
+            intent.user,
+            image_file,
+            tags=intent.tags,
+            title=intent.title,
+            description=intent.description,
+            is_public=intent.is_public,
+        )
+    except UploadRejected:
+        storage.delete(intent.staging_key)
+        raise
+    finally:
+        buffer.close()
+    
+    storage.delete(intent.staging_key)
+    return image
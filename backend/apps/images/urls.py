@@ -6,6 +6,14 @@ app_name = 'images'
 urlpatterns = [
     # Image management
     path('upload/', views.ImageUploadView.as_view(), name='upload'),
+    path('upload-intent/', views.UploadIntentCreateView.as_view(), name='upload-intent'),
+    path('upload-intent/<uuid:pk>/', views.UploadIntentDetailView.as_view(), name='upload-intent-detail'),
+    path('upload-intent/<uuid:pk>/complete/', views.complete_upload_intent, name='upload-intent-complete'),
+    path('upload-intent/<uuid:pk>/data/', views.upload_intent_data, name='upload-intent-data'),
+    path('chunked-uploads/', views.ChunkedUploadCreateView.as_view(), name='chunked-upload'),
+    path('chunked-uploads/<uuid:pk>/', views.ChunkedUploadDetailView.as_view(), name='chunked-upload-detail'),
+    path('chunked-uploads/<uuid:pk>/chunks/<int:index>/', views.put_upload_chunk, name='chunked-upload-chunk'),
+    path('chunked-uploads/<uuid:pk>/complete/', views.complete_upload_intent, name='chunked-upload-complete'),
     path('', views.ImageListView.as_view(), name='list'),
     path('<uuid:pk>/', views.ImageDetailView.as_view(), name='detail'),
     path('public/', views.PublicImageListView.as_view(), name='public-list'),
@@ -1,20 +1,35 @@
+import os
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.throttling import ScopedRateThrottle
+from config.response_cache import anonymous_first_page, cache_response
+from config.throttling import ScopedRateThrottle
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, Http404
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db.models import Q
 from django.conf import settings
-from .models import Image, ProcessedImage, ImageTag
+from .models import Image, ProcessedImage, ImageTag, UploadIntent
 from .serializers import (
     ImageUploadSerializer, ImageSerializer, ProcessedImageSerializer,
-    ImageTagSerializer, ImageModerationSerializer
+    ImageTagSerializer, ImageModerationSerializer,
+    UploadIntentCreateSerializer, UploadIntentSerializer,
+    ChunkedUploadCreateSerializer, ChunkedUploadSerializer, UploadChunkSerializer
 )
 from .services import aws_image_service
+from apps.processing.publishing import PUBLIC_CACHE_CONTROL, PUBLIC_PREFIX
+from .media_auth import can_access_media
+from .serving import media_path, serve_file
+from .tasks import finalize_upload_intent
+from .uploads import (
+    UploadRejected, check_upload_token, create_upload_intent, missing_chunks,
+    open_chunked_upload, receive_chunk, upload_target
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -47,6 +62,211 @@ class ImageUploadView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class UploadIntentCreateView(generics.CreateAPIView):
+    """Start a direct-to-storage upload: returns where to send the bytes"""
+    
+    serializer_class = UploadIntentCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'images_upload'
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        data.pop('size')
+        
+        try:
+            intent = create_upload_intent(request.user, **data)
+            target = upload_target(intent, request)
+        except Exception as e:
+            logger.error(f"Upload intent failed for user {request.user.id}: {str(e)}")
+            return Response({
+                'error': 'Failed to start upload',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'upload_id': intent.id,
+            'upload': target,
+            'expires_at': intent.expires_at,
+            'complete_url': request.build_absolute_uri(
+                reverse('images:upload-intent-complete', args=[intent.id])
+            ),
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadIntentDetailView(generics.RetrieveAPIView):
+    """Status of a direct upload (poll after completing it)"""
+    
+    serializer_class = UploadIntentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadIntent.objects.filter(user=self.request.user)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def complete_upload_intent(request, pk):
+    """Bytes are in storage: inspect and moderate them in a worker"""
+    
+    intent = get_object_or_404(UploadIntent, pk=pk, user=request.user)
+    
+    if intent.status != 'pending':
+        return Response({
+            'error': 'Upload already completed',
+            'details': f"Upload is {intent.status}"
+        }, status=status.HTTP_409_CONFLICT)
+    
+    if intent.expires_at < timezone.now():
+        return Response({
+            'error': 'Upload expired',
+            'details': 'Start a new upload'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if intent.is_chunked:
+        missing = missing_chunks(intent)
+        if missing:
+            return Response({
+                'error': 'Upload incomplete',
+                'details': f"Missing chunks: {missing[:50]}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif not aws_image_service.storage.exists(intent.staging_key):
+        return Response({
+            'error': 'Upload not found',
+            'details': 'Send the file to the upload URL before completing'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Only one completion call wins
+    if not UploadIntent.objects.filter(pk=intent.pk, status='pending').update(status='processing'):
+        return Response({
+            'error': 'Upload already completed',
+            'details': 'Upload is being processed'
+        }, status=status.HTTP_409_CONFLICT)
+    
+    finalize_upload_intent.delay(str(intent.pk))
+    intent.refresh_from_db()
+    return Response(UploadIntentSerializer(intent).data, status=status.HTTP_202_ACCEPTED)
+
+complete_upload_intent.cls.throttle_scope = 'images_upload_complete'
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+def upload_intent_data(request, pk):
+    """
+    Local-storage stand-in for a presigned upload: the signed URL is the
+    credential, and the body is streamed to the staging key in chunks.
+    """
+    if not check_upload_token(pk, request.GET.get('token', '')):
+        return HttpResponse(status=403)
+    
+    intent = UploadIntent.objects.filter(
+        pk=pk, status='pending', expires_at__gt=timezone.now(), chunk_size__isnull=True
+    ).first()
+    if not intent:
+        raise Http404("Upload not found")
+    
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if length <= 0:
+        return HttpResponse(status=411)
+    if length > settings.MAX_UPLOAD_SIZE:
+        return HttpResponse(status=413)
+    
+    aws_image_service.storage.save(intent.staging_key, request, content_type=intent.content_type)
+    return HttpResponse(status=204)
+
+
+class ChunkedUploadCreateView(generics.CreateAPIView):
+    """Open a resumable upload session: the file is sent as numbered chunks"""
+    
+    serializer_class = ChunkedUploadCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'images_upload'
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            intent = open_chunked_upload(request.user, **serializer.validated_data)
+        except Exception as e:
+            logger.error(f"Chunked upload failed to open for user {request.user.id}: {str(e)}")
+            return Response({
+                'error': 'Failed to start upload',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'upload_id': intent.id,
+            'chunk_size': intent.chunk_size,
+            'total_chunks': intent.total_chunks,
+            'expires_at': intent.expires_at,
+            'complete_url': request.build_absolute_uri(
+                reverse('images:chunked-upload-complete', args=[intent.id])
+            ),
+        }, status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadDetailView(generics.RetrieveAPIView):
+    """Session status: received and missing chunks, to resume after a dropped connection"""
+    
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadIntent.objects.filter(
+            user=self.request.user, chunk_size__isnull=False
+        ).prefetch_related('chunks')
+
+
+@api_view(['PUT'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def put_upload_chunk(request, pk, index):
+    """
+    Receive chunk `index` as the raw request body with its SHA-256 in the
+    X-Chunk-SHA256 header. The body is streamed to disk, never parsed.
+    """
+    intent = get_object_or_404(UploadIntent, pk=pk, user=request.user, chunk_size__isnull=False)
+    
+    if intent.status != 'pending' or intent.expires_at < timezone.now():
+        return Response({
+            'error': 'Upload closed',
+            'details': f"Upload is {intent.status if intent.status != 'pending' else 'expired'}"
+        }, status=status.HTTP_409_CONFLICT)
+    
+    checksum = request.headers.get('X-Chunk-SHA256', '')
+    if len(checksum) != 64:
+        return Response({
+            'error': 'Checksum required',
+            'details': 'Send the chunk SHA-256 (hex) in the X-Chunk-SHA256 header'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    
+    try:
+        chunk = receive_chunk(intent, index, request.stream, length, checksum)
+    except UploadRejected as e:
+        return Response({
+            'error': 'Invalid chunk',
+            'details': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(UploadChunkSerializer(chunk).data, status=status.HTTP_201_CREATED)
+
+put_upload_chunk.cls.throttle_scope = 'images_upload_chunk'
+
+
 class ImageListView(generics.ListAPIView):
     """List user's images"""
     
@@ -79,7 +299,7 @@ class ImageListView(generics.ListAPIView):
                 Q(original_filename__icontains=search)
             )
         
-        return queryset.order_by('-created_at')
+        return ImageSerializer.setup_eager_loading(queryset).order_by('-created_at')
 
 
 class ImageDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -89,7 +309,7 @@ class ImageDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Image.active_objects.filter(user=self.request.user)
+        return Image.active_objects.light().filter(user=self.request.user)
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -101,17 +321,20 @@ class ImageDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Also soft delete related processing jobs and results
         from apps.processing.models import ProcessingJob, ProcessingResult
+        from apps.processing.publishing import unpublish_result
         
         # Soft delete all processing jobs that use this image
-        jobs = ProcessingJob.active_objects.filter(original_image=instance)
+        jobs = ProcessingJob.active_objects.light().filter(original_image=instance)
         for job in jobs:
             job.is_deleted = True
             job.deleted_at = timezone.now()
             job.save(update_fields=['is_deleted', 'deleted_at'])
             
             # Soft delete all results from these jobs
-            results = ProcessingResult.active_objects.filter(job=job)
+            results = ProcessingResult.active_objects.light().filter(job=job)
             for result in results:
+                if result.public_key:
+                    result = unpublish_result(result)
                 result.is_deleted = True
                 result.deleted_at = timezone.now()
                 result.save(update_fields=['is_deleted', 'deleted_at'])
@@ -130,11 +353,15 @@ class PublicImageListView(generics.ListAPIView):
     throttle_scope = 'images_public_list'
     
     def get_queryset(self):
-        return Image.active_objects.filter(
+        return ImageSerializer.setup_eager_loading(Image.active_objects.filter(
             is_public=True, 
             is_content_safe=True,
             status='uploaded'
-        ).order_by('-created_at')
+        )).order_by('-created_at')
+    
+    @cache_response('public_images', when=anonymous_first_page)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
 class ProcessedImageListView(generics.ListAPIView):
@@ -146,7 +373,9 @@ class ProcessedImageListView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         # Note: ProcessedImage model doesn't have soft delete, but filter by non-deleted original images
-        queryset = ProcessedImage.objects.filter(user=user, original_image__is_deleted=False)
+        queryset = ProcessedImage.objects.filter(
+            user=user, original_image__is_deleted=False
+        ).select_related('original_image', 'user').defer('original_image__moderation_result')
         
         # Filter by original image
         original_image_id = self.request.query_params.get('original_image')
@@ -213,7 +442,7 @@ def toggle_favorite(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-toggle_favorite.throttle_scope = 'images_toggle_favorite'
+toggle_favorite.cls.throttle_scope = 'images_toggle_favorite'
 
 
 @api_view(['POST'])
@@ -249,7 +478,7 @@ def rate_processed_image(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-rate_processed_image.throttle_scope = 'images_rate'
+rate_processed_image.cls.throttle_scope = 'images_rate'
 
 
 @api_view(['GET'])
@@ -261,7 +490,7 @@ def download_image(request, pk):
     try:
         # Try to find in regular images first
         try:
-            image = get_object_or_404(Image, pk=pk, user=request.user)
+            image = get_object_or_404(Image.objects.light(), pk=pk, user=request.user)
             s3_key = image.s3_key
         except:
             # Try processed images
@@ -301,7 +530,7 @@ def download_image(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-download_image.throttle_scope = 'images_download'
+download_image.cls.throttle_scope = 'images_download'
 
 
 class ImageTagListView(generics.ListCreateAPIView):
@@ -322,18 +551,18 @@ class ImageTagListView(generics.ListCreateAPIView):
 def user_stats(request):
     """Get user's image statistics"""
     
+    from apps.processing.stats import get_user_stats
+    
     user = request.user
-    today = timezone.now().date()
+    rollup = get_user_stats(user)
     
     stats = {
-        'total_images': Image.objects.filter(user=user).count(),
-        'safe_images': Image.objects.filter(user=user, is_content_safe=True).count(),
-        'processed_images': ProcessedImage.objects.filter(user=user).count(),
-        'favorite_processed': ProcessedImage.objects.filter(user=user, is_favorite=True).count(),
-        'today_uploads': Image.objects.filter(user=user, created_at__date=today).count(),
-        'storage_used_mb': sum(
-            img.file_size for img in Image.objects.filter(user=user)
-        ) / (1024 * 1024),
+        'total_images': rollup.images_total,
+        'safe_images': rollup.images_safe,
+        'processed_images': rollup.processed_images,
+        'favorite_processed': rollup.favorite_processed,
+        'today_uploads': rollup.uploads_today if rollup.uploads_day == timezone.localdate() else 0,
+        'storage_used_mb': rollup.image_bytes / (1024 * 1024),
         'daily_limit': (
             settings.DAILY_UPLOAD_LIMIT_PREMIUM 
             if user.is_premium 
@@ -344,7 +573,7 @@ def user_stats(request):
     
     return Response(stats)
 
-user_stats.throttle_scope = 'images_stats'
+user_stats.cls.throttle_scope = 'images_stats'
 
 # Admin views for content moderation
 class ImageModerationListView(generics.ListAPIView):
@@ -365,7 +594,7 @@ def approve_image(request, pk):
     """Approve flagged image (admin only)"""
     
     try:
-        image = get_object_or_404(Image, pk=pk)
+        image = get_object_or_404(Image.objects.light(), pk=pk)
         image.is_content_safe = True
         image.save()
         
@@ -379,15 +608,6 @@ def approve_image(request, pk):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-import mimetypes
-from django.http import HttpResponse, Http404, FileResponse
-from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404
-import os
-from django.conf import settings
-
 @require_http_methods(["GET"])
 @csrf_exempt
 def serve_media_file(request, file_path):
@@ -398,86 +618,39 @@ def serve_media_file(request, file_path):
     logger = logging.getLogger(__name__)
     
     try:
-        # Build the full file path
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-        
-        # Security: Prevent directory traversal attacks
-        if not os.path.normpath(full_path).startswith(os.path.normpath(settings.MEDIA_ROOT)):
-            raise Http404("Access denied")
+        # Build the full file path (refuses directory traversal)
+        full_path = media_path(file_path)
         
         # Check if file exists
         if not os.path.exists(full_path):
             raise Http404("File not found")
         
+        # Published public results: immutable content-hashed copies, cacheable by anyone
+        if file_path.startswith(PUBLIC_PREFIX):
+            return serve_file(request, file_path, cache_control=PUBLIC_CACHE_CONTROL)
+        
+        # Export archives: served only by download_result_export, after its ownership check
+        if file_path.startswith('exports/'):
+            raise Http404("File not found")
+        
         # Additional security checks based on file type/location
-        if file_path.startswith('processed/'):
-            # For processed images, check if user owns the result or it's public
-            from apps.processing.models import ProcessingResult
-            
-            try:
-                # Find the result by s3_key
-                result = ProcessingResult.objects.select_related('job__user').filter(
-                    s3_key=file_path
-                ).first()
-                
-                if not result:
-                    raise Http404("File not found in database")
-                
-                # Allow if user is authenticated and owns this result
-                if request.user.is_authenticated and result.job.user == request.user:
-                    pass  # User can access their own files (public or private)
-                # Allow if it's a public result (regardless of authentication)
-                elif result.is_public:
-                    pass  # Anyone can access public files
-                else:
-                    raise Http404("Access denied")
-                    
-            except ProcessingResult.DoesNotExist:
-                raise Http404("File not found in database")
-            except Exception as e:
-                logger.error(f"Error checking result ownership: {str(e)}")
+        if file_path.startswith(('processed/', 'blobs/')):
+            # Results and shared blobs: the owner's, or public (cached per key, no query in the common case)
+            if not can_access_media(request.user, file_path):
                 raise Http404("Access denied")
         
         elif file_path.startswith('images/uploads/'):
             # For original uploads, require authentication and ownership
             if not request.user.is_authenticated:
                 raise Http404("Authentication required")
-                
+            
             path_parts = file_path.split('/')
-            if len(path_parts) >= 3:
-                user_id = path_parts[2]
-                if str(request.user.id) != user_id:
-                    # Check if user owns this image
-                    from apps.images.models import Image
-                    image_id = os.path.splitext(os.path.basename(file_path))[0]
-                    
-                    try:
-                        image = Image.objects.get(id=image_id, user=request.user)
-                    except:
-                        raise Http404("Access denied")
-        
-        # Determine content type
-        content_type, _ = mimetypes.guess_type(full_path)
-        if not content_type:
-            content_type = 'application/octet-stream'
-        
-        # Serve the file with security headers
-        response = FileResponse(
-            open(full_path, 'rb'),
-            content_type=content_type,
-            as_attachment=False
-        )
-        
-        # Security headers
-        response['X-Content-Type-Options'] = 'nosniff'
-        response['X-Frame-Options'] = 'DENY'
-        response['Cache-Control'] = 'private, max-age=3600'
-        
-        # Set proper filename for downloads
-        filename = os.path.basename(file_path)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
+            if len(path_parts) >= 3 and str(request.user.id) != path_parts[2]:
+                if not can_access_media(request.user, file_path):
+                    raise Http404("Access denied")
         
-        return response
+        # Hand off to the proxy or stream with sendfile (Range and conditional requests included)
+        return serve_file(request, file_path)
         
     except FileNotFoundError:
         raise Http404("File not found")
@@ -500,83 +673,36 @@ def authenticated_media_proxy(request, file_path):
     logger = logging.getLogger(__name__)
     
     try:
-        # Build the full file path
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-        
-        # Security: Prevent directory traversal attacks
-        if not os.path.normpath(full_path).startswith(os.path.normpath(settings.MEDIA_ROOT)):
-            raise Http404("Access denied")
+        # Build the full file path (refuses directory traversal)
+        full_path = media_path(file_path)
         
         # Check if file exists
         if not os.path.exists(full_path):
             raise Http404("File not found")
         
+        # Published public results: immutable content-hashed copies, cacheable by anyone
+        if file_path.startswith(PUBLIC_PREFIX):
+            return serve_file(request, file_path, cache_control=PUBLIC_CACHE_CONTROL)
+        
+        # Export archives: served only by download_result_export, after its ownership check
+        if file_path.startswith('exports/'):
+            raise Http404("File not found")
+        
         # Additional security checks based on file type/location
-        if file_path.startswith('processed/'):
-            # For processed images, check if user owns the result or it's public
-            from apps.processing.models import ProcessingResult
-            
-            try:
-                # Find the result by s3_key
-                result = ProcessingResult.objects.select_related('job__user').filter(
-                    s3_key=file_path
-                ).first()
-                
-                if not result:
-                    raise Http404("File not found in database")
-                
-                # Allow if user owns this result
-                if result.job.user == request.user:
-                    pass  # User can access their own files (public or private)
-                # Allow if it's a public result
-                elif result.is_public:
-                    pass  # Anyone can access public files
-                else:
-                    raise Http404("Access denied")
-                    
-            except ProcessingResult.DoesNotExist:
-                raise Http404("File not found in database")
-            except Exception as e:
-                logger.error(f"Error checking result ownership: {str(e)}")
+        if file_path.startswith(('processed/', 'blobs/')):
+            # Results and shared blobs: the owner's, or public (cached per key, no query in the common case)
+            if not can_access_media(request.user, file_path):
                 raise Http404("Access denied")
         
         elif file_path.startswith('images/uploads/'):
             # For original uploads, require ownership
-            from apps.images.models import Image
             path_parts = file_path.split('/')
-            if len(path_parts) >= 3:
-                user_id = path_parts[2]
-                if str(request.user.id) != user_id:
-                    # Check if user owns this image
-                    image_id = os.path.splitext(os.path.basename(file_path))[0]
-                    
-                    try:
-                        image = Image.objects.get(id=image_id, user=request.user)
-                    except:
-                        raise Http404("Access denied")
-        
-        # Determine content type
-        content_type, _ = mimetypes.guess_type(full_path)
-        if not content_type:
-            content_type = 'application/octet-stream'
-        
-        # Serve the file with security headers
-        response = FileResponse(
-            open(full_path, 'rb'),
-            content_type=content_type,
-            as_attachment=False
-        )
-        
-        # Security headers
-        response['X-Content-Type-Options'] = 'nosniff'
-        response['X-Frame-Options'] = 'DENY'
-        response['Cache-Control'] = 'private, max-age=3600'
-        
-        # Set proper filename for downloads
-        filename = os.path.basename(file_path)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
+            if len(path_parts) >= 3 and str(request.user.id) != path_parts[2]:
+                if not can_access_media(request.user, file_path):
+                    raise Http404("Access denied")
         
-        return response
+        # Hand off to the proxy or stream with sendfile (Range and conditional requests included)
+        return serve_file(request, file_path)
         
     except FileNotFoundError:
         raise Http404("File not found")
@@ -5,3 +5,6 @@ class ProcessingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.processing'
     verbose_name = 'Image Processing'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,236 @@
+"""
+ZIP exports of a user's results and original uploads.
+
+The archive is generated as a stream: entries are STORED (the images are
+already compressed), written with data descriptors so the output never
+needs seeking, and file bytes are pulled from storage by a read-ahead
+thread into a bounded queue. Memory stays around EXPORT_READ_AHEAD_CHUNKS
+chunks however large the export is.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import zipfile
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.images.models import Image
+from apps.images.services import aws_image_service
+from .models import ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PREFIX = 'exports/'
+
+_MISSING = object()
+_END = object()
+
+
+class ExportEntry(NamedTuple):
+    arcname: str
+    key: str
+    date_time: Tuple[int, int, int, int, int, int]
+    meta: Dict
+
+
+class _ZipSink:
+    """Write-only, unseekable target for ZipFile: output is drained after every write"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_time(value) -> Tuple[int, int, int, int, int, int]:
+    value = timezone.localtime(value) if value else timezone.localtime()
+    return max(value.year, 1980), value.month, value.day, value.hour, value.minute, value.second
+
+
+def export_querysets(user, result_ids=None, image_ids=None, include_originals: bool = True):
+    """Active results (and originals) of `user`, optionally narrowed to a selection"""
+    results = ProcessingResult.active_objects.filter(job__user=user).exclude(s3_key='')
+    if result_ids is not None:
+        results = results.filter(pk__in=result_ids)
+    
+    images = Image.active_objects.filter(user=user)
+    if image_ids is not None:
+        images = images.filter(pk__in=image_ids)
+    elif result_ids is not None:
+        # A selection of results brings the originals they were made from
+        images = images.filter(processing_jobs__results__pk__in=result_ids).distinct()
+    if not include_originals:
+        images = images.none()
+    
+    return results, images
+
+
+def export_entries(results, images) -> Iterator[ExportEntry]:
+    for result in results.select_related('job__style').light('job').order_by('created_at').iterator():
+        ext = os.path.splitext(result.s3_key)[1] or f".{result.result_format or 'png'}"
+        created = result.created_at
+        yield ExportEntry(
+            arcname=f"results/{created:%Y-%m-%d}_{result.id}{ext}",
+            key=result.s3_key,
+            date_time=_zip_time(created),
+            meta={
+                'id': str(result.id),
+                'job_id': str(result.job_id),
+                'job_type': result.job.job_type,
+                'prompt': result.job.prompt,
+                'style': result.job.style.name if result.job.style else None,
+                'is_public': result.is_public,
+                'created_at': created.isoformat() if created else None,
+            },
+        )
+    
+    for image in images.light().order_by('created_at').iterator():
+        key = image.s3_key or image.original_image.name
+        if not key:
+            continue
+        ext = os.path.splitext(key)[1] or os.path.splitext(image.original_filename)[1]
+        created = image.created_at
+        yield ExportEntry(
+            arcname=f"originals/{created:%Y-%m-%d}_{image.id}{ext.lower()}",
+            key=key,
+            date_time=_zip_time(created),
+            meta={
+                'id': str(image.id),
+                'title': image.title,
+                'original_filename': image.original_filename,
+                'created_at': created.isoformat() if created else None,
+            },
+        )
+
+
+def _read_ahead(entries: Iterable[ExportEntry], chunk_size: int, depth: int) -> Iterator[Tuple[ExportEntry, object]]:
+    """
+    (entry, chunk) pairs read by a background thread, at most `depth` chunks
+    ahead of the consumer. Each entry ends with an _END chunk, or is a single
+    _MISSING chunk when its object is gone.
+    """
+    storage = aws_image_service.storage
+    pending = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for entry in entries:
+                stream = storage.open_read(entry.key)
+                if stream is None:
+                    if not put((entry, _MISSING)):
+                        return
+                    continue
+                try:
+                    while True:
+                        chunk = stream.read(chunk_size)
+                        if not chunk:
+                            break
+                        if not put((entry, chunk)):
+                            return
+                finally:
+                    stream.close()
+                if not put((entry, _END)):
+                    return
+        except Exception as e:
+            put((None, e))
+        finally:
+            put((None, done))
+    
+    # The querysets are evaluated in the reader thread: close its connection when it ends
+    def run():
+        from django.db import connection
+        try:
+            produce()
+        finally:
+            connection.close()
+    
+    reader = threading.Thread(target=run, name='export-read-ahead', daemon=True)
+    reader.start()
+    try:
+        while True:
+            entry, chunk = pending.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield entry, chunk
+    finally:
+        # Consumer finished or went away (client disconnect): release the reader
+        stop.set()
+
+
+def stream_zip(entries: Iterable[ExportEntry], stats: Optional[Dict] = None) -> Iterator[bytes]:
+    """ZIP_STORED archive of `entries` plus a manifest.json, as a stream of byte chunks"""
+    stats = stats if stats is not None else {}
+    stats.update(files=0, bytes=0, missing=[])
+    manifest = []
+    
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED)
+    current = None
+    
+    for entry, chunk in _read_ahead(entries, settings.EXPORT_CHUNK_SIZE, settings.EXPORT_READ_AHEAD_CHUNKS):
+        if chunk is _MISSING:
+            logger.warning(f"Export skipped missing object {entry.key}")
+            stats['missing'].append(entry.arcname)
+            continue
+        if current is None:
+            info = zipfile.ZipInfo(entry.arcname, date_time=entry.date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            current = archive.open(info, 'w')
+        if chunk is _END:
+            current.close()
+            current = None
+            stats['files'] += 1
+            manifest.append({'file': entry.arcname, **entry.meta})
+        else:
+            current.write(chunk)
+            stats['bytes'] += len(chunk)
+        
+        data = sink.drain()
+        if data:
+            yield data
+    
+    archive.writestr(
+        zipfile.ZipInfo('manifest.json', date_time=_zip_time(None)),
+        json.dumps({
+            'exported_at': timezone.now().isoformat(),
+            'files': manifest,
+            'missing': stats['missing'],
+        }, indent=2, ensure_ascii=False),
+    )
+    archive.close()
+    yield sink.drain()
+
+
+def export_filename() -> str:
+    return f"fotomorfia-export-{timezone.localtime():%Y%m%d-%H%M%S}.zip"
+
+
+def export_key(export) -> str:
+    return f"{EXPORT_PREFIX}{export.user_id}/{export.id}.zip"
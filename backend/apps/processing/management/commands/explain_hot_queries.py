@@ -0,0 +1,196 @@
+"""
+EXPLAIN the hot read paths (gallery/feed lists, media authorization,
+cleanup sweeps) and flag full table scans.
+
+Against a near-empty database the planner scans everything, so --seed
+fills the tables with throwaway rows first (rolled back at the end):
+    python manage.py explain_hot_queries --seed 5000 --verbose
+
+Planner statistics are refreshed with ANALYZE only where it runs inside the
+transaction (PostgreSQL, SQLite). MySQL's ANALYZE TABLE commits implicitly,
+which would keep the seeded rows, so there InnoDB's automatic statistics
+recalculation is relied on instead; point --seed at a scratch database if
+the plans look off.
+
+Run it against MySQL or PostgreSQL: SQLite cannot use an index for the bare
+boolean predicates Django emits there (WHERE NOT "is_deleted"), so it
+reports scans that production does not do.
+"""
+
+import random
+import re
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.images.models import Image
+from apps.processing.models import ProcessingJob, ProcessingResult, ResultExport
+from apps.processing.serializers import ProcessingJobSerializer, ProcessingResultSerializer
+
+FULL_SCAN_PATTERNS = {
+    'mysql': re.compile(r'Table scan on (\w+)'),  # MySQL 8 FORMAT=TREE plans
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?!\s+USING)'),
+}
+
+PAGE = 20
+
+
+def hot_queries(user):
+    """(name, queryset) of the query shapes the API and cleanup tasks run most"""
+    now = timezone.now()
+    return [
+        ('job list', ProcessingJobSerializer.setup_eager_loading(
+            ProcessingJob.objects.filter(user=user, is_deleted=False)
+        ).order_by('-created_at')[:PAGE]),
+        ('result list', ProcessingResultSerializer.setup_eager_loading(
+            ProcessingResult.active_objects.filter(job__user=user), user
+        ).order_by('-created_at')[:PAGE]),
+        ('public results', ProcessingResultSerializer.setup_eager_loading(
+            ProcessingResult.active_objects.filter(is_public=True)
+        ).order_by('-created_at')[:PAGE]),
+        ('image gallery', Image.active_objects.light().filter(
+            user=user, is_content_safe=True
+        ).order_by('-created_at')[:PAGE]),
+        ('public images', Image.active_objects.light().filter(
+            is_public=True, is_content_safe=True, status='uploaded'
+        ).order_by('-created_at')[:PAGE]),
+        ('media authorization', ProcessingResult.objects.filter(
+            s3_key=f"processed/{user.pk}/missing.png"
+        ).values_list('job__user_id', 'is_public', 'is_deleted')),
+        ('failed-job cleanup', ProcessingResult.objects.filter(
+            job__status='failed', job__completed_at__lt=now - timedelta(days=3)
+        ).order_by('pk').values_list('pk', flat=True)[:500]),
+        ('old-job cleanup', ProcessingJob.objects.filter(
+            created_at__lt=now - timedelta(days=30),
+            status__in=['completed', 'partially_failed', 'failed', 'cancelled'],
+        ).order_by('pk').values_list('pk', flat=True)[:500]),
+        ('tiering candidates', ProcessingResult.objects.filter(
+            storage_tier='hot', is_public=False, created_at__lt=now - timedelta(days=30)
+        ).order_by('pk').values_list('pk', flat=True)[:500]),
+        ('export expiry', ResultExport.objects.filter(
+            status='completed', expires_at__lt=now
+        ).values_list('pk', 's3_key')),
+    ]
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot queries and flag full table scans"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Seed this many throwaway jobs/results/images first')
+        parser.add_argument('--users', type=int, default=20, help='Users the seeded rows are spread over')
+        parser.add_argument('--verbose', action='store_true', help='Print every plan, not only flagged ones')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error when any full scan is found')
+    
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(f"No full-scan detection for {connection.vendor}: plans only"))
+        
+        with transaction.atomic():
+            if options['seed']:
+                user = self._seed(options['seed'], max(options['users'], 1))
+                self._analyze()
+            else:
+                user = get_user_model().objects.order_by('pk').first()
+                if user is None:
+                    raise CommandError("No users to query as: pass --seed")
+            
+            flagged = self._explain_all(user, pattern, options['verbose'])
+            # Seeded rows are throwaway
+            transaction.set_rollback(True)
+        
+        if flagged:
+            summary = ', '.join(f"{name} ({', '.join(tables)})" for name, tables in flagged)
+            message = f"{len(flagged)} hot queries do full scans: {summary}"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full scans"))
+    
+    def _explain_all(self, user, pattern, verbose):
+        flagged = []
+        for name, queryset in hot_queries(user):
+            plan = queryset.explain()
+            tables = sorted(set(pattern.findall(plan))) if pattern else []
+            if tables:
+                flagged.append((name, tables))
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {name}: {', '.join(tables)}"))
+            else:
+                self.stdout.write(f"ok         {name}")
+            if verbose or tables:
+                self.stdout.write(f"{plan}\n")
+        return flagged
+    
+    def _created(self, model, objs, tag_field):
+        """bulk_create `objs` and return them with primary keys set"""
+        created = model.objects.bulk_create(objs, batch_size=1000)
+        if connection.features.can_return_rows_from_bulk_insert:
+            return created
+        # MySQL returns no auto PKs: read the rows back by their unique tag
+        tags = [getattr(obj, tag_field) for obj in objs]
+        saved = {}
+        for start in range(0, len(tags), 1000):
+            chunk = tags[start:start + 1000]
+            saved.update((getattr(obj, tag_field), obj) for obj in model.objects.filter(**{f'{tag_field}__in': chunk}))
+        return [saved[tag] for tag in tags]
+    
+    def _seed(self, count, user_count):
+        run = uuid.uuid4().hex[:8]
+        User = get_user_model()
+        users = self._created(User, [
+            User(email=f"explain-{run}-{i}@example.com", username=f"explain-{run}-{i}")
+            for i in range(user_count)
+        ], 'email')
+        
+        now = timezone.now()
+        images = self._created(Image, [
+            Image(
+                user=users[i % user_count],
+                original_image=f"images/uploads/{users[i % user_count].pk}/{run}-{i}.png",
+                original_filename=f"{i}.png", file_size=1024, width=64, height=64, format='PNG',
+                is_content_safe=random.random() < 0.9, is_public=random.random() < 0.2,
+                is_deleted=random.random() < 0.1,
+                s3_key=f"images/uploads/{users[i % user_count].pk}/{run}-{i}.png",
+            )
+            for i in range(count)
+        ], 's3_key')
+        jobs = self._created(ProcessingJob, [
+            ProcessingJob(
+                user=image.user, job_type='edit', prompt=f"explain {run} {i}", original_image=image,
+                status=random.choice(['completed', 'completed', 'completed', 'failed', 'pending']),
+                completed_at=now - timedelta(days=random.randint(0, 60)),
+                is_deleted=random.random() < 0.1,
+            )
+            for i, image in enumerate(images)
+        ], 'prompt')
+        ProcessingResult.objects.bulk_create([
+            ProcessingResult(
+                job=job, result_format='png', result_size='1024x1024', result_quality='low',
+                result_background='opaque', s3_key=f"processed/{job.user_id}/{run}-{i}.png",
+                is_public=random.random() < 0.2, is_deleted=job.is_deleted,
+            )
+            for i, job in enumerate(jobs)
+        ], batch_size=1000)
+        self.stdout.write(f"Seeded {count} images/jobs/results over {user_count} users")
+        return users[0]
+    
+    def _analyze(self):
+        """Refresh planner statistics so the seeded volume is taken into account"""
+        tables = [model._meta.db_table for model in (Image, ProcessingJob, ProcessingResult, ResultExport)]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f"ANALYZE {', '.join(tables)}")
+            else:
+                # MySQL's ANALYZE TABLE commits implicitly and would keep the seeded rows
+                self.stdout.write(self.style.WARNING(
+                    f"Statistics not refreshed on {connection.vendor}: plans rely on automatic recalculation"
+                ))
@@ -0,0 +1,29 @@
+"""
+Report (or delete) storage blobs that no database row references
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.processing.tasks_cleanup import ORPHAN_SCAN_PREFIXES, reconcile_storage
+
+
+class Command(BaseCommand):
+    help = "Reconcile storage with the database. Dry run by default; pass --delete to remove orphans."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Delete orphans instead of only reporting them')
+        parser.add_argument(
+            '--prefix', action='append', dest='prefixes',
+            help=f"Storage prefix to scan (repeatable, default: {', '.join(ORPHAN_SCAN_PREFIXES)})"
+        )
+        parser.add_argument('--start-after', help='Resume the listing after this key')
+    
+    def handle(self, *args, **options):
+        report = reconcile_storage(
+            prefixes=options['prefixes'],
+            dry_run=not options['delete'],
+            start_after=options['start_after'],
+        )
+        self.stdout.write(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processing', '0005_processingjob_deleted_at_processingjob_is_deleted_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='results_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='results_expected',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='results_failed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('moderating', 'Content Moderation'), ('processing', 'Processing with OpenAI'), ('streaming', 'Streaming Response'), ('completed', 'Completed'), ('partially_failed', 'Partially Failed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0002_image_deleted_at_image_is_deleted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processing', '0006_processingjob_progress_fanout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('prompt', models.TextField(blank=True)),
+                ('celery_task_id', models.CharField(blank=True, help_text='Celery task ID for async processing', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('original_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='processing_batches', to='images.image')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Processing Batch',
+                'verbose_name_plural': 'Processing Batches',
+                'db_table': 'processing_batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='processing.processingbatch'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processing', '0007_processingbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='pipeline_steps',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='step_timings',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='job_type',
+            field=models.CharField(choices=[('generation', 'Image Generation'), ('edit', 'Image Editing'), ('style_transfer', 'Style Transfer'), ('pipeline', 'Pipeline')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='processingtemplate',
+            name='job_type',
+            field=models.CharField(choices=[('generation', 'Image Generation'), ('edit', 'Image Editing'), ('style_transfer', 'Style Transfer'), ('pipeline', 'Pipeline')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processing', '0008_processingjob_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingresult',
+            name='last_downloaded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='processingresult',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='StorageTierTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_key', models.CharField(max_length=500)),
+                ('to_key', models.CharField(max_length=500)),
+                ('from_format', models.CharField(max_length=10)),
+                ('to_format', models.CharField(max_length=10)),
+                ('from_size', models.PositiveBigIntegerField()),
+                ('to_size', models.PositiveBigIntegerField()),
+                ('storage_class', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tier_transitions', to='processing.processingresult')),
+            ],
+            options={
+                'db_table': 'storage_tier_transitions',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0003_stored_blob'),
+        ('processing', '0009_processingresult_storage_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingresult',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processing_results', to='images.storedblob'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processing', '0011_processingresult_s3_key_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingresult',
+            name='public_key',
+            field=models.CharField(blank=True, db_index=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processing', '0012_processingresult_public_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultExport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('result_ids', models.JSONField(blank=True, null=True)),
+                ('image_ids', models.JSONField(blank=True, null=True)),
+                ('include_originals', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20)),
+                ('s3_key', models.CharField(blank=True, max_length=500)),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Result Export',
+                'verbose_name_plural': 'Result Exports',
+                'db_table': 'result_exports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processing', '0013_resultexport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['user', 'is_deleted', '-created_at'], name='processing__user_id_c1e102_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', 'completed_at'], name='processing__status_290238_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', 'created_at'], name='processing__status_ac8e44_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingresult',
+            index=models.Index(fields=['job', 'is_deleted', '-created_at'], name='processing__job_id_cf40e2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingresult',
+            index=models.Index(fields=['is_public', 'is_deleted', '-created_at'], name='processing__is_publ_0dfece_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingresult',
+            index=models.Index(fields=['storage_tier', 'is_public', 'created_at'], name='processing__storage_c322cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resultexport',
+            index=models.Index(fields=['status', 'expires_at'], name='result_expo_status_931af2_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processing', '0014_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProcessingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jobs_total', models.PositiveIntegerField(default=0)),
+                ('jobs_pending', models.PositiveIntegerField(default=0)),
+                ('jobs_moderating', models.PositiveIntegerField(default=0)),
+                ('jobs_processing', models.PositiveIntegerField(default=0)),
+                ('jobs_streaming', models.PositiveIntegerField(default=0)),
+                ('jobs_completed', models.PositiveIntegerField(default=0)),
+                ('jobs_partially_failed', models.PositiveIntegerField(default=0)),
+                ('jobs_failed', models.PositiveIntegerField(default=0)),
+                ('jobs_cancelled', models.PositiveIntegerField(default=0)),
+                ('jobs_generation', models.PositiveIntegerField(default=0)),
+                ('jobs_edit', models.PositiveIntegerField(default=0)),
+                ('jobs_style_transfer', models.PositiveIntegerField(default=0)),
+                ('jobs_pipeline', models.PositiveIntegerField(default=0)),
+                ('timed_jobs', models.PositiveIntegerField(default=0)),
+                ('total_processing_time', models.FloatField(default=0)),
+                ('images_total', models.PositiveIntegerField(default=0)),
+                ('images_safe', models.PositiveIntegerField(default=0)),
+                ('image_bytes', models.PositiveBigIntegerField(default=0)),
+                ('uploads_day', models.DateField(blank=True, null=True)),
+                ('uploads_today', models.PositiveIntegerField(default=0)),
+                ('processed_images', models.PositiveIntegerField(default=0)),
+                ('favorite_processed', models.PositiveIntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='processing_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Processing Stats',
+                'verbose_name_plural': 'User Processing Stats',
+                'db_table': 'user_processing_stats',
+            },
+        ),
+    ]
@@ -1,22 +1,46 @@
 import uuid
 from django.db import models
 from django.conf import settings
-from apps.images.models import Image
+from apps.images.models import Image, LightQuerySet, StoredBlob
 from apps.styles.models import Style
 
 
-class ActiveProcessingJobManager(models.Manager):
+class ActiveProcessingJobManager(models.Manager.from_queryset(LightQuerySet)):
     """Manager that only returns non-deleted processing jobs"""
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
 
-class ActiveProcessingResultManager(models.Manager):
+class ActiveProcessingResultManager(models.Manager.from_queryset(LightQuerySet)):
     """Manager that only returns non-deleted processing results"""
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
 
+class ProcessingBatch(models.Model):
+    """Group of jobs created together, e.g. one uploaded image previewed across many styles"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='processing_batches')
+    original_image = models.ForeignKey(Image, on_delete=models.CASCADE, null=True, blank=True, related_name='processing_batches')
+    prompt = models.TextField(blank=True)
+    
+    # Celery task tracking
+    celery_task_id = models.CharField(max_length=255, blank=True, help_text="Celery task ID for async processing")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'processing_batches'
+        verbose_name = 'Processing Batch'
+        verbose_name_plural = 'Processing Batches'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Batch {self.id} by {self.user_id}"
+
+
 class ProcessingJob(models.Model):
     """Track image processing jobs with OpenAI gpt-image-1"""
     
@@ -26,6 +50,7 @@ class ProcessingJob(models.Model):
         ('processing', 'Processing with OpenAI'),
         ('streaming', 'Streaming Response'),
         ('completed', 'Completed'),
+        ('partially_failed', 'Partially Failed'),
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled'),
     ]
@@ -34,11 +59,15 @@ class ProcessingJob(models.Model):
         ('generation', 'Image Generation'),
         ('edit', 'Image Editing'),
         ('style_transfer', 'Style Transfer'),
+        ('pipeline', 'Pipeline'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='processing_jobs')
     
+    # Parent batch (style fan-out), if the job was created as part of one
+    batch = models.ForeignKey(ProcessingBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    
     # Job configuration
     job_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -51,6 +80,10 @@ class ProcessingJob(models.Model):
     # OpenAI gpt-image-1 parameters used
     openai_parameters = models.JSONField(default=dict)
     
+    # Pipeline jobs: ordered steps and the time spent on each one
+    pipeline_steps = models.JSONField(default=list, blank=True)
+    step_timings = models.JSONField(default=list, blank=True)
+    
     # Visibility
     is_public = models.BooleanField(default=False, help_text="Whether results from this job are publicly visible")
     
@@ -68,6 +101,11 @@ class ProcessingJob(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     processing_time = models.FloatField(null=True, blank=True)  # in seconds
     
+    # Progress (k/n images delivered when n > 1 is fanned out)
+    results_expected = models.PositiveIntegerField(default=1)
+    results_completed = models.PositiveIntegerField(default=0)
+    results_failed = models.PositiveIntegerField(default=0)
+    
     # Celery task tracking
     celery_task_id = models.CharField(max_length=255, blank=True, help_text="Celery task ID for async processing")
     
@@ -84,8 +122,11 @@ class ProcessingJob(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     
+    # Raw OpenAI/moderation payloads: kept for debugging, never serialized
+    HEAVY_FIELDS = ('openai_response', 'moderation_details', 'error_details')
+    
     # Managers
-    objects = models.Manager()  # Default manager (includes deleted)
+    objects = LightQuerySet.as_manager()  # Default manager (includes deleted)
     active_objects = ActiveProcessingJobManager()  # Only non-deleted
     
     class Meta:
@@ -93,6 +134,11 @@ class ProcessingJob(models.Model):
         verbose_name = 'Processing Job'
         verbose_name_plural = 'Processing Jobs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_deleted', '-created_at']),  # job lists, stats
+            models.Index(fields=['status', 'completed_at']),  # failed-job cleanup
+            models.Index(fields=['status', 'created_at']),  # old-job cleanup
+        ]
     
     def __str__(self):
         return f"{self.job_type} job {self.id} - {self.status}"
@@ -101,6 +147,11 @@ class ProcessingJob(models.Model):
 class ProcessingResult(models.Model):
     """Store results from OpenAI processing"""
     
+    TIER_CHOICES = [
+        ('hot', 'Hot'),
+        ('cold', 'Cold'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     job = models.ForeignKey(ProcessingJob, on_delete=models.CASCADE, related_name='results')
     
@@ -112,8 +163,11 @@ class ProcessingResult(models.Model):
     result_background = models.CharField(max_length=15)  # transparent, opaque
     
     # S3 storage
-    s3_key = models.CharField(max_length=500, blank=True)
+    s3_key = models.CharField(max_length=500, blank=True, db_index=True)
     s3_url = models.URLField(max_length=1000, blank=True)
+    storage_tier = models.CharField(max_length=10, choices=TIER_CHOICES, default='hot')
+    blob = models.ForeignKey(StoredBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='processing_results')
+    public_key = models.CharField(max_length=500, blank=True, db_index=True)  # immutable content-hashed copy while public
     
     # OpenAI metadata
     openai_created_at = models.DateTimeField(null=True, blank=True)
@@ -124,6 +178,7 @@ class ProcessingResult(models.Model):
     is_favorite = models.BooleanField(default=False)
     is_public = models.BooleanField(default=False)
     download_count = models.PositiveIntegerField(default=0)
+    last_downloaded_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -132,8 +187,11 @@ class ProcessingResult(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     
+    # Superseded by the stored file once uploaded; never serialized
+    HEAVY_FIELDS = ('result_b64',)
+    
     # Managers
-    objects = models.Manager()  # Default manager (includes deleted)
+    objects = LightQuerySet.as_manager()  # Default manager (includes deleted)
     active_objects = ActiveProcessingResultManager()  # Only non-deleted
     
     class Meta:
@@ -141,11 +199,41 @@ class ProcessingResult(models.Model):
         verbose_name = 'Processing Result'
         verbose_name_plural = 'Processing Results'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['job', 'is_deleted', '-created_at']),  # results of the user's jobs
+            models.Index(fields=['is_public', 'is_deleted', '-created_at']),  # public feed
+            models.Index(fields=['storage_tier', 'is_public', 'created_at']),  # tiering candidates
+        ]
     
     def __str__(self):
         return f"Result {self.id} for job {self.job.id}"
 
 
+class StorageTierTransition(models.Model):
+    """Ledger of results demoted to cold storage and the bytes saved"""
+    
+    result = models.ForeignKey(ProcessingResult, on_delete=models.SET_NULL, null=True, blank=True, related_name='tier_transitions')
+    from_key = models.CharField(max_length=500)
+    to_key = models.CharField(max_length=500)
+    from_format = models.CharField(max_length=10)
+    to_format = models.CharField(max_length=10)
+    from_size = models.PositiveBigIntegerField()  # in bytes
+    to_size = models.PositiveBigIntegerField()  # in bytes
+    storage_class = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'storage_tier_transitions'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.from_key} -> {self.to_key} ({self.from_size - self.to_size} bytes saved)"
+    
+    @property
+    def bytes_saved(self) -> int:
+        return self.from_size - self.to_size
+
+
 class ProcessingResultLike(models.Model):
     """User likes for public processing results"""
     
@@ -234,8 +322,8 @@ class UserProcessingQuota(models.Model):
         if self.user.is_premium:
             return True  # Premium users have unlimited access
         
-        # Free tier limits
-        daily_limit = 5  # Free users get 5 processes per day
+        # Free tier limits (enforced in Redis, see quota.py; the row lags by one flush)
+        daily_limit = settings.DAILY_PROCESSING_LIMIT_FREE
         
         if job_type == 'generation':
             return self.daily_generations < daily_limit
@@ -245,20 +333,63 @@ class UserProcessingQuota(models.Model):
             return self.daily_style_transfers < daily_limit
         
         return False
+
+
+class UserProcessingStats(models.Model):
+    """
+    Per-user rollup behind the dashboard stats endpoints. Counters move with
+    F() updates on job transitions and uploads (apps.processing.stats) and
+    are periodically recomputed from the source tables.
+    """
+    
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='processing_stats')
+    
+    # Jobs by status
+    jobs_total = models.PositiveIntegerField(default=0)
+    jobs_pending = models.PositiveIntegerField(default=0)
+    jobs_moderating = models.PositiveIntegerField(default=0)
+    jobs_processing = models.PositiveIntegerField(default=0)
+    jobs_streaming = models.PositiveIntegerField(default=0)
+    jobs_completed = models.PositiveIntegerField(default=0)
+    jobs_partially_failed = models.PositiveIntegerField(default=0)
+    jobs_failed = models.PositiveIntegerField(default=0)
+    jobs_cancelled = models.PositiveIntegerField(default=0)
+    
+    # Jobs by type
+    jobs_generation = models.PositiveIntegerField(default=0)
+    jobs_edit = models.PositiveIntegerField(default=0)
+    jobs_style_transfer = models.PositiveIntegerField(default=0)
+    jobs_pipeline = models.PositiveIntegerField(default=0)
+    
+    # Processing time of the jobs that recorded one
+    timed_jobs = models.PositiveIntegerField(default=0)
+    total_processing_time = models.FloatField(default=0)  # in seconds
+    
+    # Uploads
+    images_total = models.PositiveIntegerField(default=0)
+    images_safe = models.PositiveIntegerField(default=0)
+    image_bytes = models.PositiveBigIntegerField(default=0)
+    uploads_day = models.DateField(null=True, blank=True)
+    uploads_today = models.PositiveIntegerField(default=0)  # on uploads_day
+    
+    # Legacy processed images
+    processed_images = models.PositiveIntegerField(default=0)
+    favorite_processed = models.PositiveIntegerField(default=0)
+    
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
-    def increment_usage(self, job_type: str):
-        """Increment usage count for specific job type"""
-        if job_type == 'generation':
-            self.daily_generations += 1
-            self.total_generations += 1
-        elif job_type == 'edit':
-            self.daily_edits += 1
-            self.total_edits += 1
-        elif job_type == 'style_transfer':
-            self.daily_style_transfers += 1
-            self.total_style_transfers += 1
-        
-        self.save()
+    class Meta:
+        db_table = 'user_processing_stats'
+        verbose_name = 'User Processing Stats'
+        verbose_name_plural = 'User Processing Stats'
+    
+    def __str__(self):
+        return f"Processing stats for {self.user_id}"
+    
+    @property
+    def average_processing_time(self) -> float:
+        return self.total_processing_time / self.timed_jobs if self.timed_jobs else 0
 
 
 class ProcessingTemplate(models.Model):
@@ -296,3 +427,45 @@ class ProcessingTemplate(models.Model):
     
     def __str__(self):
         return self.name
+
+
+class ResultExport(models.Model):
+    """ZIP export of a user's results (and originals) built in the background for large selections"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='result_exports')
+    
+    # Selection: None means every active result/original of the user
+    result_ids = models.JSONField(null=True, blank=True)
+    image_ids = models.JSONField(null=True, blank=True)
+    include_originals = models.BooleanField(default=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    s3_key = models.CharField(max_length=500, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)  # in bytes
+    file_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'result_exports'
+        verbose_name = 'Result Export'
+        verbose_name_plural = 'Result Exports'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),  # expiry sweep
+        ]
+    
+    def __str__(self):
+        return f"Export {self.id} by {self.user_id} - {self.status}"
@@ -0,0 +1,107 @@
+"""
+Public results are copied to content-hashed keys under public/, which
+never change once written and can be cached by browsers and CDNs for a
+year. Private results keep presigned/authorized access to their own key.
+
+Publishing copies first and flips the row second; unpublishing flips the
+row and drops the copy (unless another live public result shares it) in
+one transaction, under a lock on the result and its blob.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.images.models import StoredBlob
+from apps.images.services import aws_image_service
+from .models import ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_PREFIX = 'public/'
+PUBLIC_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class PublishError(Exception):
+    """The result's file could not be published"""
+
+
+def public_url(key: str) -> str:
+    """URL of a published key: the CDN when PUBLIC_MEDIA_URL is set, else the storage URL"""
+    if settings.PUBLIC_MEDIA_URL:
+        return f"{settings.PUBLIC_MEDIA_URL.rstrip('/')}/{key}"
+    return aws_image_service.storage.url(key)
+
+
+def _public_key(result: ProcessingResult) -> str:
+    ext = os.path.splitext(result.s3_key)[1] or f".{result.result_format or 'png'}"
+    if result.blob_id:
+        digest = result.blob.sha256
+    else:
+        # Results stored before content addressing (or demoted to cold): hash the bytes
+        data = aws_image_service.storage.read(result.s3_key)
+        if data is None:
+            raise PublishError(f"File not found: {result.s3_key}")
+        digest = hashlib.sha256(data).hexdigest()
+    return f"{PUBLIC_PREFIX}{digest[:2]}/{digest}{ext.lower()}"
+
+
+def _lock(result: ProcessingResult) -> ProcessingResult:
+    locked = ProcessingResult.objects.light().select_for_update().get(pk=result.pk)
+    if locked.blob_id:
+        # Serializes publish/unpublish of every result sharing these bytes
+        locked.blob = StoredBlob.objects.select_for_update().get(pk=locked.blob_id)
+    return locked
+
+
+def publish_result(result: ProcessingResult) -> ProcessingResult:
+    """Copy the result to its public key (if not there yet) and mark it public"""
+    if not result.s3_key:
+        raise PublishError("Result has no stored file")
+    
+    storage = aws_image_service.storage
+    with transaction.atomic():
+        locked = _lock(result)
+        key = locked.public_key or _public_key(locked)
+        
+        # Content-hashed: an existing object already holds these exact bytes
+        if not storage.exists(key):
+            extra_args = {'CacheControl': PUBLIC_CACHE_CONTROL}
+            if settings.PUBLIC_MEDIA_ACL:
+                extra_args['ACL'] = settings.PUBLIC_MEDIA_ACL
+            storage.copy(locked.s3_key, key, content_type=mimetypes.guess_type(key)[0], extra_args=extra_args)
+        
+        locked.is_public = True
+        locked.public_key = key
+        locked.save(update_fields=['is_public', 'public_key', 'updated_at'])
+    
+    logger.info(f"Published result {locked.pk} at {key}")
+    return locked
+
+
+def unpublish_result(result: ProcessingResult) -> ProcessingResult:
+    """Mark the result private and delete its public copy unless still shared"""
+    storage = aws_image_service.storage
+    with transaction.atomic():
+        locked = _lock(result)
+        key = locked.public_key
+        
+        locked.is_public = False
+        locked.public_key = ''
+        locked.save(update_fields=['is_public', 'public_key', 'updated_at'])
+        
+        shared = key and ProcessingResult.objects.filter(
+            public_key=key, is_public=True, is_deleted=False
+        ).exclude(pk=locked.pk).exists()
+        if key and not shared:
+            # A failed delete rolls the row back: the result stays public rather than half-unpublished
+            storage.delete(key)
+    
+    return locked
+
+
+def set_result_visibility(result: ProcessingResult, is_public: bool) -> ProcessingResult:
+    return publish_result(result) if is_public else unpublish_result(result)
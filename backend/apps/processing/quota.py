@@ -0,0 +1,252 @@
+"""
+Daily processing quotas, enforced in Redis.
+
+Usage is counted per (user, job type, day) under
+quota:<user>:<job_type>:<YYYYMMDD>, the day being the local date of
+TIME_ZONE. A reservation checks and increments every counter a request
+needs in one Lua script, so concurrent requests cannot both take the last
+slot; failed or cancelled jobs give their share back exactly once. The
+counters are flushed to UserProcessingQuota (daily usage and running
+totals, for billing) by flush_quota_counters, so checks never touch the
+database.
+"""
+import logging
+import uuid
+from collections import Counter
+from datetime import date
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from config.redis import get_redis
+from .models import ProcessingJob, UserProcessingQuota
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'quota:'
+DIRTY_KEY = 'quota:dirty'  # counters changed since their last flush
+KEY_TTL = 3 * 24 * 60 * 60  # a day's counters outlive it until flushed
+
+# Job type -> UserProcessingQuota field suffix
+QUOTA_FIELDS = {
+    'generation': 'generations',
+    'edit': 'edits',
+    'style_transfer': 'style_transfers',
+}
+
+REFUND_STATUSES = ('failed', 'cancelled')
+
+# KEYS: counters..., dirty set. ARGV: limit (-1: unlimited), ttl, amounts...
+# Returns 0 when reserved, else the 1-based index of the first counter over the limit.
+_RESERVE = """
+local limit = tonumber(ARGV[1])
+local n = #KEYS - 1
+if limit >= 0 then
+    for i = 1, n do
+        local used = tonumber(redis.call('GET', KEYS[i]) or '0')
+        if used + tonumber(ARGV[i + 2]) > limit then
+            return i
+        end
+    end
+end
+for i = 1, n do
+    redis.call('INCRBY', KEYS[i], ARGV[i + 2])
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+    redis.call('SADD', KEYS[n + 1], KEYS[i])
+end
+return 0
+"""
+
+# KEYS: refund marker, counters..., dirty set. ARGV: ttl, amounts...
+# The marker makes a refund happen once; counters never go below zero.
+_REFUND = """
+if not redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+    return 0
+end
+local n = #KEYS - 1
+for i = 2, n do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        if redis.call('DECRBY', KEYS[i], ARGV[i]) < 0 then
+            redis.call('SET', KEYS[i], 0, 'KEEPTTL')
+        end
+        redis.call('SADD', KEYS[n + 1], KEYS[i])
+    end
+end
+return 1
+"""
+
+# KEYS: counter, its flushed marker, dirty set. ARGV: ttl.
+# Returns {current value, value at the previous flush} and clears the dirty flag.
+_CLAIM = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local flushed = tonumber(redis.call('GET', KEYS[2]) or '0')
+redis.call('SET', KEYS[2], used, 'EX', ARGV[1])
+redis.call('SREM', KEYS[3], KEYS[1])
+return {used, flushed}
+"""
+
+
+class QuotaExceeded(Exception):
+    """The daily limit of a job type would be exceeded"""
+
+    def __init__(self, job_type: str):
+        self.job_type = job_type
+        super().__init__(f"You have reached your daily limit for {job_type}")
+
+
+class QuotaUnavailable(Exception):
+    """The quota store could not be reached"""
+
+
+def quota_day(value=None) -> date:
+    return timezone.localdate(value) if value else timezone.localdate()
+
+
+def counter_key(user_id, job_type: str, day: date) -> str:
+    return f"{KEY_PREFIX}{user_id}:{job_type}:{day:%Y%m%d}"
+
+
+def daily_limit(user) -> int:
+    return -1 if user.is_premium else settings.DAILY_PROCESSING_LIMIT_FREE
+
+
+def job_usage(job: ProcessingJob) -> Dict[str, int]:
+    """What a job reserves: one unit of its type, or one per pipeline step operation"""
+    if job.job_type == 'pipeline':
+        usage = Counter(step['operation'] for step in job.pipeline_steps)
+    else:
+        usage = Counter([job.job_type])
+    return {job_type: amount for job_type, amount in usage.items() if job_type in QUOTA_FIELDS}
+
+
+def _script(source: str):
+    client = get_redis()
+    return client.register_script(source)
+
+
+def _refund(user_id, day: date, usage: Dict[str, int], marker: str) -> bool:
+    if not usage:
+        return False
+    keys = [f"{KEY_PREFIX}refund:{marker}"] + [counter_key(user_id, t, day) for t in usage] + [DIRTY_KEY]
+    return bool(_script(_REFUND)(keys=keys, args=[KEY_TTL] + list(usage.values())))
+
+
+class QuotaReservation:
+    """Units taken by reserve_quota; release() gives them back if the job is never started"""
+
+    def __init__(self, user_id, day: date, usage: Dict[str, int]):
+        self.user_id = user_id
+        self.day = day
+        self.usage = usage
+        self.token = uuid.uuid4().hex
+
+    def release(self) -> None:
+        try:
+            _refund(self.user_id, self.day, self.usage, self.token)
+        except redis.RedisError as e:
+            logger.error(f"Failed to release quota reservation for user {self.user_id}: {e}")
+
+
+def reserve_quota(user, usage: Dict[str, int]) -> QuotaReservation:
+    """
+    Atomically check and take `usage` ({job_type: units}) from today's quota.
+    Raises QuotaExceeded (nothing taken) or QuotaUnavailable.
+    """
+    usage = {job_type: amount for job_type, amount in usage.items() if job_type in QUOTA_FIELDS and amount}
+    day = quota_day()
+    if usage:
+        job_types = list(usage)
+        keys = [counter_key(user.pk, job_type, day) for job_type in job_types] + [DIRTY_KEY]
+        try:
+            over = _script(_RESERVE)(keys=keys, args=[daily_limit(user), KEY_TTL] + [usage[t] for t in job_types])
+        except redis.RedisError as e:
+            logger.error(f"Quota reservation failed for user {user.pk}: {e}")
+            raise QuotaUnavailable(str(e)) from e
+        if over:
+            raise QuotaExceeded(job_types[over - 1])
+    return QuotaReservation(user.pk, day, usage)
+
+
+def refund_job_quota(job: ProcessingJob) -> bool:
+    """Give back what a failed or cancelled job reserved (once per job)"""
+    try:
+        return _refund(job.user_id, quota_day(job.created_at), job_usage(job), f"job:{job.pk}")
+    except redis.RedisError as e:
+        logger.error(f"Quota refund failed for job {job.pk}: {e}")
+        return False
+
+
+def with_live_usage(quota: UserProcessingQuota) -> UserProcessingQuota:
+    """Overlay today's counters on a quota row for display (the row lags by one flush)"""
+    today = quota_day()
+    try:
+        values = get_redis().mget([counter_key(quota.user_id, job_type, today) for job_type in QUOTA_FIELDS])
+    except redis.RedisError as e:
+        logger.warning(f"Live quota usage unavailable for user {quota.user_id}: {e}")
+        return quota
+    for suffix, value in zip(QUOTA_FIELDS.values(), values):
+        setattr(quota, f'daily_{suffix}', int(value or 0))
+    quota.last_reset_date = today
+    return quota
+
+
+def _flush_user(user_id, counters) -> None:
+    """Apply claimed (job_type, day, used, delta) counters to the user's quota row"""
+    with transaction.atomic():
+        quota, _ = UserProcessingQuota.objects.select_for_update().get_or_create(user_id=user_id)
+        today = quota_day()
+        if quota.last_reset_date != today:
+            # New day: the previous day's usage is only kept in the totals
+            for suffix in QUOTA_FIELDS.values():
+                setattr(quota, f'daily_{suffix}', 0)
+            quota.last_reset_date = today
+        for job_type, day, used, delta in counters:
+            suffix = QUOTA_FIELDS[job_type]
+            total = f'total_{suffix}'
+            setattr(quota, total, max(getattr(quota, total) + delta, 0))
+            if day == today:
+                setattr(quota, f'daily_{suffix}', used)
+        quota.save()
+
+
+def flush_quota_counters(limit: Optional[int] = None) -> Dict:
+    """Write changed counters to UserProcessingQuota; up to `limit` counters per call"""
+    client = get_redis()
+    claim = client.register_script(_CLAIM)
+    per_user = {}
+    claimed = []
+    for key in client.sscan_iter(DIRTY_KEY, count=500):
+        if limit is not None and len(claimed) >= limit:
+            break
+        try:
+            user_id, job_type, day = key[len(KEY_PREFIX):].split(':')
+            day = date(int(day[:4]), int(day[4:6]), int(day[6:]))
+        except ValueError:
+            client.srem(DIRTY_KEY, key)
+            continue
+        if job_type not in QUOTA_FIELDS:
+            client.srem(DIRTY_KEY, key)
+            continue
+        used, flushed = claim(keys=[key, f"{key}:flushed", DIRTY_KEY], args=[KEY_TTL])
+        claimed.append((key, flushed))
+        per_user.setdefault(user_id, []).append((job_type, day, used, used - flushed))
+
+    failed = 0
+    for user_id, counters in per_user.items():
+        try:
+            _flush_user(user_id, counters)
+        except Exception as e:
+            failed += 1
+            logger.error(f"Quota flush failed for user {user_id}: {e}")
+            if isinstance(e, IntegrityError):
+                continue  # user deleted since: nothing to bill
+            # Put the claims back so the next flush retries them
+            for key, flushed in claimed:
+                if key.startswith(f"{KEY_PREFIX}{user_id}:"):
+                    client.set(f"{key}:flushed", flushed, ex=KEY_TTL)
+                    client.sadd(DIRTY_KEY, key)
+
+    return {'flushed_counters': len(claimed), 'users': len(per_user), 'failed_users': failed}
@@ -1,6 +1,12 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef
+from django.urls import reverse
 from django.utils import timezone
-from .models import ProcessingJob, ProcessingResult, StreamingEvent, UserProcessingQuota, ProcessingTemplate
+from .models import (
+    ProcessingBatch, ProcessingJob, ProcessingResult, ProcessingResultLike, ResultExport, StreamingEvent,
+    UserProcessingQuota, ProcessingTemplate
+)
 from apps.styles.models import Style
 from apps.images.models import Image
 
@@ -121,6 +127,104 @@ class ProcessingJobCreateSerializer(serializers.Serializer):
         return attrs
 
 
+class StyleFanoutCreateSerializer(ProcessingJobCreateSerializer):
+    """Serializer for applying one uploaded image to many styles in a single batch"""
+    
+    # Every job in a fan-out is a single-image style transfer
+    job_type = None
+    style_id = None
+    n = None
+    stream = None
+    partial_images = None
+    
+    original_image_id = serializers.UUIDField()
+    style_ids = serializers.ListField(child=serializers.UUIDField(), min_length=1)
+    prompt = serializers.CharField(max_length=32000, required=False, allow_blank=True, default='')
+    
+    def validate_style_ids(self, value):
+        """Validate styles exist and are active (duplicates are dropped)"""
+        style_ids = list(dict.fromkeys(value))
+        
+        max_styles = settings.STYLE_FANOUT_MAX_STYLES
+        if len(style_ids) > max_styles:
+            raise serializers.ValidationError(f"A style fan-out accepts at most {max_styles} styles")
+        
+        active_ids = set(
+            Style.objects.filter(id__in=style_ids, is_active=True).values_list('id', flat=True)
+        )
+        missing = [str(style_id) for style_id in style_ids if style_id not in active_ids]
+        if missing:
+            raise serializers.ValidationError(f"Styles not found or inactive: {', '.join(missing)}")
+        
+        return style_ids
+
+
+class PipelineStepSerializer(serializers.Serializer):
+    """One step of a pipeline job"""
+    
+    OPERATION_CHOICES = [
+        ('generation', 'Image Generation'),
+        ('edit', 'Image Editing'),
+        ('style_transfer', 'Style Transfer'),
+    ]
+    
+    operation = serializers.ChoiceField(choices=OPERATION_CHOICES)
+    prompt = serializers.CharField(max_length=32000, required=False, allow_blank=True, default='')
+    style_id = serializers.UUIDField(required=False, allow_null=True, default=None)
+    keep = serializers.BooleanField(default=False, required=False)
+    
+    def validate_style_id(self, value):
+        """Validate style exists and is active"""
+        if value and not Style.objects.filter(id=value, is_active=True).exists():
+            raise serializers.ValidationError("Style not found or inactive")
+        return value
+    
+    def validate(self, attrs):
+        """Per-step requirements"""
+        if attrs['operation'] == 'style_transfer' and not attrs.get('style_id'):
+            raise serializers.ValidationError("Style transfer steps require a style")
+        if attrs['operation'] != 'style_transfer' and not attrs.get('prompt'):
+            raise serializers.ValidationError(f"{attrs['operation'].replace('_', ' ').capitalize()} steps require a prompt")
+        return attrs
+
+
+class ProcessingPipelineCreateSerializer(ProcessingJobCreateSerializer):
+    """Serializer for creating a multi-step pipeline job"""
+    
+    # Every step yields a single image that feeds the next one
+    job_type = None
+    style_id = None
+    prompt = None
+    n = None
+    stream = None
+    partial_images = None
+    
+    steps = PipelineStepSerializer(many=True)
+    
+    def validate_steps(self, value):
+        """Validate step count and ordering"""
+        if not value:
+            raise serializers.ValidationError("A pipeline needs at least one step")
+    
+        max_steps = settings.PIPELINE_MAX_STEPS
+        if len(value) > max_steps:
+            raise serializers.ValidationError(f"A pipeline accepts at most {max_steps} steps")
+    
+        if any(step['operation'] == 'generation' for step in value[1:]):
+            raise serializers.ValidationError("Only the first step of a pipeline can be a generation")
+    
+        return value
+    
+    def validate(self, attrs):
+        """Cross-field validation"""
+        attrs = super().validate(attrs)
+    
+        if attrs['steps'][0]['operation'] != 'generation' and not attrs.get('original_image_id'):
+            raise serializers.ValidationError("Pipelines that start with an edit require an original image")
+    
+        return attrs
+
+
 class ProcessingJobSerializer(serializers.ModelSerializer):
     """Serializer for processing job display"""
     
@@ -128,28 +232,44 @@ class ProcessingJobSerializer(serializers.ModelSerializer):
     original_image_title = serializers.CharField(source='original_image.title', read_only=True)
     style_name = serializers.CharField(source='style.name', read_only=True)
     results_count = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
     
     class Meta:
         model = ProcessingJob
         fields = [
             'id', 'user_email', 'job_type', 'status', 'prompt',
             'original_image', 'original_image_title', 'style', 'style_name',
-            'openai_parameters', 'openai_request_id',
+            'openai_parameters', 'openai_request_id', 'pipeline_steps', 'step_timings',
             'moderation_passed', 'moderation_checked_at',
             'started_at', 'completed_at', 'processing_time',
             'error_message', 'retry_count', 'results_count', 'is_public',
+            'results_expected', 'results_completed', 'results_failed', 'progress',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'user_email', 'openai_request_id', 'moderation_passed',
-            'moderation_checked_at', 'started_at', 'completed_at',
+            'id', 'user_email', 'openai_request_id', 'pipeline_steps', 'step_timings',
+            'moderation_passed', 'moderation_checked_at', 'started_at', 'completed_at',
             'processing_time', 'error_message', 'retry_count',
+            'results_expected', 'results_completed', 'results_failed',
             'created_at', 'updated_at'
         ]
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Related rows and the results count in the list query itself, without heavy columns"""
+        return queryset.select_related('user', 'original_image', 'style').light('original_image').annotate(
+            results_count=Count('results', distinct=True)
+        )
+    
     def get_results_count(self, obj):
         """Get count of processing results"""
+        if getattr(obj, 'results_count', None) is not None:
+            return obj.results_count
         return obj.results.count()
+    
+    def get_progress(self, obj):
+        """Delivered images as k/n"""
+        return f"{obj.results_completed}/{obj.results_expected}"
 
 
 class ProcessingResultSerializer(serializers.ModelSerializer):
@@ -158,6 +278,7 @@ class ProcessingResultSerializer(serializers.ModelSerializer):
     job_type = serializers.CharField(source='job.job_type', read_only=True)
     job_prompt = serializers.CharField(source='job.prompt', read_only=True)
     signed_url = serializers.SerializerMethodField()
+    public_url = serializers.SerializerMethodField()
     like_count = serializers.SerializerMethodField()
     user_has_liked = serializers.SerializerMethodField()
     is_owner = serializers.SerializerMethodField()
@@ -167,24 +288,54 @@ class ProcessingResultSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'job', 'job_type', 'job_prompt',
             'result_format', 'result_size', 'result_quality', 'result_background',
-            's3_url', 'signed_url', 'openai_created_at', 'token_usage',
+            's3_url', 'signed_url', 'public_url', 'openai_created_at', 'token_usage',
             'user_rating', 'is_favorite', 'is_public', 'like_count', 'user_has_liked', 'download_count', 'is_owner',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'job_type', 'job_prompt', 'result_format', 'result_size',
-            'result_quality', 'result_background', 's3_url', 'signed_url',
+            'result_quality', 'result_background', 's3_url', 'signed_url', 'public_url',
             'openai_created_at', 'token_usage', 'download_count',
             'created_at', 'updated_at'
         ]
     
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # Published results are served from their stable, CDN-cacheable URL
+        if data.get('public_url'):
+            data['s3_url'] = data['signed_url'] = data['public_url']
+        return data
+    
+    def get_public_url(self, obj):
+        """Immutable URL of the published copy, None while private"""
+        if obj.is_public and obj.public_key and not obj.is_deleted:
+            from .publishing import public_url
+            return public_url(obj.public_key)
+        return None
+    
     def get_signed_url(self, obj):
         """Get signed URL for result image"""
-        if obj.s3_key:
+        if obj.s3_key and not (obj.is_public and obj.public_key):
             from apps.images.services import aws_image_service
             return aws_image_service.generate_presigned_url(obj.s3_key)
         return None
 
+    @staticmethod
+    def setup_eager_loading(queryset, user=None):
+        """
+        Job, like count and the current user's like in the list query itself,
+        so a page costs the same number of queries whatever its size.
+        result_b64 and the job's raw payloads are never read here: deferred.
+        """
+        queryset = queryset.select_related('job').light('job')
+        if 'like_count' not in queryset.query.annotations:
+            queryset = queryset.annotate(like_count=Count('likes', distinct=True))
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(user_has_liked=Exists(
+                ProcessingResultLike.objects.filter(result=OuterRef('pk'), user=user)
+            ))
+        return queryset
+    
     def get_like_count(self, obj):
         """Return annotated like_count if present or compute from relation"""
         # If annotated by queryset
@@ -200,6 +351,9 @@ class ProcessingResultSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
         if user is not None and getattr(user, 'is_authenticated', False):
+            # Annotated by setup_eager_loading
+            if hasattr(obj, 'user_has_liked'):
+                return obj.user_has_liked
             try:
                 return obj.likes.filter(user=user).exists()
             except Exception:
@@ -217,6 +371,44 @@ class ProcessingResultSerializer(serializers.ModelSerializer):
         return False
 
 
+class ProcessingBatchJobSerializer(ProcessingJobSerializer):
+    """Job inside a batch, with its results inlined"""
+    
+    results = ProcessingResultSerializer(many=True, read_only=True)
+    
+    class Meta(ProcessingJobSerializer.Meta):
+        fields = ProcessingJobSerializer.Meta.fields + ['results']
+
+
+class ProcessingBatchSerializer(serializers.ModelSerializer):
+    """Serializer for a batch of jobs and their results grouped together"""
+    
+    jobs = ProcessingBatchJobSerializer(many=True, read_only=True)
+    status = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProcessingBatch
+        fields = ['id', 'original_image', 'prompt', 'status', 'progress', 'jobs', 'created_at', 'updated_at']
+    
+    def get_status(self, obj):
+        """Aggregate status of the batch jobs"""
+        statuses = {job.status for job in obj.jobs.all()}
+        if statuses & {'pending', 'moderating', 'processing', 'streaming'}:
+            return 'processing'
+        if statuses <= {'completed'}:
+            return 'completed'
+        if statuses <= {'failed', 'cancelled'}:
+            return 'failed'
+        return 'partially_failed'
+    
+    def get_progress(self, obj):
+        """Finished jobs as k/n"""
+        jobs = obj.jobs.all()
+        finished = sum(1 for job in jobs if job.status in ('completed', 'partially_failed', 'failed', 'cancelled'))
+        return f"{finished}/{len(jobs)}"
+
+
 class StreamingEventSerializer(serializers.ModelSerializer):
     """Serializer for streaming events"""
     
@@ -228,6 +420,45 @@ class StreamingEventSerializer(serializers.ModelSerializer):
         ]
 
 
+class ResultExportSelectionSerializer(serializers.Serializer):
+    """Selection for a ZIP export: results and/or originals of the requesting user"""
+    
+    result_ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=5000)
+    image_ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=5000)
+    include_originals = serializers.BooleanField(default=True)
+    background = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        if not data.get('result_ids') and not data.get('image_ids'):
+            raise serializers.ValidationError("Select at least one result or image")
+        return data
+
+
+class ResultExportSerializer(serializers.ModelSerializer):
+    """Background export status with its download link once completed"""
+    
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ResultExport
+        fields = [
+            'id', 'status', 'include_originals', 'file_count', 'size', 'error_message',
+            'download_url', 'created_at', 'completed_at', 'expires_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status != 'completed' or not obj.s3_key:
+            return None
+        from apps.images.services import aws_image_service
+        if aws_image_service.use_s3:
+            remaining = int((obj.expires_at - timezone.now()).total_seconds()) if obj.expires_at else 3600
+            return aws_image_service.generate_presigned_url(obj.s3_key, expiration=max(60, min(remaining, 3600)))
+        request = self.context.get('request')
+        url = reverse('processing:export-download', kwargs={'export_id': obj.id})
+        return request.build_absolute_uri(url) if request else url
+
+
 class UserProcessingQuotaSerializer(serializers.ModelSerializer):
     """Serializer for user processing quota"""
     
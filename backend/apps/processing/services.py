@@ -3,7 +3,8 @@ import base64
 import io
 import logging
 import time
-from typing import Dict, List, Tuple, Optional, Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple, Optional, Generator
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from PIL import Image
@@ -147,25 +148,54 @@ class OpenAIImageService:
         if not self.client:
             return {"error": "OpenAI client not configured"}
         
+        # Validate and moderate images
+        prepared_images = []
+        for image_file in image_files:
+            prepared = self.prepare_edit_image(image_file)
+            if 'error' in prepared:
+                return prepared
+            prepared_images.append(prepared)
+        
+        # Only use first image (OpenAI limitation)
+        return self.edit_prepared_image(prepared_images[0], prompt, style_params, user_id)
+    
+    def prepare_edit_image(self, image_file: InMemoryUploadedFile) -> Dict:
+        """
+        Validate, moderate and read an input image once so the same bytes can be
+        reused by several edit requests (fan-out, multi-style previews)
+        """
+        is_safe, moderation_result = self._validate_and_moderate_image(image_file)
+        if not is_safe:
+            return {"error": "Image contains inappropriate content", "moderation": moderation_result}
+        
+        image_file.seek(0)  # ¡MUY IMPORTANTE! Reset file pointer
+        image_bytes = image_file.read()
+        image_file.seek(0)
+        
+        return {
+            "name": image_file.name,
+            "bytes": image_bytes,
+            "content_type": image_file.content_type or "image/png",
+            "moderation": moderation_result,
+        }
+    
+    def edit_prepared_image(
+        self,
+        prepared_image: Dict,
+        prompt: str,
+        style_params: Dict = None,
+        user_id: str = None
+    ) -> Dict:
+        """Send an already validated/moderated image (see prepare_edit_image) to OpenAI"""
+        if not self.client:
+            return {"error": "OpenAI client not configured"}
+        
+        style_params = style_params or {}
+        
         try:
-            # Validate and moderate images
-            moderated_images = []
-            for image_file in image_files:
-                is_safe, moderation_result = self._validate_and_moderate_image(image_file)
-                if not is_safe:
-                    return {"error": "Image contains inappropriate content", "moderation": moderation_result}
-                
-                # Keep original file for OpenAI (no base64 conversion)
-                moderated_images.append(image_file)
-            
-            # Only use first image (OpenAI limitation)
-            image_file = moderated_images[0]
-            image_file.seek(0)  # ¡MUY IMPORTANTE! Reset file pointer
-            image_bytes = image_file.read()
-            
             params = {
                 "model": "gpt-image-1",
-                "image": (image_file.name, image_bytes, image_file.content_type or "image/png"),
+                "image": (prepared_image["name"], prepared_image["bytes"], prepared_image["content_type"]),
                 "prompt": prompt,
                 "n": style_params.get("n", 1),
                 "size": style_params.get("size", "1024x1024"),
@@ -197,6 +227,44 @@ class OpenAIImageService:
                 "details": str(e)
             }
     
+    def iter_fanout(
+        self,
+        request_fn: Callable[[], Dict],
+        n: int,
+        max_workers: int = None
+    ) -> Generator[Tuple[int, Dict], None, None]:
+        """
+        Run `request_fn` (a single n=1 OpenAI call) n times concurrently and
+        yield (index, result) as soon as each sub-request finishes.
+        
+        Sub-request exceptions are turned into error dicts so one failed image
+        never aborts the rest of the batch.
+        """
+        return self.iter_concurrent([request_fn] * n, max_workers)
+    
+    def iter_concurrent(
+        self,
+        request_fns: List[Callable[[], Dict]],
+        max_workers: int = None
+    ) -> Generator[Tuple[int, Dict], None, None]:
+        """Run independent OpenAI requests concurrently, yielding (index, result) in completion order"""
+        if not request_fns:
+            return
+        
+        max_workers = max(1, min(len(request_fns), max_workers or settings.PROCESSING_FANOUT_MAX_WORKERS))
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='openai-fanout') as executor:
+            futures = {executor.submit(request_fn): index for index, request_fn in enumerate(request_fns)}
+            
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"OpenAI fan-out sub-request {index} failed: {e}")
+                    result = {"error": "Sub-request failed", "details": str(e)}
+                yield index, result
+    
     def _process_generation_response(self, response, processing_time: float) -> Dict:
         """Process OpenAI generation response"""
         try:
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.images.models import Image, ProcessedImage
+from .models import ProcessingJob
+from .quota import REFUND_STATUSES, refund_job_quota
+from .stats import apply_stats, job_deltas, job_state
+
+
+def _image_state(image):
+    values = image.__dict__
+    if 'is_content_safe' not in values or 'file_size' not in values:
+        return None
+    return values['is_content_safe'], values['file_size'] or 0
+
+
+@receiver(post_init, sender=ProcessingJob)
+def job_loaded(sender, instance, **kwargs):
+    """Remember the counted state, so a save can tell what changed"""
+    instance._stats_state = job_state(instance)
+
+
+@receiver(post_save, sender=ProcessingJob)
+def job_saved(sender, instance, created, raw=False, **kwargs):
+    """Status/type/processing time transitions move the owner's stats; failures refund quota"""
+    new = job_state(instance)
+    if raw or new is None:
+        return
+    old = None if created else instance._stats_state
+    if created or old is not None:
+        apply_stats(instance.user_id, job_deltas(old, new))
+        if new[0] in REFUND_STATUSES and (old is None or old[0] != new[0]):
+            transaction.on_commit(lambda: refund_job_quota(instance))
+    instance._stats_state = new
+
+
+@receiver(post_init, sender=Image)
+def image_loaded(sender, instance, **kwargs):
+    instance._stats_state = _image_state(instance)
+
+
+@receiver(post_save, sender=Image)
+def image_saved(sender, instance, created, raw=False, **kwargs):
+    """Uploads, moderation verdicts and size changes move the owner's stats"""
+    new = _image_state(instance)
+    if raw or new is None:
+        return
+    if created:
+        apply_stats(instance.user_id, {
+            'images_total': 1, 'images_safe': int(new[0]), 'image_bytes': new[1],
+        }, uploaded=True)
+    elif instance._stats_state is not None:
+        old = instance._stats_state
+        apply_stats(instance.user_id, {
+            'images_safe': int(new[0]) - int(old[0]), 'image_bytes': new[1] - old[1],
+        })
+    instance._stats_state = new
+
+
+@receiver(post_init, sender=ProcessedImage)
+def processed_image_loaded(sender, instance, **kwargs):
+    instance._stats_favorite = instance.__dict__.get('is_favorite')
+
+
+@receiver(post_save, sender=ProcessedImage)
+def processed_image_saved(sender, instance, created, raw=False, **kwargs):
+    favorite = instance.__dict__.get('is_favorite')
+    if raw or favorite is None:
+        return
+    if created:
+        apply_stats(instance.user_id, {'processed_images': 1, 'favorite_processed': int(favorite)})
+    elif instance._stats_favorite is not None:
+        apply_stats(instance.user_id, {'favorite_processed': int(favorite) - int(instance._stats_favorite)})
+    instance._stats_favorite = favorite
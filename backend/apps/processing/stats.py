@@ -0,0 +1,142 @@
+"""
+Per-user stats rollup (UserProcessingStats) behind the dashboard endpoints.
+
+Job transitions, uploads and processed-image changes move the counters with
+F() updates in the same transaction as the change itself (see signals.py).
+A user's row is built from the source tables on first use, and
+reconcile_user_stats recomputes it periodically to repair drift from paths
+that bypass model signals (queryset updates, hard deletes by the cleanup
+tasks, concurrent writers holding stale instances).
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from apps.images.models import Image, ProcessedImage
+from .models import ProcessingJob, UserProcessingStats
+
+JOB_STATUSES = [status for status, _ in ProcessingJob.STATUS_CHOICES]
+JOB_TYPES = [job_type for job_type, _ in ProcessingJob.TYPE_CHOICES]
+ACTIVE_STATUSES = ('pending', 'moderating', 'processing')
+
+JobState = Tuple[str, str, Optional[float]]
+
+
+def job_state(job: ProcessingJob) -> Optional[JobState]:
+    """(status, job_type, processing_time) as loaded, or None if any of them was deferred"""
+    values = job.__dict__
+    if any(name not in values for name in ('status', 'job_type', 'processing_time')):
+        return None
+    return values['status'], values['job_type'], values['processing_time']
+
+
+def job_deltas(old: Optional[JobState], new: JobState) -> Dict[str, float]:
+    """Counter changes for a job moving from `old` to `new` (old None: a new job)"""
+    deltas = defaultdict(float)
+    old_status, old_type, old_time = old or (None, None, None)
+    new_status, new_type, new_time = new
+    
+    if old is None:
+        deltas['jobs_total'] += 1
+    if new_status != old_status:
+        if old_status:
+            deltas[f'jobs_{old_status}'] -= 1
+        deltas[f'jobs_{new_status}'] += 1
+    if new_type != old_type:
+        if old_type:
+            deltas[f'jobs_{old_type}'] -= 1
+        deltas[f'jobs_{new_type}'] += 1
+    if new_time != old_time:
+        deltas['timed_jobs'] += (new_time is not None) - (old_time is not None)
+        deltas['total_processing_time'] += (new_time or 0) - (old_time or 0)
+    return deltas
+
+
+def _shift(field: str, amount: float):
+    if field == 'total_processing_time':
+        return F(field) + amount
+    if amount > 0:
+        return F(field) + int(amount)
+    # Never below zero: a drifted counter is repaired by reconciliation, not by a failed save
+    return Case(
+        When(**{f'{field}__gte': -amount}, then=F(field) + int(amount)),
+        default=Value(0),
+        output_field=UserProcessingStats._meta.get_field(field),
+    )
+
+
+def apply_stats(user_id, deltas: Dict[str, float], uploaded: bool = False) -> None:
+    """Move `user_id`'s counters by `deltas` (and count an upload for today)"""
+    fields = {field.name for field in UserProcessingStats._meta.concrete_fields}
+    updates = {
+        field: _shift(field, amount)
+        for field, amount in deltas.items() if amount and field in fields
+    }
+    if uploaded:
+        today = timezone.localdate()
+        updates['uploads_today'] = Case(
+            When(uploads_day=today, then=F('uploads_today') + 1),
+            default=Value(1),
+            output_field=UserProcessingStats._meta.get_field('uploads_today'),
+        )
+        updates['uploads_day'] = today
+    if not updates:
+        return
+    
+    if not UserProcessingStats.objects.filter(user_id=user_id).update(**updates, updated_at=timezone.now()):
+        # First change for this user: the recount already includes it
+        reconcile_user_stats(user_id)
+
+
+def record_new_jobs(jobs: Iterable[ProcessingJob]) -> None:
+    """Count jobs created without post_save (bulk_create)"""
+    per_user = defaultdict(lambda: defaultdict(float))
+    for job in jobs:
+        for field, amount in job_deltas(None, job_state(job)).items():
+            per_user[job.user_id][field] += amount
+    for user_id, deltas in per_user.items():
+        apply_stats(user_id, deltas)
+
+
+def _recount(user_id) -> Dict:
+    today = timezone.localdate()
+    values = ProcessingJob.objects.filter(user_id=user_id).aggregate(
+        jobs_total=Count('pk'),
+        timed_jobs=Count('processing_time'),
+        total_processing_time=Sum('processing_time'),
+        **{f'jobs_{status}': Count('pk', filter=Q(status=status)) for status in JOB_STATUSES},
+        **{f'jobs_{job_type}': Count('pk', filter=Q(job_type=job_type)) for job_type in JOB_TYPES},
+    )
+    values.update(Image.objects.filter(user_id=user_id).aggregate(
+        images_total=Count('pk'),
+        images_safe=Count('pk', filter=Q(is_content_safe=True)),
+        image_bytes=Sum('file_size'),
+        uploads_today=Count('pk', filter=Q(created_at__date=today)),
+    ))
+    values.update(ProcessedImage.objects.filter(user_id=user_id).aggregate(
+        processed_images=Count('pk'),
+        favorite_processed=Count('pk', filter=Q(is_favorite=True)),
+    ))
+    values['total_processing_time'] = values['total_processing_time'] or 0
+    values['image_bytes'] = values['image_bytes'] or 0
+    values['uploads_day'] = today
+    return values
+
+
+def reconcile_user_stats(user_id) -> UserProcessingStats:
+    """Recompute `user_id`'s row from the source tables"""
+    with transaction.atomic():
+        # Lock first: concurrent F() updates wait, so none lands between the recount and the write
+        list(UserProcessingStats.objects.select_for_update().filter(user_id=user_id))
+        values = _recount(user_id)
+        stats, _ = UserProcessingStats.objects.update_or_create(
+            user_id=user_id, defaults=dict(values, reconciled_at=timezone.now())
+        )
+    return stats
+
+
+def get_user_stats(user) -> UserProcessingStats:
+    return UserProcessingStats.objects.filter(user=user).first() or reconcile_user_stats(user.pk)
@@ -2,34 +2,33 @@
 Celery tasks for image processing with OpenAI
 """
 
+import base64
 import logging
+import shutil
 import time
 import os
-import boto3
 import io
-from typing import Dict, Any
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
 from celery import shared_task
 from django.conf import settings
 import datetime 
 from django.utils import timezone
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
-from .models import ProcessingJob, ProcessingResult
+from .models import ProcessingBatch, ProcessingJob, ProcessingResult
 from .services import openai_service
-from apps.images.services import aws_image_service
+from apps.images.services import aws_image_service, image_processing_service
+from apps.images.blobs import store_blob
+from apps.styles.models import Style
 
 logger = logging.getLogger(__name__)
 
 def _load_image_from_storage(img_obj) -> InMemoryUploadedFile:
     """Load image from S3 storage and return as InMemoryUploadedFile"""
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
-    )
     buf = io.BytesIO()
-    s3.download_fileobj(settings.AWS_STORAGE_BUCKET_NAME, img_obj.s3_key, buf)
+    if not aws_image_service.storage.download_to(img_obj.s3_key, buf):
+        raise ValueError(f"Image {img_obj.id} not found in storage: {img_obj.s3_key}")
     buf.seek(0)
     return InMemoryUploadedFile(
         buf, 
@@ -201,6 +200,11 @@ def process_image_job_async(self, job_id: str) -> Dict[str, Any]:
         
         logger.info(f"Starting async processing for job {job_id}")
         
+        # n > 1: fan out into concurrent n=1 requests and deliver results progressively
+        n = int(job.openai_parameters.get('n', 1) or 1)
+        if n > 1 and settings.PROCESSING_FANOUT_ENABLED and not job.openai_parameters.get('stream'):
+            return _process_fanout_job(job, n)
+        
         # Process based on job type
         if job.job_type == 'generation':
             result = _process_generation_task(job)
@@ -223,14 +227,16 @@ def process_image_job_async(self, job_id: str) -> Dict[str, Any]:
             return result
         
         # Save processing results
-        _save_processing_results(job, result)
+        saved_count = _save_processing_results(job, result)
         
         # Update job as completed
         job.status = 'completed'
         job.completed_at = timezone.now()
         if job.started_at:
             job.processing_time = (job.completed_at - job.started_at).total_seconds()
-        job.save(update_fields=['status', 'completed_at', 'processing_time'])
+        job.results_expected = n
+        job.results_completed = saved_count
+        job.save(update_fields=['status', 'completed_at', 'processing_time', 'results_expected', 'results_completed'])
         
         logger.info(f"Job {job_id} completed successfully in {job.processing_time}s")
         
@@ -272,6 +278,399 @@ def process_image_job_async(self, job_id: str) -> Dict[str, Any]:
         }
 
 
+def _build_single_request(job: ProcessingJob) -> Tuple[Optional[Callable[[], Dict[str, Any]]], Optional[Dict[str, Any]]]:
+    """
+    Prepare everything a job needs once (prompt, input image download,
+    validation and moderation) and return a callable that performs a single
+    n=1 OpenAI request. Returns (request_fn, None) or (None, error).
+    """
+    params = dict(job.openai_parameters, n=1, stream=False)
+    user_id = str(job.user_id)
+    
+    if job.job_type == 'generation':
+        prompt = job.style.get_full_prompt(job.prompt) if job.style else job.prompt
+        return (lambda: openai_service.generate_image(prompt=prompt, style_params=params, user_id=user_id)), None
+    
+    if job.job_type not in ('edit', 'style_transfer'):
+        return None, {"error": f"Unknown job type: {job.job_type}"}
+    
+    if not job.original_image:
+        return None, {"error": f"Original image required for {job.job_type.replace('_', ' ')}"}
+    
+    if job.job_type == 'style_transfer':
+        if not job.style:
+            return None, {"error": "Style required for style transfer"}
+        prompt = job.style.get_full_prompt(job.prompt or f"Transform this image to {job.style.name} style")
+    else:
+        prompt = job.style.get_full_prompt(job.prompt) if job.style else job.prompt
+    
+    try:
+        prepared = openai_service.prepare_edit_image(_get_image_file(job.original_image))
+    except Exception as e:
+        return None, {"error": f"Failed to load original image: {str(e)}"}
+    if 'error' in prepared:
+        return None, prepared
+    
+    return (lambda: openai_service.edit_prepared_image(prepared, prompt, params, user_id)), None
+
+
+def _process_fanout_job(job: ProcessingJob, n: int) -> Dict[str, Any]:
+    """
+    Run an n>1 job as n concurrent n=1 requests. Each ProcessingResult is
+    saved as soon as its image arrives and progress is reported as k/n; the
+    job ends completed, partially_failed or failed. A retried job resumes:
+    results saved by an earlier attempt are kept and only the rest requested.
+    """
+    existing = job.results.count()
+    remaining = max(n - existing, 0)
+    ProcessingJob.objects.filter(pk=job.pk).update(
+        results_expected=n, results_completed=existing, results_failed=0
+    )
+    
+    completed, failed, errors = existing, 0, []
+    request_fn, error = _build_single_request(job) if remaining else (None, None)
+    if error and existing:
+        failed = remaining
+        errors.append({'index': existing, 'error': error['error'], 'details': error.get('details', error.get('moderation'))})
+    elif error:
+        job.status = 'failed'
+        job.error_message = error['error']
+        job.error_details = error.get('details', error.get('moderation', {}))
+        job.completed_at = timezone.now()
+        job.results_failed = n
+        job.save(update_fields=['status', 'error_message', 'error_details', 'completed_at', 'results_failed'])
+        logger.error(f"Job {job.id} failed before fan-out: {error['error']}")
+        return error
+    
+    for index, result in openai_service.iter_fanout(request_fn, remaining) if request_fn else ():
+        index += existing
+        if 'error' in result:
+            failed += 1
+            errors.append({'index': index, 'error': result['error'], 'details': result.get('details')})
+        else:
+            try:
+                saved = _save_processing_results(job, result, index_offset=index)
+            except Exception as e:
+                saved = 0
+                errors.append({'index': index, 'error': 'Failed to save result', 'details': str(e)})
+            if saved:
+                completed += 1
+            else:
+                failed += 1
+        
+        ProcessingJob.objects.filter(pk=job.pk).update(
+            results_completed=completed, results_failed=failed, updated_at=timezone.now()
+        )
+        logger.info(f"Job {job.id} progress: {completed}/{n} delivered, {failed} failed")
+    
+    job.results_completed = completed
+    job.results_failed = failed
+    job.completed_at = timezone.now()
+    if job.started_at:
+        job.processing_time = (job.completed_at - job.started_at).total_seconds()
+    
+    if failed == 0:
+        job.status = 'completed'
+    elif completed > 0:
+        job.status = 'partially_failed'
+        job.error_message = f"{failed} of {n} images failed"
+        job.error_details = {'errors': errors}
+    else:
+        job.status = 'failed'
+        job.error_message = errors[0]['error'] if errors else 'All images failed'
+        job.error_details = {'errors': errors}
+    
+    job.save(update_fields=[
+        'status', 'completed_at', 'processing_time', 'error_message',
+        'error_details', 'results_completed', 'results_failed'
+    ])
+    logger.info(f"Job {job.id} finished fan-out with status {job.status} ({completed}/{n})")
+    
+    if job.status == 'failed':
+        return {'error': job.error_message, 'details': job.error_details}
+    
+    return {
+        'success': True,
+        'job_id': str(job.id),
+        'status': job.status,
+        'processing_time': job.processing_time,
+        'results_count': completed,
+        'results_failed': failed,
+    }
+
+
+@shared_task(bind=True)
+def process_style_fanout_async(self, batch_id: str) -> Dict[str, Any]:
+    """
+    Apply one uploaded image to every style of a batch. The input is
+    downloaded, resized, validated and moderated once; the per-style OpenAI
+    calls then run concurrently and each job is completed as soon as its
+    own result arrives.
+    """
+    try:
+        batch = ProcessingBatch.objects.select_related('original_image').get(id=batch_id)
+    except ProcessingBatch.DoesNotExist:
+        error_msg = f"ProcessingBatch {batch_id} not found"
+        logger.error(error_msg)
+        return {'error': error_msg}
+    
+    jobs = list(batch.jobs.select_related('style').filter(status='pending').order_by('created_at'))
+    if not jobs:
+        return {'error': f"Batch {batch_id} has no pending jobs"}
+    
+    started_at = timezone.now()
+    ProcessingJob.objects.filter(pk__in=[job.pk for job in jobs]).update(status='processing', started_at=started_at)
+    for job in jobs:
+        job.status = 'processing'
+        job.started_at = started_at
+    
+    # Shared preprocessing: one download, one resize, one validation + moderation
+    try:
+        image_file = _get_image_file(batch.original_image)
+        max_side = settings.STYLE_FANOUT_INPUT_MAX_SIZE
+        image_file = image_processing_service.resize_image(image_file, max_side, max_side)
+        prepared = openai_service.prepare_edit_image(image_file)
+    except Exception as e:
+        prepared = {"error": f"Failed to load original image: {str(e)}"}
+    
+    if 'error' in prepared:
+        for job in jobs:
+            _finish_job(job, prepared)
+        logger.error(f"Batch {batch_id} failed during preprocessing: {prepared['error']}")
+        return prepared
+    
+    ProcessingJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+        moderation_passed=True,
+        moderation_details=prepared.get('moderation', {}),
+        moderation_checked_at=timezone.now(),
+    )
+    
+    request_fns = []
+    for job in jobs:
+        prompt = job.style.get_full_prompt(job.prompt or f"Transform this image to {job.style.name} style")
+        params = dict(job.openai_parameters, n=1, stream=False)
+        request_fns.append(partial(openai_service.edit_prepared_image, prepared, prompt, params, str(job.user_id)))
+    
+    completed = 0
+    for index, result in openai_service.iter_concurrent(request_fns):
+        if _finish_job(jobs[index], result):
+            completed += 1
+    
+    logger.info(f"Batch {batch_id} finished: {completed}/{len(jobs)} styles completed")
+    return {
+        'success': completed > 0,
+        'batch_id': str(batch_id),
+        'jobs_completed': completed,
+        'jobs_failed': len(jobs) - completed,
+    }
+
+
+def _finish_job(job: ProcessingJob, result: Dict[str, Any]) -> bool:
+    """Persist a single-request job outcome (results or error). Returns True on success."""
+    job.completed_at = timezone.now()
+    if job.started_at:
+        job.processing_time = (job.completed_at - job.started_at).total_seconds()
+    
+    saved = 0
+    if 'error' not in result:
+        try:
+            saved = _save_processing_results(job, result)
+        except Exception as e:
+            result = {"error": "Failed to save results", "details": str(e)}
+    
+    if saved:
+        job.status = 'completed'
+        job.results_completed = saved
+    else:
+        job.status = 'failed'
+        job.error_message = result.get('error', 'No image returned')
+        job.error_details = result.get('details', result.get('moderation', {}))
+        job.results_failed = job.results_expected
+    
+    job.save(update_fields=[
+        'status', 'completed_at', 'processing_time', 'error_message',
+        'error_details', 'results_completed', 'results_failed'
+    ])
+    return bool(saved)
+
+
+class PipelineStepError(Exception):
+    """Raised by a pipeline step so the rest of the Celery chain is not run"""
+
+
+def _pipeline_scratch_dir(job_id) -> str:
+    return os.path.join(settings.PIPELINE_SCRATCH_DIR, str(job_id))
+
+
+def _write_pipeline_scratch(job_id, index: int, data: bytes, output_format: str) -> str:
+    """Keep a step output on local disk for the next step (atomic write)"""
+    scratch_dir = _pipeline_scratch_dir(job_id)
+    os.makedirs(scratch_dir, exist_ok=True)
+    path = os.path.join(scratch_dir, f"step_{index}.{output_format}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _cleanup_pipeline_scratch(job_id):
+    shutil.rmtree(_pipeline_scratch_dir(job_id), ignore_errors=True)
+
+
+def _kept_step_output(job: ProcessingJob) -> Optional[bytes]:
+    """Bytes of the job's latest saved result, None if it is not in storage"""
+    result = ProcessingResult.objects.filter(job=job).exclude(s3_key='').order_by('-created_at').only('s3_key').first()
+    buf = io.BytesIO()
+    if result is None or not aws_image_service.storage.download_to(result.s3_key, buf):
+        return None
+    return buf.getvalue()
+
+
+def _pipeline_step_input(job: ProcessingJob, index: int) -> Dict[str, Any]:
+    """
+    Input image for an edit step, prepared for edit_prepared_image. Step 0
+    loads and moderates the original image; later steps reuse the previous
+    step output straight from the scratch dir, without re-moderating it.
+    """
+    if index == 0:
+        prepared = openai_service.prepare_edit_image(_get_image_file(job.original_image))
+        if 'error' not in prepared:
+            job.moderation_passed = True
+            job.moderation_details = prepared.get('moderation', {})
+            job.moderation_checked_at = timezone.now()
+            job.save(update_fields=['moderation_passed', 'moderation_details', 'moderation_checked_at'])
+        return prepared
+    
+    previous = job.step_timings[index - 1]
+    output_format = previous.get('output_format', 'png')
+    path = os.path.join(_pipeline_scratch_dir(job.id), f"step_{index - 1}.{output_format}")
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        # Scratch dir not shared with the worker that ran the previous step: a kept output is in storage
+        data = _kept_step_output(job) if previous.get('kept') else None
+        if data is None:
+            return {"error": f"Output of step {index} is not available on this worker"}
+    return {
+        "name": os.path.basename(path),
+        "bytes": data,
+        "content_type": f"image/{output_format}",
+    }
+
+
+@shared_task(bind=True)
+def run_pipeline_step(self, job_id: str, index: int) -> Dict[str, Any]:
+    """
+    Run one step of a pipeline job (one link of its Celery chain). The output
+    is written to the shared scratch dir for the next step and only persisted
+    as a ProcessingResult when it is the last step or marked `keep`.
+    """
+    try:
+        job = ProcessingJob.objects.select_related('original_image').get(id=job_id)
+    except ProcessingJob.DoesNotExist:
+        error_msg = f"ProcessingJob {job_id} not found"
+        logger.error(error_msg)
+        raise PipelineStepError(error_msg)
+    
+    if job.status in ('cancelled', 'failed'):
+        _cleanup_pipeline_scratch(job_id)
+        raise PipelineStepError(f"Pipeline {job_id} is {job.status}, skipping step {index + 1}")
+    
+    if index == 0:
+        job.status = 'processing'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    
+    steps = job.pipeline_steps
+    step = steps[index]
+    is_last = index == len(steps) - 1
+    keep = is_last or step.get('keep', False)
+    params = dict(job.openai_parameters, n=1, stream=False, partial_images=0)
+    user_id = str(job.user_id)
+    step_started = time.monotonic()
+    result: Dict[str, Any] = {}
+    
+    try:
+        style = Style.objects.get(id=step['style_id']) if step.get('style_id') else None
+        
+        if step['operation'] == 'style_transfer':
+            prompt = style.get_full_prompt(step.get('prompt') or f"Transform this image to {style.name} style")
+        else:
+            prompt = style.get_full_prompt(step['prompt']) if style else step['prompt']
+        
+        if step['operation'] == 'generation':
+            result = openai_service.generate_image(prompt=prompt, style_params=params, user_id=user_id)
+        else:
+            prepared = _pipeline_step_input(job, index)
+            result = prepared if 'error' in prepared else openai_service.edit_prepared_image(prepared, prompt, params, user_id)
+        
+        images = result.get('images', []) if 'error' not in result else []
+        if not images or not images[0].get('b64_json'):
+            raise PipelineStepError(result.get('error', 'No image returned'))
+        
+        output_format = result.get('output_format') or params.get('output_format', 'png')
+        _write_pipeline_scratch(job.id, index, base64.b64decode(images[0]['b64_json']), output_format)
+        
+        saved = 0
+        if keep:
+            saved = _save_processing_results(job, dict(result, images=images[:1], output_format=output_format), index_offset=index)
+    
+    except Exception as e:
+        details = result.get('details', result.get('moderation')) or str(e)
+        job.step_timings = job.step_timings + [{
+            'step': index,
+            'operation': step['operation'],
+            'status': 'failed',
+            'seconds': round(time.monotonic() - step_started, 3),
+        }]
+        job.status = 'failed'
+        job.error_message = f"Step {index + 1} ({step['operation']}) failed: {str(e)}"
+        job.error_details = {'step': index, 'details': details}
+        job.completed_at = timezone.now()
+        if job.started_at:
+            job.processing_time = (job.completed_at - job.started_at).total_seconds()
+        job.results_failed = job.results_expected - job.results_completed
+        job.save(update_fields=[
+            'step_timings', 'status', 'error_message', 'error_details',
+            'completed_at', 'processing_time', 'results_failed'
+        ])
+        _cleanup_pipeline_scratch(job.id)
+        logger.error(f"Pipeline {job_id} failed at step {index + 1}: {str(e)}")
+        raise PipelineStepError(job.error_message) from e
+    
+    job.step_timings = job.step_timings + [{
+        'step': index,
+        'operation': step['operation'],
+        'status': 'completed',
+        'seconds': round(time.monotonic() - step_started, 3),
+        'output_format': output_format,
+        'kept': bool(saved),
+    }]
+    job.results_completed += saved
+    update_fields = ['step_timings', 'results_completed']
+    
+    if is_last:
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        if job.started_at:
+            job.processing_time = (job.completed_at - job.started_at).total_seconds()
+        update_fields += ['status', 'completed_at', 'processing_time']
+        _cleanup_pipeline_scratch(job.id)
+    
+    job.save(update_fields=update_fields)
+    logger.info(f"Pipeline {job_id} step {index + 1}/{len(steps)} ({step['operation']}) done in {job.step_timings[-1]['seconds']}s")
+    
+    return {
+        'success': True,
+        'job_id': str(job_id),
+        'step': index,
+        'kept': bool(saved),
+        'status': job.status,
+    }
+
+
 def _process_generation_task(job: ProcessingJob) -> Dict[str, Any]:
     """Process image generation job"""
     try:
@@ -350,12 +749,13 @@ def _process_style_transfer_task(job: ProcessingJob) -> Dict[str, Any]:
         return {"error": f"Style transfer failed: {str(e)}"}
 
 
-def _save_processing_results(job: ProcessingJob, result: Dict[str, Any]):
-    """Save processing results to database and S3"""
+def _save_processing_results(job: ProcessingJob, result: Dict[str, Any], index_offset: int = 0) -> int:
+    """Save processing results to database and S3. Returns the number of results saved."""
     try:
         images = result.get('images', [])
+        saved = 0
         
-        for i, image_data in enumerate(images):
+        for i, image_data in enumerate(images, start=index_offset):
 
             created_ts = image_data.get("created", result.get("created", timezone.now().timestamp()))
             created_dt = timezone.make_aware(datetime.datetime.fromtimestamp(created_ts), timezone.utc)
@@ -368,10 +768,8 @@ def _save_processing_results(job: ProcessingJob, result: Dict[str, Any]):
             filename = f"processed_{job.id}_{i}.{result.get('output_format', 'png')}"
             image_file = openai_service.base64_to_image_file(b64_data, filename)
             
-            # Upload to S3
-            s3_key, s3_url = aws_image_service.upload_processed_image(
-                image_file, job.user.id
-            )
+            # Upload to S3 (identical bytes are stored once)
+            blob, s3_url = store_blob(image_file)
             
             # Create ProcessingResult
             ProcessingResult.objects.create(
@@ -382,34 +780,43 @@ def _save_processing_results(job: ProcessingJob, result: Dict[str, Any]):
                 result_quality=result.get('quality', 'auto'),
                 result_background=result.get('background', 'auto'),
                 is_public=job.is_public,
-                s3_key=s3_key,
-                s3_url=s3_url,
+                s3_key=blob.s3_key if blob else '',
+                s3_url=s3_url or '',
+                blob=blob,
                 openai_created_at=created_dt,
                 token_usage=result.get('usage', {})
             )
+            saved += 1
+        
+        return saved
             
     except Exception as e:
         logger.error(f"Failed to save results for job {job.id}: {str(e)}")
         raise
 
 
-@shared_task
-def cleanup_old_jobs():
+@shared_task(bind=True)
+def cleanup_old_jobs(self):
     """Clean up old completed/failed jobs (runs periodically)"""
     try:
-        # Delete jobs older than 30 days
+        from .tasks_cleanup import CleanupRun, delete_processing_jobs, report_progress
+        
+        # Delete jobs older than 30 days, in pk batches under the cleanup time budget
         cutoff_date = timezone.now() - timezone.timedelta(days=30)
         
         old_jobs = ProcessingJob.objects.filter(
             created_at__lt=cutoff_date,
-            status__in=['completed', 'failed', 'cancelled']
+            status__in=['completed', 'partially_failed', 'failed', 'cancelled']
         )
         
-        deleted_count = old_jobs.count()
-        old_jobs.delete()
+        run = CleanupRun()
+        deleted_count = 0
+        for pks in run.batches(old_jobs):
+            deleted_count += delete_processing_jobs(pks)
+            report_progress(self, cleaned_jobs=deleted_count, elapsed=run.elapsed)
         
-        logger.info(f"Cleaned up {deleted_count} old processing jobs")
-        return {'cleaned_jobs': deleted_count}
+        logger.info(f"Cleaned up {deleted_count} old processing jobs in {run.elapsed}s (complete={run.complete})")
+        return {'cleaned_jobs': deleted_count, 'complete': run.complete, 'elapsed': run.elapsed}
         
     except Exception as e:
         logger.error(f"Failed to cleanup old jobs: {str(e)}")
@@ -439,6 +846,136 @@ def update_processing_stats():
         return {'error': str(e)}
 
 
+@shared_task
+def publish_public_results(batch_size: int = 500):
+    """Backfill: publish results marked public before public/ copies existed"""
+    from .publishing import publish_result
+    
+    pending = ProcessingResult.active_objects.filter(is_public=True, public_key='').exclude(s3_key='')
+    published, failed = 0, 0
+    for result in pending.select_related('blob')[:batch_size]:
+        try:
+            publish_result(result)
+            published += 1
+        except Exception as e:
+            logger.error(f"Publishing result {result.pk} failed: {str(e)}")
+            failed += 1
+    
+    logger.info(f"Published {published} public results ({failed} failed)")
+    return {'published': published, 'failed': failed}
+
+
+@shared_task
+def build_result_export(export_id: str):
+    """Write a large ZIP export to a temp file (constant memory) and store it for download"""
+    import tempfile
+    from .exports import export_entries, export_key, export_querysets, stream_zip
+    from .models import ResultExport
+    
+    try:
+        export = ResultExport.objects.select_related('user').get(pk=export_id)
+    except ResultExport.DoesNotExist:
+        return {'error': f"Export {export_id} not found"}
+    
+    if export.status != 'pending':
+        return {'export_id': export_id, 'status': export.status, 'skipped': True}
+    ResultExport.objects.filter(pk=export.pk).update(status='processing')
+    
+    try:
+        results, images = export_querysets(
+            export.user, export.result_ids, export.image_ids, export.include_originals
+        )
+        stats = {}
+        key = export_key(export)
+        with tempfile.TemporaryFile() as archive:
+            for data in stream_zip(export_entries(results, images), stats):
+                archive.write(data)
+            size = archive.tell()
+            archive.seek(0)
+            aws_image_service.storage.save(key, archive, content_type='application/zip')
+        
+        now = timezone.now()
+        ResultExport.objects.filter(pk=export.pk).update(
+            status='completed', s3_key=key, size=size, file_count=stats['files'],
+            completed_at=now, expires_at=now + datetime.timedelta(hours=settings.EXPORT_EXPIRY_HOURS)
+        )
+        logger.info(f"Export {export_id} built: {stats['files']} files, {size} bytes")
+        return {'export_id': export_id, 'status': 'completed', 'files': stats['files'], 'size': size}
+    
+    except Exception as e:
+        logger.error(f"Export {export_id} failed: {str(e)}")
+        ResultExport.objects.filter(pk=export.pk).update(
+            status='failed', error_message="Failed to build export", completed_at=timezone.now()
+        )
+        return {'export_id': export_id, 'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def expire_result_exports():
+    """Delete stored export archives past their download window"""
+    from .models import ResultExport
+    
+    try:
+        stale = list(ResultExport.objects.filter(
+            status='completed', expires_at__lt=timezone.now()
+        ).values_list('pk', 's3_key'))
+        
+        deleted, failed = aws_image_service.delete_many([key for _, key in stale])
+        expired = ResultExport.objects.filter(
+            pk__in=[pk for pk, key in stale if key not in failed]
+        ).update(status='expired', s3_key='')
+        
+        logger.info(f"Expired {expired} exports ({len(failed)} deletes failed)")
+        return {'expired': expired, 'failed_deletes': len(failed)}
+    
+    except Exception as e:
+        logger.error(f"Export expiry failed: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task(bind=True)
+def reconcile_processing_stats(self):
+    """Recompute stats rollup rows not reconciled for USER_STATS_RECONCILE_HOURS"""
+    try:
+        from django.db.models import Q
+        from .models import UserProcessingStats
+        from .stats import reconcile_user_stats
+        from .tasks_cleanup import CleanupRun, report_progress
+        
+        cutoff = timezone.now() - datetime.timedelta(hours=settings.USER_STATS_RECONCILE_HOURS)
+        stale = UserProcessingStats.objects.filter(Q(reconciled_at__isnull=True) | Q(reconciled_at__lt=cutoff))
+        
+        run = CleanupRun()
+        reconciled = 0
+        for pks in run.batches(stale):
+            for user_id in UserProcessingStats.objects.filter(pk__in=pks).values_list('user_id', flat=True):
+                reconcile_user_stats(user_id)
+                reconciled += 1
+            report_progress(self, reconciled=reconciled, elapsed=run.elapsed)
+        
+        logger.info(f"Reconciled {reconciled} user stats rows in {run.elapsed}s (complete={run.complete})")
+        return {'reconciled': reconciled, 'complete': run.complete, 'elapsed': run.elapsed}
+    
+    except Exception as e:
+        logger.error(f"User stats reconciliation failed: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task
+def flush_quota_counters():
+    """Write changed Redis quota counters to UserProcessingQuota"""
+    try:
+        from .quota import flush_quota_counters as flush
+        
+        result = flush()
+        logger.info(f"Flushed {result['flushed_counters']} quota counters for {result['users']} users")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Quota flush failed: {str(e)}")
+        return {'error': str(e)}
+
+
 @shared_task
 def send_job_notification(job_id: str, status: str, user_email: str):
     """Send notification when job status changes (optional)"""
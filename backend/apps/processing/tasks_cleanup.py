@@ -3,75 +3,181 @@ Tareas de limpieza adicionales para Redis y optimización de almacenamiento
 """
 
 import logging
+import time
 from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-import redis
+
+from config.redis import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Keys written by the Celery result backend; the only ones maintenance may expire
+RESULT_KEY_PREFIXES = ('celery-task-meta-', 'celery-taskset-meta-')
+
+# Kombu broker structures (bindings, queues, unacked bookkeeping): never touched
+BROKER_KEY_PREFIXES = ('_kombu.', 'unacked')
+
+# SCAN cursor of an unfinished maintenance pass: the next run resumes there
+SCAN_CURSOR_KEY = 'maintenance:redis-scan-cursor'
+SCAN_CURSOR_TTL = 24 * 60 * 60  # seconds; a pass abandoned for longer starts over
+
+
 def get_redis_client():
-    """Get Redis client for cleanup operations"""
+    """Get Redis client for cleanup operations (the Celery result backend)"""
     try:
-        return redis.Redis(
-            host=getattr(settings, 'CELERY_BROKER_HOST', 'redis'),
-            port=getattr(settings, 'CELERY_BROKER_PORT', 6379),
-            db=getattr(settings, 'CELERY_BROKER_DB', 0),
-            decode_responses=True
-        )
+        return get_redis(settings.CELERY_RESULT_BACKEND)
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
         return None
 
+
+def _key_prefix(key: str) -> str:
+    """Group a key for the inventory: known Celery/Kombu prefixes, else the part before the first ':'"""
+    for prefix in RESULT_KEY_PREFIXES + BROKER_KEY_PREFIXES:
+        if key.startswith(prefix):
+            return prefix
+    separator = key.find(':', 1)
+    if separator != -1:
+        return key[:separator + 1]
+    return '<other>'
+
+
+def _expire_result_keys(client, keys, result_expires: int):
+    """
+    Give TTL-less result keys a TTL and unlink the ones idle for longer than
+    `result_expires`. Keys that already have a TTL are left to Redis.
+    Returns (expired, unlinked).
+    """
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.ttl(key)
+    no_ttl = [key for key, ttl in zip(keys, pipe.execute()) if ttl == -1]
+    if not no_ttl:
+        return 0, 0
+    
+    for key in no_ttl:
+        pipe.object('idletime', key)
+    idle_times = pipe.execute(raise_on_error=False)
+    
+    expired, stale = 0, []
+    for key, idle in zip(no_ttl, idle_times):
+        if isinstance(idle, int) and idle >= result_expires:
+            stale.append(key)
+        else:
+            remaining = result_expires - idle if isinstance(idle, int) else result_expires
+            pipe.expire(key, max(1, remaining))
+            expired += 1
+    if stale:
+        pipe.unlink(*stale)
+    pipe.execute()
+    return expired, len(stale)
+
+
+def _maybe_rewrite_aof(client) -> dict:
+    """BGREWRITEAOF only when the AOF has grown enough since the last rewrite"""
+    info = client.info('persistence')
+    status = {'aof_enabled': bool(info.get('aof_enabled')), 'rewrite_triggered': False}
+    if not status['aof_enabled']:
+        return status
+    
+    current = info.get('aof_current_size', 0)
+    base = info.get('aof_base_size', 0) or current
+    status.update({
+        'aof_current_size': current,
+        'aof_base_size': base,
+        'growth_ratio': round(current / base, 2) if base else None,
+    })
+    
+    busy = info.get('aof_rewrite_in_progress') or info.get('aof_rewrite_scheduled') or info.get('rdb_bgsave_in_progress')
+    if busy or current < settings.REDIS_AOF_REWRITE_MIN_SIZE or not base:
+        return status
+    
+    if current / base >= settings.REDIS_AOF_REWRITE_GROWTH_RATIO:
+        client.bgrewriteaof()
+        status['rewrite_triggered'] = True
+    return status
+
+
+def _memory_info(client) -> dict:
+    info = client.info('memory')
+    return {
+        'used_memory': info.get('used_memory'),
+        'used_memory_human': info.get('used_memory_human'),
+        'used_memory_peak_human': info.get('used_memory_peak_human'),
+        'maxmemory_human': info.get('maxmemory_human'),
+        'mem_fragmentation_ratio': info.get('mem_fragmentation_ratio'),
+    }
+
+
 @shared_task
 def cleanup_redis_data():
-    """Clean up old Redis data and compact AOF file"""
+    """
+    Non-blocking Redis maintenance: walk the key space with SCAN under a time
+    budget (resuming where the previous run stopped), expire stale Celery
+    result keys with pipelined EXPIRE/UNLINK, rewrite the AOF only when it
+    has grown enough and report a key inventory by prefix. Kombu broker keys
+    are counted but never modified.
+    """
     try:
         client = get_redis_client()
         if not client:
             return {'error': 'Could not connect to Redis'}
         
-        # Get memory usage before cleanup
-        memory_before = client.memory_usage() if hasattr(client, 'memory_usage') else 0
-        
-        # Clean up old Celery result keys (older than 24 hours)
-        pattern_prefixes = [
-            'celery-task-meta-*',
-            '_kombu.binding.*',
-            'unacked_mutex',
-            'unacked_index'
-        ]
-        
-        cleaned_keys = 0
-        cutoff_time = timezone.now() - timedelta(hours=24)
-        
-        for prefix in pattern_prefixes:
-            keys = client.keys(prefix)
-            if keys:
-                # Delete in batches to avoid memory spikes
-                batch_size = 100
-                for i in range(0, len(keys), batch_size):
-                    batch = keys[i:i + batch_size]
-                    client.delete(*batch)
-                    cleaned_keys += len(batch)
-        
-        # Force AOF rewrite to compact the file
-        try:
-            client.bgrewriteaof()
-            aof_rewrite_triggered = True
-        except:
-            aof_rewrite_triggered = False
-        
-        # Get memory usage after cleanup
-        memory_after = client.memory_usage() if hasattr(client, 'memory_usage') else 0
+        deadline = time.monotonic() + settings.REDIS_MAINTENANCE_TIME_BUDGET_SECONDS
+        result_expires = settings.CELERY_RESULT_EXPIRES
+        memory_before = _memory_info(client)
+        
+        inventory = {}
+        scanned, expired, unlinked = 0, 0, 0
+        result_keys = []
+        complete = False
+        
+        # Resume the pass the previous run ran out of budget in, so the tail of a large key space is reached too
+        cursor = int(client.get(SCAN_CURSOR_KEY) or 0)
+        while True:
+            cursor, keys = client.scan(cursor=cursor, count=settings.REDIS_MAINTENANCE_SCAN_COUNT)
+            for key in keys:
+                scanned += 1
+                prefix = _key_prefix(key)
+                inventory[prefix] = inventory.get(prefix, 0) + 1
+                
+                if prefix in RESULT_KEY_PREFIXES:
+                    result_keys.append(key)
+                
+                if len(result_keys) >= settings.REDIS_MAINTENANCE_SCAN_COUNT:
+                    batch_expired, batch_unlinked = _expire_result_keys(client, result_keys, result_expires)
+                    expired += batch_expired
+                    unlinked += batch_unlinked
+                    result_keys = []
+            
+            if int(cursor) == 0:
+                complete = True
+                break
+            if time.monotonic() >= deadline:
+                break
+        
+        if complete:
+            client.delete(SCAN_CURSOR_KEY)
+        else:
+            client.set(SCAN_CURSOR_KEY, cursor, ex=SCAN_CURSOR_TTL)
+        
+        if result_keys:
+            batch_expired, batch_unlinked = _expire_result_keys(client, result_keys, result_expires)
+            expired += batch_expired
+            unlinked += batch_unlinked
         
         result = {
-            'cleaned_keys': cleaned_keys,
+            'scanned_keys': scanned,
+            'expired_keys': expired,
+            'unlinked_keys': unlinked,
+            'inventory': dict(sorted(inventory.items(), key=lambda item: -item[1])),
             'memory_before': memory_before,
-            'memory_after': memory_after,
-            'aof_rewrite_triggered': aof_rewrite_triggered,
-            'memory_saved': memory_before - memory_after
+            'memory_after': _memory_info(client),
+            'aof': _maybe_rewrite_aof(client),
+            'complete': complete,
+            'cursor': int(cursor),
         }
         
         logger.info(f"Redis cleanup completed: {result}")
@@ -81,65 +187,472 @@ def cleanup_redis_data():
         logger.error(f"Redis cleanup failed: {str(e)}")
         return {'error': str(e)}
 
-@shared_task
-def optimize_processing_results():
+
+class CleanupRun:
+    """Batch size, wall-clock budget and completion state of one cleanup run"""
+    
+    def __init__(self):
+        self.batch_size = settings.CLEANUP_BATCH_SIZE
+        self.started = time.monotonic()
+        self.deadline = self.started + settings.CLEANUP_TIME_BUDGET_SECONDS
+        self.complete = False
+    
+    @property
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self.started, 2)
+    
+    def batches(self, queryset):
+        """
+        Yield lists of primary keys from `queryset` in pk order (keyset
+        pagination, only the pk column is fetched) until the budget runs out.
+        `complete` is set once the queryset is exhausted; otherwise the next
+        run picks up whatever is left.
+        """
+        self.complete = False
+        last_pk = None
+        while time.monotonic() < self.deadline:
+            page = queryset.order_by('pk')
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            pks = list(page.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                self.complete = True
+                return
+            yield pks
+            last_pk = pks[-1]
+
+
+def report_progress(task, **meta):
+    """Publish intermediate progress of a long cleanup run to the result backend"""
+    if task.request.id and not task.request.is_eager:
+        task.update_state(state='PROGRESS', meta=meta)
+
+
+def delete_processing_jobs(job_pks):
+    """
+    Delete a batch of jobs bottom-up (likes, results, streaming events, jobs)
+    with one DELETE per table, without loading result_b64 into memory.
+    Shared blobs lose a reference; collect_unreferenced_blobs frees them.
+    Returns the number of jobs deleted.
+    """
+    from apps.images.blobs import release_blob_refs
+    from apps.processing.models import ProcessingJob, ProcessingResult, ProcessingResultLike, StreamingEvent
+    
+    ProcessingResultLike.objects.filter(result__job_id__in=job_pks).delete()
+    release_blob_refs(ProcessingResult.objects.filter(job_id__in=job_pks))
+    ProcessingResult.objects.filter(job_id__in=job_pks).only('pk').delete()
+    StreamingEvent.objects.filter(job_id__in=job_pks).delete()
+    _, deleted = ProcessingJob.objects.filter(pk__in=job_pks).only('pk').delete()
+    return deleted.get(ProcessingJob._meta.label, 0)
+
+
+@shared_task(bind=True)
+def optimize_processing_results(self):
     """Optimize storage by removing old base64 data and keeping only URLs"""
     try:
         from apps.processing.models import ProcessingResult
         
-        # Find results older than 7 days with base64 data still stored
+        # Find results older than 7 days with base64 data still stored,
+        # keeping base64 data only if S3 storage failed
         cutoff_date = timezone.now() - timedelta(days=7)
         
         results_to_optimize = ProcessingResult.objects.filter(
             job__created_at__lt=cutoff_date,
             result_b64__isnull=False
-        ).exclude(result_b64='')
+        ).exclude(result_b64='').exclude(s3_key='').exclude(s3_url='')
         
+        run = CleanupRun()
         optimized_count = 0
-        for result in results_to_optimize:
-            # Keep base64 data only if S3 storage failed
-            if result.s3_key and result.s3_url:
-                # Clear base64 data to save space
-                result.result_b64 = ''
-                result.save(update_fields=['result_b64'])
-                optimized_count += 1
+        for pks in run.batches(results_to_optimize):
+            # Clear base64 data to save space, one UPDATE per batch
+            optimized_count += ProcessingResult.objects.filter(pk__in=pks).update(result_b64='')
+            report_progress(self, optimized_results=optimized_count, elapsed=run.elapsed)
         
-        logger.info(f"Optimized {optimized_count} ProcessingResults")
-        return {'optimized_results': optimized_count}
+        logger.info(f"Optimized {optimized_count} ProcessingResults in {run.elapsed}s (complete={run.complete})")
+        return {'optimized_results': optimized_count, 'complete': run.complete, 'elapsed': run.elapsed}
         
     except Exception as e:
         logger.error(f"Processing results optimization failed: {str(e)}")
         return {'error': str(e)}
 
-@shared_task
-def cleanup_failed_jobs_data():
+@shared_task(bind=True)
+def cleanup_failed_jobs_data(self):
     """Clean up data associated with failed jobs"""
     try:
-        from apps.processing.models import ProcessingJob, ProcessingResult
+        from apps.processing.models import ProcessingResult, ProcessingResultLike
+        from apps.images.blobs import release_blob_refs
         from apps.images.services import aws_image_service
         
-        # Find failed jobs older than 3 days
+        # Partial results of failed jobs older than 3 days
         cutoff_date = timezone.now() - timedelta(days=3)
         
-        failed_jobs = ProcessingJob.objects.filter(
-            status='failed',
-            completed_at__lt=cutoff_date
+        failed_results = ProcessingResult.objects.filter(
+            job__status='failed',
+            job__completed_at__lt=cutoff_date
         )
         
-        cleaned_jobs = 0
-        for job in failed_jobs:
-            # Clean up any partial results from failed jobs
-            for result in job.results.all():
-                if result.s3_key:
-                    # Delete from S3/local storage
-                    aws_image_service.delete_from_s3(result.s3_key)
-                result.delete()
+        run = CleanupRun()
+        cleaned_results, deleted_files, failed_keys = 0, 0, []
+        for pks in run.batches(failed_results):
+            # Content-addressed blobs may be shared: those only lose a reference
+            keys = list(
+                ProcessingResult.objects.filter(pk__in=pks, blob__isnull=True)
+                .exclude(s3_key='').values_list('s3_key', flat=True)
+            )
             
-            cleaned_jobs += 1
+            # Delete from S3/local storage in bulk (DeleteObjects, 1000 keys per call)
+            deleted, failed = aws_image_service.delete_many(keys)
+            deleted_files += deleted
+            failed_keys.extend(failed)
+            
+            # Rows whose blob could not be deleted are kept for the next run
+            batch = ProcessingResult.objects.filter(pk__in=pks).exclude(s3_key__in=failed)
+            ProcessingResultLike.objects.filter(result__in=batch).delete()
+            release_blob_refs(batch)
+            cleaned_results += batch.only('pk').delete()[1].get(ProcessingResult._meta.label, 0)
+            
+            report_progress(self, cleaned_results=cleaned_results, deleted_files=deleted_files, elapsed=run.elapsed)
         
-        logger.info(f"Cleaned up {cleaned_jobs} failed jobs")
-        return {'cleaned_failed_jobs': cleaned_jobs}
+        result = {
+            'cleaned_results': cleaned_results,
+            'deleted_files': deleted_files,
+            'failed_deletes': len(failed_keys),
+            'complete': run.complete and not failed_keys,
+            'elapsed': run.elapsed,
+        }
+        logger.info(f"Failed jobs cleanup: {result}")
+        return result
         
     except Exception as e:
         logger.error(f"Failed jobs cleanup failed: {str(e)}")
         return {'error': str(e)}
+
+
+# Storage prefixes whose blobs must be referenced by a database row
+ORPHAN_SCAN_PREFIXES = ('processed/', 'images/uploads/', 'blobs/', 'public/')
+
+
+def _referenced_keys(keys):
+    """Subset of storage keys still referenced by any row (soft-deleted rows included)"""
+    from apps.processing.models import ProcessingResult
+    from apps.images.models import Image, ProcessedImage, StoredBlob
+    
+    # Older rows may store the key with a media/ prefix
+    candidates = {}
+    for key in keys:
+        for variant in (key, f"media/{key}", f"/media/{key}"):
+            candidates[variant] = key
+    variants = list(candidates)
+    
+    referenced = set()
+    for values in (
+        ProcessingResult.objects.filter(s3_key__in=variants).values_list('s3_key', flat=True),
+        Image.objects.filter(s3_key__in=variants).values_list('s3_key', flat=True),
+        Image.objects.filter(original_image__in=variants).values_list('original_image', flat=True),
+        ProcessedImage.objects.filter(processed_image__in=variants).values_list('processed_image', flat=True),
+        # Unreferenced blobs keep their row until collect_unreferenced_blobs frees them
+        StoredBlob.objects.filter(s3_key__in=variants).values_list('s3_key', flat=True),
+        # Public copies only count while a live result is published there
+        ProcessingResult.objects.filter(
+            public_key__in=variants, is_public=True, is_deleted=False
+        ).values_list('public_key', flat=True),
+    ):
+        referenced.update(candidates[value] for value in values)
+    return referenced
+
+
+def reconcile_storage(prefixes=None, dry_run=True, start_after=None, deadline=None):
+    """
+    Stream storage listings page by page, check keys in batches against the
+    database and delete (or, on dry runs, only report) unreferenced blobs
+    older than the grace period. When `deadline` (time.monotonic()) is hit
+    the report carries a `resume` cursor for the next run.
+    """
+    from apps.images.services import aws_image_service
+    
+    prefixes = list(prefixes or ORPHAN_SCAN_PREFIXES)
+    batch_size = settings.CLEANUP_BATCH_SIZE
+    grace_cutoff = timezone.now() - timedelta(hours=settings.STORAGE_ORPHAN_GRACE_HOURS)
+    report = {
+        'dry_run': dry_run,
+        'scanned': 0,
+        'skipped_recent': 0,
+        'orphans': 0,
+        'orphan_bytes': 0,
+        'deleted': 0,
+        'failed_deletes': 0,
+        'by_prefix': {},
+        'sample': [],
+        'complete': True,
+        'resume': None,
+    }
+    
+    def flush(prefix, batch):
+        referenced = _referenced_keys([key for key, _ in batch])
+        orphans = [(key, size) for key, size in batch if key not in referenced]
+        if not orphans:
+            return
+        
+        report['orphans'] += len(orphans)
+        report['orphan_bytes'] += sum(size for _, size in orphans)
+        report['by_prefix'][prefix] = report['by_prefix'].get(prefix, 0) + len(orphans)
+        report['sample'].extend(key for key, _ in orphans[:50 - len(report['sample'])])
+        
+        if not dry_run:
+            deleted, failed = aws_image_service.delete_many([key for key, _ in orphans])
+            report['deleted'] += deleted
+            report['failed_deletes'] += len(failed)
+    
+    for index, prefix in enumerate(prefixes):
+        batch = []
+        objects = aws_image_service.iter_stored_objects(prefix, start_after if index == 0 else None)
+        for key, size, last_modified in objects:
+            report['scanned'] += 1
+            if last_modified > grace_cutoff:
+                # Possibly an upload whose row is not committed yet
+                report['skipped_recent'] += 1
+                continue
+            
+            batch.append((key, size))
+            if len(batch) >= batch_size:
+                flush(prefix, batch)
+                batch = []
+                if deadline and time.monotonic() >= deadline:
+                    report['complete'] = False
+                    report['resume'] = {'prefixes': prefixes[index:], 'start_after': key}
+                    return report
+        
+        if batch:
+            flush(prefix, batch)
+    
+    return report
+
+
+@shared_task(bind=True)
+def reconcile_storage_orphans(self, dry_run=False, prefixes=None, start_after=None):
+    """Delete storage blobs no row references anymore (continues itself while work is left)"""
+    try:
+        deadline = time.monotonic() + settings.CLEANUP_TIME_BUDGET_SECONDS
+        report = reconcile_storage(prefixes, dry_run=dry_run, start_after=start_after, deadline=deadline)
+        
+        if report['resume'] and not dry_run:
+            reconcile_storage_orphans.apply_async(kwargs=dict(report['resume'], dry_run=dry_run), countdown=60)
+        
+        logger.info(f"Storage reconcile: {report}")
+        return report
+        
+    except Exception as e:
+        logger.error(f"Storage reconcile failed: {str(e)}")
+        return {'error': str(e)}
+
+
+# Archive prefix for demoted results (still under processed/, so the reconciler covers it)
+COLD_STORAGE_PREFIX = 'processed/cold/'
+
+
+def _transcode_for_cold_storage(data: bytes):
+    """Re-encode a result for cold storage. Returns (bytes, format)."""
+    import io
+    from PIL import Image as PILImage, features
+    
+    target = settings.STORAGE_TIERING_FORMAT
+    if target == 'avif' and not features.check('avif'):
+        target = 'webp'
+    
+    with PILImage.open(io.BytesIO(data)) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+        buf = io.BytesIO()
+        if target == 'avif':
+            img.save(buf, 'AVIF', quality=settings.STORAGE_TIERING_QUALITY)
+        elif settings.STORAGE_TIERING_LOSSLESS:
+            img.save(buf, 'WEBP', lossless=True, quality=100, method=4)
+        else:
+            img.save(buf, 'WEBP', quality=settings.STORAGE_TIERING_QUALITY, method=6)
+    return buf.getvalue(), target
+
+
+def _demote_result(result):
+    """
+    Transcode one result, upload it under the cold prefix/storage class and
+    swap s3_key only if nobody changed it meanwhile. A shared blob is not
+    deleted by the caller; the result only drops its reference. Returns the
+    ledger entry, or None when the result was skipped.
+    """
+    import io
+    import os
+    from django.core.files.uploadedfile import InMemoryUploadedFile
+    from django.db import transaction
+    from apps.images.blobs import release_blobs
+    from apps.images.media_auth import invalidate_media_access
+    from apps.images.services import aws_image_service
+    from apps.processing.models import ProcessingResult, StorageTierTransition
+    
+    data = aws_image_service.read_bytes(result.s3_key)
+    if not data:
+        logger.warning(f"Tiering skipped result {result.pk}: {result.s3_key} not found")
+        return None
+    
+    from_format = result.result_format or os.path.splitext(result.s3_key)[1].lstrip('.') or 'png'
+    cold_data, to_format = _transcode_for_cold_storage(data)
+    if len(cold_data) >= len(data):
+        # Re-encoding does not pay off; only move the original bytes
+        cold_data, to_format = data, from_format
+    
+    if result.blob_id:
+        # Content-addressed keys are not per result
+        relative_key = str(result.pk)
+    elif result.s3_key.startswith('processed/'):
+        relative_key = result.s3_key[len('processed/'):]
+    else:
+        relative_key = result.s3_key
+    to_key = f"{COLD_STORAGE_PREFIX}{os.path.splitext(relative_key)[0]}.{to_format}"
+    storage_class = settings.STORAGE_TIERING_S3_STORAGE_CLASS if aws_image_service.use_s3 else ''
+    extra_args = {'CacheControl': 'max-age=31536000, immutable'}
+    if storage_class:
+        extra_args['StorageClass'] = storage_class
+    
+    cold_file = InMemoryUploadedFile(
+        io.BytesIO(cold_data), 'ImageField', os.path.basename(to_key), f'image/{to_format}', len(cold_data), None
+    )
+    to_url = aws_image_service.upload_to_s3(cold_file, to_key, extra_args=extra_args)
+    if not to_url:
+        logger.warning(f"Tiering skipped result {result.pk}: upload of {to_key} failed")
+        return None
+    
+    with transaction.atomic():
+        # Compare-and-swap on the key: a concurrent change or delete wins
+        swapped = ProcessingResult.objects.filter(pk=result.pk, s3_key=result.s3_key).update(
+            s3_key=to_key, s3_url=to_url, result_format=to_format, storage_tier='cold', result_b64='', blob=None
+        )
+        if swapped:
+            # update() sends no post_save: drop the media authorization of both keys
+            from_key = result.s3_key
+            transaction.on_commit(lambda: invalidate_media_access(from_key, to_key))
+            if result.blob_id:
+                release_blobs({result.blob_id: 1})
+            transition = StorageTierTransition.objects.create(
+                result_id=result.pk,
+                from_key=result.s3_key,
+                to_key=to_key,
+                from_format=from_format,
+                to_format=to_format,
+                from_size=len(data),
+                to_size=len(cold_data),
+                storage_class=storage_class,
+            )
+    
+    if not swapped:
+        aws_image_service.delete_from_s3(to_key)
+        return None
+    return transition
+
+
+@shared_task(bind=True)
+def demote_cold_results(self):
+    """
+    Storage lifecycle: results older than STORAGE_TIERING_AGE_DAYS without a
+    download in the last STORAGE_TIERING_IDLE_DAYS are re-encoded (lossless
+    WebP by default) and moved to the cold prefix/storage class.
+    """
+    try:
+        from django.db.models import Q, Sum
+        from apps.images.services import aws_image_service
+        from apps.processing.models import ProcessingResult, StorageTierTransition
+        
+        now = timezone.now()
+        idle_cutoff = now - timedelta(days=settings.STORAGE_TIERING_IDLE_DAYS)
+        
+        # Public results keep their URLs (shared links, CDN caches); blobs
+        # shared with other rows stay hot rather than being copied per result
+        candidates = ProcessingResult.objects.filter(
+            storage_tier='hot',
+            is_public=False,
+            created_at__lt=now - timedelta(days=settings.STORAGE_TIERING_AGE_DAYS),
+        ).filter(
+            Q(last_downloaded_at__isnull=True) | Q(last_downloaded_at__lt=idle_cutoff)
+        ).exclude(s3_key='').exclude(blob__ref_count__gt=1)
+        
+        run = CleanupRun()
+        demoted, bytes_before, bytes_after = 0, 0, 0
+        for pks in run.batches(candidates):
+            demoted_keys = []
+            for result in ProcessingResult.objects.filter(pk__in=pks).only('pk', 's3_key', 'result_format', 'blob'):
+                if time.monotonic() >= run.deadline:
+                    break
+                try:
+                    transition = _demote_result(result)
+                except Exception as e:
+                    logger.error(f"Tiering failed for result {result.pk}: {str(e)}")
+                    continue
+                if transition:
+                    demoted += 1
+                    bytes_before += transition.from_size
+                    bytes_after += transition.to_size
+                    if not result.blob_id:
+                        demoted_keys.append(transition.from_key)
+            
+            # Hot copies are no longer referenced once the swap is committed
+            aws_image_service.delete_many(demoted_keys)
+            report_progress(self, demoted=demoted, bytes_saved=bytes_before - bytes_after, elapsed=run.elapsed)
+        
+        ledger = StorageTierTransition.objects.aggregate(total_from=Sum('from_size'), total_to=Sum('to_size'))
+        result = {
+            'demoted': demoted,
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_saved': bytes_before - bytes_after,
+            'total_bytes_saved': (ledger['total_from'] or 0) - (ledger['total_to'] or 0),
+            'complete': run.complete,
+            'elapsed': run.elapsed,
+        }
+        logger.info(f"Storage tiering: {result}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Storage tiering failed: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task(bind=True)
+def collect_unreferenced_blobs(self):
+    """
+    Content-addressed storage upkeep: re-derive ref counts (cascade deletes
+    bypass release_blob_refs), free blobs unreferenced for longer than the
+    orphan grace period and report storage savings and dedupe ratio.
+    """
+    try:
+        from apps.images.blobs import collect_blob, dedupe_report, recount_blob_refs
+        from apps.images.models import StoredBlob
+        
+        # Blobs touched within the grace period may have rows not committed yet
+        cutoff = timezone.now() - timedelta(hours=settings.STORAGE_ORPHAN_GRACE_HOURS)
+        
+        run = CleanupRun()
+        recounted, collected, bytes_freed = 0, 0, 0
+        for pks in run.batches(StoredBlob.objects.filter(updated_at__lt=cutoff)):
+            recounted += recount_blob_refs(pks)
+            
+            unreferenced = StoredBlob.objects.filter(pk__in=pks, ref_count=0).values_list('pk', flat=True)
+            for pk in unreferenced:
+                size = collect_blob(pk, cutoff)
+                if size is not None:
+                    collected += 1
+                    bytes_freed += size
+            
+            report_progress(self, collected=collected, bytes_freed=bytes_freed, elapsed=run.elapsed)
+        
+        result = {
+            'recounted': recounted,
+            'collected': collected,
+            'bytes_freed': bytes_freed,
+            'complete': run.complete,
+            'elapsed': run.elapsed,
+            'dedupe': dedupe_report(),
+        }
+        logger.info(f"Blob collection: {result}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Blob collection failed: {str(e)}")
+        return {'error': str(e)}
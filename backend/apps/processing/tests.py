@@ -0,0 +1,73 @@
+from config.testing import HeavyColumnTestCase, QueryCeilingTestCase, create_image
+from .models import ProcessingBatch, ProcessingJob, ProcessingResult, ProcessingResultLike
+
+
+def create_result(user, batch=None, **fields):
+    job = ProcessingJob.objects.create(
+        user=user, job_type='edit', prompt='test', status='completed',
+        original_image=create_image(user, is_public=True), batch=batch,
+    )
+    return ProcessingResult.objects.create(
+        job=job, result_format='png', result_size='1024x1024', result_quality='low',
+        result_background='opaque', s3_key=f"processed/{user.pk}/{job.pk}.png", **fields
+    )
+
+
+class ListQueryCountTests(QueryCeilingTestCase):
+    """Job, result and batch lists"""
+    
+    def setUp(self):
+        super().setUp()
+        self.batch = ProcessingBatch.objects.create(user=self.user)
+    
+    def seed(self, count):
+        for _ in range(count):
+            result = create_result(self.user, self.batch, is_public=True)
+            ProcessingResultLike.objects.create(user=self.user, result=result)
+            ProcessingResultLike.objects.create(user=self.other, result=result)
+    
+    def test_job_list(self):
+        self.assertQueryCeiling('/api/v1/processing/jobs/list/', 2)
+    
+    def test_result_list(self):
+        self.assertQueryCeiling('/api/v1/processing/results/', 2)
+    
+    def test_liked_results(self):
+        self.assertQueryCeiling('/api/v1/processing/results/liked/', 2)
+    
+    def test_public_results(self):
+        self.assertQueryCeiling('/api/v1/processing/results/public/', 2)
+    
+    def test_batch_detail(self):
+        self.assertQueryCeiling(f'/api/v1/processing/jobs/batches/{self.batch.pk}/', 4)
+
+
+class HeavyColumnTests(HeavyColumnTestCase):
+    """Job and result list and detail reads"""
+    
+    def setUp(self):
+        super().setUp()
+        self.batch = ProcessingBatch.objects.create(user=self.user)
+        self.result = create_result(self.user, self.batch, is_public=True, result_b64='payload')
+        self.job = self.result.job
+    
+    def test_job_list(self):
+        self.assertNoHeavyColumns('/api/v1/processing/jobs/list/')
+    
+    def test_job_detail(self):
+        self.assertNoHeavyColumns(f'/api/v1/processing/jobs/{self.job.pk}/')
+    
+    def test_job_results(self):
+        self.assertNoHeavyColumns(f'/api/v1/processing/jobs/{self.job.pk}/results/')
+    
+    def test_batch_detail(self):
+        self.assertNoHeavyColumns(f'/api/v1/processing/jobs/batches/{self.batch.pk}/')
+    
+    def test_result_list(self):
+        self.assertNoHeavyColumns('/api/v1/processing/results/')
+    
+    def test_public_results(self):
+        self.assertNoHeavyColumns('/api/v1/processing/results/public/')
+    
+    def test_result_detail(self):
+        self.assertNoHeavyColumns(f'/api/v1/processing/results/{self.result.pk}/')
@@ -7,6 +7,9 @@ urlpatterns = [
     # Processing jobs
     path('jobs/', views.ProcessingJobCreateView.as_view(), name='create-job'),
     path('jobs/list/', views.ProcessingJobListView.as_view(), name='job-list'),
+    path('jobs/style-fanout/', views.StyleFanoutCreateView.as_view(), name='style-fanout'),
+    path('jobs/pipeline/', views.ProcessingPipelineCreateView.as_view(), name='create-pipeline'),
+    path('jobs/batches/<uuid:batch_id>/', views.get_processing_batch, name='batch-detail'),
     path('jobs/<uuid:pk>/', views.ProcessingJobDetailView.as_view(), name='job-detail'),
     path('jobs/<uuid:job_id>/cancel/', views.cancel_processing_job, name='cancel-job'),
     path('jobs/<uuid:job_id>/results/', views.get_job_results, name='job-results'),
@@ -15,6 +18,8 @@ urlpatterns = [
     path('results/', views.ProcessingResultListView.as_view(), name='results'),
     path('results/public/', views.PublicProcessingResultListView.as_view(), name='public-results'),
     path('results/liked/', views.LikedProcessingResultListView.as_view(), name='liked-results'),
+    path('results/export/', views.export_results, name='export-results'),
+    path('results/export/selection/', views.export_selected_results, name='export-selected-results'),
     path('results/<uuid:result_id>/', views.ProcessingResultDetailView.as_view(), name='result-detail'),
     path('results/<uuid:result_id>/favorite/', views.toggle_result_favorite, name='toggle-favorite'),
     path('results/<uuid:result_id>/like/', views.toggle_result_like, name='toggle-like'),
@@ -23,6 +28,10 @@ urlpatterns = [
     path('results/<uuid:result_id>/download/', views.download_result, name='download-result'),
     path('results/<uuid:result_id>/delete/', views.soft_delete_processing_result, name='soft-delete-result'),
     
+    # Background ZIP exports
+    path('exports/<uuid:export_id>/', views.get_result_export, name='export-detail'),
+    path('exports/<uuid:export_id>/download/', views.download_result_export, name='export-download'),
+    
     # User quota and stats
     path('quota/', views.user_quota, name='user-quota'),
     path('stats/', views.processing_stats, name='processing-stats'),
@@ -1,29 +1,56 @@
 import json
 import base64
 import io
+from collections import Counter
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q, Avg, Count
+from django.db import transaction
+from django.db.models import F, Q, Count, Prefetch
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.throttling import ScopedRateThrottle
+from config.response_cache import anonymous_first_page, cache_response
+from config.throttling import ScopedRateThrottle
 from django.http import StreamingHttpResponse
-from .models import ProcessingJob, ProcessingResult, StreamingEvent, UserProcessingQuota, ProcessingTemplate, ProcessingResultLike
+from .models import ProcessingBatch, ProcessingJob, ProcessingResult, ResultExport, StreamingEvent, UserProcessingQuota, ProcessingTemplate, ProcessingResultLike
 from .serializers import (
     ProcessingJobCreateSerializer, ProcessingJobSerializer, ProcessingResultSerializer,
-    UserProcessingQuotaSerializer, ProcessingTemplateSerializer, ProcessingStatsSerializer
+    UserProcessingQuotaSerializer, ProcessingTemplateSerializer, ProcessingStatsSerializer,
+    StyleFanoutCreateSerializer, ProcessingBatchSerializer, ProcessingPipelineCreateSerializer,
+    ResultExportSelectionSerializer, ResultExportSerializer
 )
 from .services import openai_service
 from apps.images.models import Image
 from apps.images.services import aws_image_service
+from apps.images.blobs import store_blob
+from .publishing import PublishError, set_result_visibility, unpublish_result
+from .quota import QuotaExceeded, QuotaUnavailable, reserve_quota, with_live_usage
+from .stats import ACTIVE_STATUSES, get_user_stats, record_new_jobs
 from apps.styles.models import Style
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _reserve_quota(user, usage):
+    """Reserve quota for a new job: (reservation, None), or (None, error response)"""
+    try:
+        return reserve_quota(user, usage), None
+    except QuotaExceeded as e:
+        return None, Response({
+            'error': 'Daily quota exceeded',
+            'details': str(e)
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    except QuotaUnavailable:
+        return None, Response({
+            'error': 'Quota service unavailable',
+            'details': 'Please try again shortly'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 class ProcessingJobCreateView(generics.CreateAPIView):
     """Create and start processing job with OpenAI gpt-image-1"""
     
@@ -33,6 +60,7 @@ class ProcessingJobCreateView(generics.CreateAPIView):
     throttle_scope = 'processing_job_create'
     
     def create(self, request, *args, **kwargs):
+        reservation = None
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
@@ -40,13 +68,10 @@ class ProcessingJobCreateView(generics.CreateAPIView):
             user = request.user
             job_data = serializer.validated_data
             
-            # Check user quota
-            quota, created = UserProcessingQuota.objects.get_or_create(user=user)
-            if not quota.can_process(job_data['job_type']):
-                return Response({
-                    'error': 'Daily quota exceeded',
-                    'details': f"You have reached your daily limit for {job_data['job_type']}"
-                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            # Reserve today's quota (refunded if the job fails or is cancelled)
+            reservation, denied = _reserve_quota(user, {job_data['job_type']: 1})
+            if denied:
+                return denied
             
             # Create processing job
             job = ProcessingJob.objects.create(
@@ -88,6 +113,8 @@ class ProcessingJobCreateView(generics.CreateAPIView):
             }, status=status.HTTP_201_CREATED)
             
         except Exception as e:
+            if reservation:
+                reservation.release()
             return Response({
                 'error': 'Failed to create processing job',
                 'details': str(e)
@@ -116,13 +143,9 @@ class ProcessingJobCreateView(generics.CreateAPIView):
                 job.processing_time = (job.completed_at - job.started_at).total_seconds()
                 job.openai_response = result
                 
-                # Save results to database and S3
+                # Save results to database and S3 (quota was reserved when the job was created)
                 self._save_processing_results(job, result)
                 
-                # Update user quota
-                quota = UserProcessingQuota.objects.get(user=job.user)
-                quota.increment_usage(job.job_type)
-                
             else:
                 job.status = 'failed'
                 job.error_message = result.get('error', 'Unknown error')
@@ -365,9 +388,8 @@ class ProcessingJobCreateView(generics.CreateAPIView):
                 filename = f"processed_{job.id}_{i}.{result.get('output_format', 'png')}"
                 image_file = openai_service.base64_to_image_file(b64_data, filename)
                 
-                # Upload to S3
-                s3_key = f"processed/{job.user.id}/{job.id}_{i}.{result.get('output_format', 'png')}"
-                s3_url = aws_image_service.upload_to_s3(image_file, s3_key)
+                # Upload to S3 (identical bytes are stored once)
+                blob, s3_url = store_blob(image_file)
                 
                 # Save result to database
                 ProcessingResult.objects.create(
@@ -378,8 +400,9 @@ class ProcessingJobCreateView(generics.CreateAPIView):
                     result_quality=result.get('quality', 'auto'),
                     result_background=result.get('background', 'auto'),
                     is_public=job.is_public,
-                    s3_key=s3_key,
-                    s3_url=s3_url,
+                    s3_key=blob.s3_key if blob else '',
+                    s3_url=s3_url or '',
+                    blob=blob,
                     openai_created_at=timezone.fromtimestamp(result.get('created', timezone.now().timestamp())),
                     token_usage=result.get('usage', {})
                 )
@@ -388,6 +411,188 @@ class ProcessingJobCreateView(generics.CreateAPIView):
             return {"error": str(e)}
 
 
+class StyleFanoutCreateView(generics.CreateAPIView):
+    """Apply one uploaded image to many styles as a single batch of jobs"""
+    
+    serializer_class = StyleFanoutCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'processing_style_fanout'
+    
+    def create(self, request, *args, **kwargs):
+        reservation = None
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            
+            user = request.user
+            data = serializer.validated_data
+            
+            # One style transfer per style, reserved up front
+            reservation, denied = _reserve_quota(user, {'style_transfer': len(data['style_ids'])})
+            if denied:
+                return denied
+            
+            openai_parameters = {
+                'quality': data.get('quality', 'auto'),
+                'background': data.get('background', 'auto'),
+                'output_format': data.get('output_format', 'png'),
+                'size': data.get('size', 'auto'),
+                'output_compression': data.get('output_compression', 85),
+                'n': 1,
+                'stream': False,
+                'moderation': data.get('moderation', 'auto'),
+                'input_fidelity': data.get('input_fidelity', 'low'),
+                'partial_images': 0
+            }
+            
+            with transaction.atomic():
+                batch = ProcessingBatch.objects.create(
+                    user=user,
+                    original_image_id=data['original_image_id'],
+                    prompt=data.get('prompt', '')
+                )
+                jobs = ProcessingJob.objects.bulk_create([
+                    ProcessingJob(
+                        user=user,
+                        batch=batch,
+                        job_type='style_transfer',
+                        prompt=data.get('prompt', ''),
+                        original_image_id=data['original_image_id'],
+                        style_id=style_id,
+                        is_public=data.get('is_public', False),
+                        openai_parameters=openai_parameters
+                    )
+                    for style_id in data['style_ids']
+                ])
+                record_new_jobs(jobs)
+            
+            # One Celery task does the shared preprocessing and dispatches every style
+            from .tasks import process_style_fanout_async
+            
+            task = process_style_fanout_async.delay(str(batch.id))
+            
+            batch.celery_task_id = task.id
+            batch.save(update_fields=['celery_task_id'])
+            
+            return Response({
+                'batch_id': batch.id,
+                'jobs': [{'job_id': job.id, 'style_id': job.style_id} for job in jobs],
+                'status': 'pending',
+                'message': f'Style fan-out started for {len(jobs)} styles'
+            }, status=status.HTTP_201_CREATED)
+            
+        except Exception as e:
+            if reservation:
+                reservation.release()
+            return Response({
+                'error': 'Failed to create style fan-out',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProcessingPipelineCreateView(generics.CreateAPIView):
+    """Create a multi-step pipeline job executed as a Celery chain"""
+    
+    serializer_class = ProcessingPipelineCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'processing_job_create'
+    
+    def create(self, request, *args, **kwargs):
+        reservation = None
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            
+            user = request.user
+            data = serializer.validated_data
+            steps = [
+                {
+                    'operation': step['operation'],
+                    'prompt': step.get('prompt', ''),
+                    'style_id': str(step['style_id']) if step.get('style_id') else None,
+                    'keep': step.get('keep', False),
+                }
+                for step in data['steps']
+            ]
+            
+            # Reserve one unit per step operation, all or nothing
+            reservation, denied = _reserve_quota(user, Counter(step['operation'] for step in steps))
+            if denied:
+                return denied
+            
+            # Persisted outputs: the final step plus any step marked keep
+            results_expected = 1 + sum(1 for step in steps[:-1] if step['keep'])
+            
+            job = ProcessingJob.objects.create(
+                user=user,
+                job_type='pipeline',
+                prompt=' → '.join(step['prompt'] for step in steps if step['prompt']),
+                original_image_id=data.get('original_image_id'),
+                is_public=data.get('is_public', False),
+                pipeline_steps=steps,
+                results_expected=results_expected,
+                openai_parameters={
+                    'quality': data.get('quality', 'auto'),
+                    'background': data.get('background', 'auto'),
+                    'output_format': data.get('output_format', 'png'),
+                    'size': data.get('size', 'auto'),
+                    'output_compression': data.get('output_compression', 85),
+                    'n': 1,
+                    'stream': False,
+                    'moderation': data.get('moderation', 'auto'),
+                    'input_fidelity': data.get('input_fidelity', 'low'),
+                    'partial_images': 0
+                }
+            )
+            
+            # One task per step; each link hands its output to the next through the shared scratch dir
+            from celery import chain
+            from .tasks import run_pipeline_step
+            
+            task = chain(*[run_pipeline_step.si(str(job.id), index) for index in range(len(steps))]).apply_async()
+            
+            job.celery_task_id = task.id
+            job.save(update_fields=['celery_task_id'])
+            
+            return Response({
+                'job_id': job.id,
+                'status': job.status,
+                'steps': len(steps),
+                'message': 'Pipeline job started'
+            }, status=status.HTTP_201_CREATED)
+            
+        except Exception as e:
+            if reservation:
+                reservation.release()
+            return Response({
+                'error': 'Failed to create pipeline job',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def get_processing_batch(request, batch_id):
+    """Get a batch with its jobs and their results grouped together"""
+    
+    batch = get_object_or_404(ProcessingBatch, id=batch_id, user=request.user)
+    results = ProcessingResultSerializer.setup_eager_loading(
+        ProcessingResult.active_objects.order_by('created_at'), request.user
+    )
+    jobs = ProcessingJobSerializer.setup_eager_loading(
+        ProcessingJob.active_objects.filter(batch=batch)
+    ).prefetch_related(Prefetch('results', queryset=results)).order_by('created_at')
+    batch = ProcessingBatch.objects.prefetch_related(Prefetch('jobs', queryset=jobs)).get(pk=batch.pk)
+    
+    serializer = ProcessingBatchSerializer(batch, context={'request': request})
+    return Response(serializer.data)
+
+get_processing_batch.cls.throttle_scope = 'processing_job_results'
+
+
 class ProcessingJobListView(generics.ListAPIView):
     """List user's processing jobs"""
     
@@ -410,7 +615,7 @@ class ProcessingJobListView(generics.ListAPIView):
         if job_type:
             queryset = queryset.filter(job_type=job_type)
         
-        return queryset.order_by('-created_at')
+        return ProcessingJobSerializer.setup_eager_loading(queryset).order_by('-created_at')
 
 
 class ProcessingJobDetailView(generics.RetrieveAPIView):
@@ -422,7 +627,7 @@ class ProcessingJobDetailView(generics.RetrieveAPIView):
     throttle_scope = 'processing_job_results'
     
     def get_queryset(self):
-        return ProcessingJob.objects.filter(user=self.request.user)
+        return ProcessingJobSerializer.setup_eager_loading(ProcessingJob.objects.filter(user=self.request.user))
 
 
 class ProcessingResultListView(generics.ListAPIView):
@@ -475,7 +680,7 @@ class ProcessingResultListView(generics.ListAPIView):
         if favorites_only and favorites_only.lower() == 'true':
             queryset = queryset.filter(is_favorite=True)
         
-        return queryset.order_by('-created_at')
+        return ProcessingResultSerializer.setup_eager_loading(queryset, user).order_by('-created_at')
     
     def list(self, request, *args, **kwargs):
         """Override list to apply build_media_url to s3_url fields"""
@@ -528,9 +733,11 @@ class LikedProcessingResultListView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = ProcessingResult.active_objects.filter(likes__user=user).annotate(
-            like_count=Count('likes')
-        )
+        # Subquery rather than a join on likes, so like_count counts every like, not just the user's
+        queryset = ProcessingResult.active_objects.filter(
+            pk__in=ProcessingResultLike.objects.filter(user=user).values('result')
+        ).annotate(like_count=Count('likes'))
+        queryset = ProcessingResultSerializer.setup_eager_loading(queryset, user)
         # Support ordering by like_count or created_at
         ordering = self.request.query_params.get('ordering')
         allowed = {'created_at', '-created_at', 'like_count', '-like_count'}
@@ -569,7 +776,7 @@ class ProcessingResultDetailView(generics.RetrieveAPIView):
             qs = qs.filter(Q(is_public=True) | Q(job__user=user))
         else:
             qs = qs.filter(is_public=True)
-        return qs.annotate(like_count=Count('likes')).order_by('-created_at')
+        return ProcessingResultSerializer.setup_eager_loading(qs, user).order_by('-created_at')
 
     def build_media_url(self, file_path):
         """Build absolute URL for media files in development, relative in production"""
@@ -666,6 +873,7 @@ class PublicProcessingResultListView(generics.ListAPIView):
                 queryset = queryset.annotate(like_count=Count('likes'))
         else:
             queryset = queryset.annotate(like_count=Count('likes'))
+        queryset = ProcessingResultSerializer.setup_eager_loading(queryset, self.request.user)
         
         # Support ordering by like_count or created_at
         ordering = self.request.query_params.get('ordering')
@@ -675,6 +883,7 @@ class PublicProcessingResultListView(generics.ListAPIView):
         # Default: most recent first
         return queryset.order_by('-created_at')
     
+    @cache_response('public_results', when=anonymous_first_page)
     def list(self, request, *args, **kwargs):
         """Override list to apply build_media_url to s3_url fields"""
         response = super().list(request, *args, **kwargs)
@@ -695,9 +904,9 @@ def cancel_processing_job(request, job_id):
     """Cancel a processing job"""
     
     try:
-        job = get_object_or_404(ProcessingJob, id=job_id, user=request.user)
+        job = get_object_or_404(ProcessingJob.objects.light(), id=job_id, user=request.user)
         
-        if job.status in ['completed', 'failed', 'cancelled']:
+        if job.status in ['completed', 'partially_failed', 'failed', 'cancelled']:
             return Response({
                 'error': f'Cannot cancel job with status: {job.status}'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -714,7 +923,7 @@ def cancel_processing_job(request, job_id):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-cancel_processing_job.throttle_scope = 'processing_job_cancel'
+cancel_processing_job.cls.throttle_scope = 'processing_job_cancel'
 
 
 @api_view(['POST'])
@@ -725,7 +934,7 @@ def toggle_result_favorite(request, result_id):
     
     try:
         result = get_object_or_404(
-            ProcessingResult, 
+            ProcessingResult.objects.light(), 
             id=result_id, 
             job__user=request.user
         )
@@ -743,7 +952,7 @@ def toggle_result_favorite(request, result_id):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-toggle_result_favorite.throttle_scope = 'processing_favorite_toggle'
+toggle_result_favorite.cls.throttle_scope = 'processing_favorite_toggle'
 
 
 @api_view(['POST'])
@@ -752,7 +961,7 @@ toggle_result_favorite.throttle_scope = 'processing_favorite_toggle'
 def toggle_result_like(request, result_id):
     """Toggle like for a public processing result by the current user."""
     try:
-        result = get_object_or_404(ProcessingResult, id=result_id)
+        result = get_object_or_404(ProcessingResult.objects.light(), id=result_id)
 
         # Only allow liking if result is public, or the user owns the job (optional)
         if not result.is_public and result.job.user != request.user:
@@ -771,7 +980,7 @@ def toggle_result_like(request, result_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-toggle_result_like.throttle_scope = 'processing_like'
+toggle_result_like.cls.throttle_scope = 'processing_like'
 
 
 @api_view(['POST', 'PATCH'])
@@ -787,7 +996,7 @@ def toggle_result_visibility(request, result_id):
     """
     try:
         result = get_object_or_404(
-            ProcessingResult,
+            ProcessingResult.objects.light(),
             id=result_id,
             job__user=request.user,
         )
@@ -798,8 +1007,14 @@ def toggle_result_visibility(request, result_id):
         else:
             desired = not bool(result.is_public)
 
-        result.is_public = desired
-        result.save()
+        # Publishes to (or withdraws from) the immutable public/ copy in one transaction
+        try:
+            result = set_result_visibility(result, desired)
+        except PublishError as e:
+            return Response({
+                'error': 'Failed to change visibility',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             'is_public': result.is_public,
@@ -808,7 +1023,7 @@ def toggle_result_visibility(request, result_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-toggle_result_visibility.throttle_scope = 'processing_visibility'
+toggle_result_visibility.cls.throttle_scope = 'processing_visibility'
 
 
 @api_view(['POST'])
@@ -826,7 +1041,7 @@ def rate_result(request, result_id):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         result = get_object_or_404(
-            ProcessingResult, 
+            ProcessingResult.objects.light(), 
             id=result_id, 
             job__user=request.user
         )
@@ -843,108 +1058,161 @@ def rate_result(request, result_id):
         return Response({
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
-rate_result.throttle_scope = 'processing_rate'
+rate_result.cls.throttle_scope = 'processing_rate'
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 @throttle_classes([ScopedRateThrottle])
 def download_result(request, result_id):
     """Download processing result file directly"""
-    from django.http import HttpResponse, Http404
-    from django.conf import settings
-    import os
-    import mimetypes
+    from django.http import Http404
+    from django.shortcuts import redirect
+    from apps.images.serving import serve_file
     
-    try:
-        # Check authorization first
-        result = get_object_or_404(
-            ProcessingResult, 
-            id=result_id, 
-            job__user=request.user
+    # Check authorization first
+    result = get_object_or_404(
+        ProcessingResult.objects.light(), 
+        id=result_id, 
+        job__user=request.user
+    )
+    
+    # Generate filename for download
+    filename = f"fotomorfia-image-{result_id}.jpg"
+    if result.result_format:
+        filename = f"fotomorfia-image-{result_id}.{result.result_format}"
+    
+    if aws_image_service.use_s3:
+        # For S3 storage - redirect to presigned URL
+        download_url = aws_image_service.generate_presigned_url(result.s3_key, expiration=3600)
+        if not download_url:
+            raise Http404("Could not generate download URL")
+        response = redirect(download_url)
+    else:
+        # For development/local storage - serve file directly (sendfile/proxy handoff, Range, 304)
+        if not result.s3_key:
+            raise Http404("File not found")
+        response = serve_file(request, result.s3_key, filename=filename, as_attachment=True)
+    
+    # Count a download once: not for 304s or follow-up Range requests of the same transfer
+    first_byte = response.status_code in (200, 302) or (
+        response.status_code == 206 and response['Content-Range'].startswith('bytes 0-')
+    )
+    if first_byte:
+        # Increment download count and record the access for storage tiering
+        ProcessingResult.objects.filter(pk=result.pk).update(
+            download_count=F('download_count') + 1, last_downloaded_at=timezone.now()
         )
-        
-        # For development/local storage - serve file directly
-        if not getattr(settings, 'USE_S3_STORAGE', False):
-            if not result.s3_url:
-                raise Http404("File not found")
-            
-            # Extract file path from URL
-            from urllib.parse import urlparse
-            
-            # Parse the URL to get the path component
-            parsed_url = urlparse(result.s3_url)
-            url_path = parsed_url.path  # e.g., '/media/processed/2/2025/08/15/filename.png'
-            
-            # Remove '/media/' prefix to get relative path within MEDIA_ROOT
-            if url_path.startswith('/media/'):
-                file_path = url_path[7:]  # Remove '/media/' (7 characters)
-            elif url_path.startswith('media/'):
-                file_path = url_path[6:]  # Remove 'media/' (6 characters)
-            else:
-                # If path doesn't start with media, assume it's already relative
-                file_path = url_path.lstrip('/')
-            
-            full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-            
-            if not os.path.exists(full_path):
-                raise Http404("File not found in storage")
-            
-            # Determine content type
-            content_type, _ = mimetypes.guess_type(full_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
-            
-            # Generate filename for download
-            filename = f"fotomorfia-image-{result_id}.jpg"
-            if result.result_format:
-                filename = f"fotomorfia-image-{result_id}.{result.result_format}"
-            
-            # Read and serve file
-            try:
-                with open(full_path, 'rb') as f:
-                    file_data = f.read()
-                
-                response = HttpResponse(file_data, content_type=content_type)
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                response['Content-Length'] = len(file_data)
-                
-                # Increment download count
-                result.download_count += 1
-                result.save()
-                
-                return response
-                
-            except IOError:
-                raise Http404("Could not read file")
-        
-        else:
-            # For S3 storage - redirect to presigned URL
-            try:
-                from apps.core.services.aws_image_service import aws_image_service
-                download_url = aws_image_service.generate_presigned_url(
-                    result.s3_url, 
-                    expiration=3600
-                )
-                
-                if download_url:
-                    # Increment download count
-                    result.download_count += 1
-                    result.save()
-                    
-                    # Redirect to presigned URL
-                    from django.shortcuts import redirect
-                    return redirect(download_url)
-                else:
-                    raise Http404("Could not generate download URL")
-                    
-            except Exception as e:
-                raise Http404(f"S3 download error: {str(e)}")
-        
-    except ProcessingResult.DoesNotExist:
-        raise Http404("Result not found or access denied")
-    except Exception as e:
-        raise Http404(f"Download error: {str(e)}")
-download_result.throttle_scope = 'processing_download'
+    
+    return response
+download_result.cls.throttle_scope = 'processing_download'
+
+
+def _start_export(request, result_ids, image_ids, include_originals, background):
+    """Stream the ZIP right away, or hand large exports to a background job (202)"""
+    from .exports import export_entries, export_filename, export_querysets, stream_zip
+    from .tasks import build_result_export
+    
+    results, images = export_querysets(request.user, result_ids, image_ids, include_originals)
+    file_count = results.count() + images.count()
+    if not file_count:
+        return Response({'error': 'Nothing to export'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if background or file_count > settings.EXPORT_STREAM_MAX_FILES:
+        export = ResultExport.objects.create(
+            user=request.user,
+            result_ids=[str(pk) for pk in result_ids] if result_ids is not None else None,
+            image_ids=[str(pk) for pk in image_ids] if image_ids is not None else None,
+            include_originals=include_originals,
+        )
+        transaction.on_commit(lambda: build_result_export.delay(str(export.id)))
+        data = ResultExportSerializer(export, context={'request': request}).data
+        data['status_url'] = request.build_absolute_uri(
+            reverse('processing:export-detail', kwargs={'export_id': export.id})
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+    
+    # Built on the fly: no Content-Length, constant memory whatever the size
+    response = StreamingHttpResponse(
+        stream_zip(export_entries(results, images)), content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename()}"'
+    response['Cache-Control'] = 'private, no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def export_results(request):
+    """
+    ZIP of all the user's results and originals.
+    ?originals=false leaves the originals out, ?background=true always builds it as a job.
+    """
+    include_originals = request.query_params.get('originals', 'true').lower() != 'false'
+    background = request.query_params.get('background', 'false').lower() == 'true'
+    return _start_export(request, None, None, include_originals, background)
+
+export_results.cls.throttle_scope = 'processing_export'
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def export_selected_results(request):
+    """ZIP of selected results and/or originals"""
+    serializer = ResultExportSelectionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Invalid export selection',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    return _start_export(
+        request, data.get('result_ids') or [], data.get('image_ids'),
+        data['include_originals'], data['background']
+    )
+
+export_selected_results.cls.throttle_scope = 'processing_export'
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def get_result_export(request, export_id):
+    """Status of a background export, with its download link once completed"""
+    export = get_object_or_404(ResultExport, id=export_id, user=request.user)
+    return Response(ResultExportSerializer(export, context={'request': request}).data)
+
+get_result_export.cls.throttle_scope = 'processing_export_status'
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def download_result_export(request, export_id):
+    """Download a completed export (S3: redirect to a presigned URL)"""
+    from django.http import Http404
+    from django.shortcuts import redirect
+    from apps.images.serving import serve_file
+    
+    export = get_object_or_404(ResultExport, id=export_id, user=request.user, status='completed')
+    if not export.s3_key:
+        raise Http404("Export not found")
+    
+    if aws_image_service.use_s3:
+        download_url = aws_image_service.generate_presigned_url(export.s3_key, expiration=3600)
+        if not download_url:
+            raise Http404("Could not generate download URL")
+        return redirect(download_url)
+    
+    return serve_file(
+        request, export.s3_key, filename=f"fotomorfia-export-{export.id}.zip",
+        as_attachment=True, cache_control='private, no-store', content_type='application/zip'
+    )
+
+download_result_export.cls.throttle_scope = 'processing_download'
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -953,11 +1221,11 @@ def user_quota(request):
     """Get user's processing quota and limits"""
     
     quota, created = UserProcessingQuota.objects.get_or_create(user=request.user)
-    serializer = UserProcessingQuotaSerializer(quota)
+    serializer = UserProcessingQuotaSerializer(with_live_usage(quota))
     
     return Response(serializer.data)
 
-user_quota.throttle_scope = 'processing_quota'
+user_quota.cls.throttle_scope = 'processing_quota'
 
 
 @api_view(['GET'])
@@ -968,45 +1236,43 @@ def processing_stats(request):
     
     user = request.user
     
-    # Get basic stats
-    jobs = ProcessingJob.objects.filter(user=user)
-    results = ProcessingResult.objects.filter(job__user=user)
+    # Counters come from the user's rollup row
+    rollup = get_user_stats(user)
     
     stats = {
-        'total_jobs': jobs.count(),
-        'completed_jobs': jobs.filter(status='completed').count(),
-        'failed_jobs': jobs.filter(status='failed').count(),
-        'pending_jobs': jobs.filter(status__in=['pending', 'moderating', 'processing']).count(),
-        
-        'total_generations': jobs.filter(job_type='generation').count(),
-        'total_edits': jobs.filter(job_type='edit').count(),
-        'total_style_transfers': jobs.filter(job_type='style_transfer').count(),
+        'total_jobs': rollup.jobs_total,
+        'completed_jobs': rollup.jobs_completed,
+        'failed_jobs': rollup.jobs_failed,
+        'pending_jobs': sum(getattr(rollup, f'jobs_{status}') for status in ACTIVE_STATUSES),
         
-        'average_processing_time': jobs.filter(
-            processing_time__isnull=False
-        ).aggregate(avg_time=Avg('processing_time'))['avg_time'] or 0,
+        'total_generations': rollup.jobs_generation,
+        'total_edits': rollup.jobs_edit,
+        'total_style_transfers': rollup.jobs_style_transfer,
         
-        'total_processing_time': sum(
-            job.processing_time for job in jobs if job.processing_time
-        ),
+        'average_processing_time': rollup.average_processing_time,
+        'total_processing_time': rollup.total_processing_time,
     }
     
     # Get quota info
     quota, created = UserProcessingQuota.objects.get_or_create(user=user)
-    stats['quota_info'] = UserProcessingQuotaSerializer(quota).data
+    stats['quota_info'] = UserProcessingQuotaSerializer(with_live_usage(quota)).data
     
     # Get recent activity
     stats['recent_jobs'] = ProcessingJobSerializer(
-        jobs.order_by('-created_at')[:5], many=True
+        ProcessingJobSerializer.setup_eager_loading(
+            ProcessingJob.objects.filter(user=user)
+        ).order_by('-created_at')[:5], many=True
     ).data
     
     stats['recent_results'] = ProcessingResultSerializer(
-        results.order_by('-created_at')[:5], many=True
+        ProcessingResultSerializer.setup_eager_loading(
+            ProcessingResult.objects.filter(job__user=user)
+        ).order_by('-created_at')[:5], many=True
     ).data
     
     return Response(stats)
 
-processing_stats.throttle_scope = 'processing_stats'
+processing_stats.cls.throttle_scope = 'processing_stats'
 
 
 class ProcessingTemplateListView(generics.ListCreateAPIView):
@@ -1018,7 +1284,7 @@ class ProcessingTemplateListView(generics.ListCreateAPIView):
     throttle_scope = 'processing_templates'
     
     def get_queryset(self):
-        queryset = ProcessingTemplate.objects.filter(is_public=True)
+        queryset = ProcessingTemplate.objects.filter(is_public=True).select_related('created_by')
         
         # Filter by category
         category = self.request.query_params.get('category')
@@ -1075,13 +1341,13 @@ def get_job_results(request, job_id):
     try:
         # Get the job and ensure it belongs to the user
         job = get_object_or_404(
-            ProcessingJob, 
+            ProcessingJob.objects.light('original_image').select_related('original_image', 'style__category'), 
             id=job_id, 
             user=request.user
         )
         
         # Get all results for this job
-        results = job.results.all().order_by('-created_at')
+        results = job.results.light().order_by('-created_at')
         
         # Return complete job and results data
         response_data = {
@@ -1094,6 +1360,10 @@ def get_job_results(request, job_id):
                 'started_at': job.started_at,
                 'completed_at': job.completed_at,
                 'processing_time': job.processing_time,
+                'results_expected': job.results_expected,
+                'results_completed': job.results_completed,
+                'results_failed': job.results_failed,
+                'progress': f"{job.results_completed}/{job.results_expected}",
                 'openai_parameters': job.openai_parameters,
                 'error_message': job.error_message,
                 'original_image': {
@@ -1140,7 +1410,7 @@ def get_job_results(request, job_id):
             'details': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-get_job_results.throttle_scope = 'processing_job_results'
+get_job_results.cls.throttle_scope = 'processing_job_results'
 
 
 @api_view(['DELETE'])
@@ -1149,12 +1419,14 @@ get_job_results.throttle_scope = 'processing_job_results'
 def soft_delete_processing_result(request, result_id):
     """Soft delete a processing result - for user's gallery management"""
     try:
-        result = ProcessingResult.active_objects.get(
+        result = ProcessingResult.active_objects.light().get(
             id=result_id,
             job__user=request.user
         )
         
-        # Soft delete the result
+        # Withdraw the public copy first, then soft delete the result
+        if result.public_key:
+            result = unpublish_result(result)
         result.is_deleted = True
         result.deleted_at = timezone.now()
         result.save(update_fields=['is_deleted', 'deleted_at'])
@@ -1185,4 +1457,4 @@ def soft_delete_processing_result(request, result_id):
             'details': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-soft_delete_processing_result.throttle_scope = 'processing_delete'
+soft_delete_processing_result.cls.throttle_scope = 'processing_delete'
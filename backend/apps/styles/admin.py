@@ -52,12 +52,12 @@ class StyleAdmin(admin.ModelAdmin):
         ('Status & Metadata', {
             'fields': (
                 'is_active', 'is_premium', 'sort_order', 
-                'popularity_score', 'created_by'
+                'popularity_score', 'rating_count', 'rating_sum', 'created_by'
             )
         })
     )
     
-    readonly_fields = ['popularity_score']
+    readonly_fields = ['popularity_score', 'rating_count', 'rating_sum']
 
 
 @admin.register(StyleExample)
@@ -5,3 +5,6 @@ class StylesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.styles'
     verbose_name = 'Styles Management'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,77 @@
+"""
+Versioned cache for the anonymous style catalog endpoints.
+
+Every write to a style, category, example or rating replaces the catalog
+version (see signals.py). Anonymous responses are cached under
+(version, URL with sorted query params) and carry the version as their
+ETag, so a client revalidating an unchanged catalog gets a 304 for a single
+cache read. Entries of old versions are never read again and age out with
+STYLE_CATALOG_CACHE_SECONDS. Authenticated requests include per-user fields
+(favorites, own rating) and bypass the cache.
+"""
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'styles:catalog-version'
+CACHE_PREFIX = 'styles:catalog:'
+
+
+def catalog_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A random first version: an evicted key must not bring back an old ETag
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _cache_key(request, version: str) -> str:
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f"{request.get_host()}{request.path}?{query}"
+    return f"{CACHE_PREFIX}{version}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def _if_none_match(request):
+    header = request.headers.get('If-None-Match', '')
+    # Weak comparison: compression middleware may have weakened the tag
+    return {tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()}
+
+
+class CatalogCacheMixin:
+    """GET served from the versioned catalog cache (with ETag/304) for anonymous requests"""
+    
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        
+        version = catalog_version()
+        etag = f'"{version}"'
+        matches = _if_none_match(request)
+        if etag in matches or '*' in matches:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = _cache_key(request, version)
+            data = cache.get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.STYLE_CATALOG_CACHE_SECONDS)
+            else:
+                response = Response(data)
+        
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
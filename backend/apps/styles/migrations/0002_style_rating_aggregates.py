@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Style = apps.get_model('styles', 'Style')
+    StyleRating = apps.get_model('styles', 'StyleRating')
+    per_style = StyleRating.objects.filter(style=OuterRef('pk')).order_by().values('style')
+    Style.objects.update(
+        rating_sum=Coalesce(Subquery(per_style.annotate(total=Sum('rating')).values('total')), Value(0)),
+        rating_count=Coalesce(Subquery(per_style.annotate(total=Count('pk')).values('total')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('styles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='style',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='style',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -86,7 +86,11 @@ class Style(models.Model):
     is_active = models.BooleanField(default=True)
     is_premium = models.BooleanField(default=False)
     sort_order = models.PositiveIntegerField(default=0)
-    popularity_score = models.PositiveIntegerField(default=0)
+    popularity_score = models.PositiveIntegerField(default=0)  # Time-decayed, see popularity.py
+    
+    # Rating aggregates, moved with F() on every rating change
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -102,6 +106,10 @@ class Style(models.Model):
     def __str__(self):
         return f"{self.category.name} - {self.name}"
     
+    @property
+    def average_rating(self) -> float:
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+    
     def get_full_prompt(self, user_prompt=""):
         """Generate full prompt for OpenAI using template"""
         return self.prompt_template.format(
@@ -0,0 +1,114 @@
+"""
+Style rating aggregates and popularity.
+
+Style.rating_sum / rating_count follow every StyleRating change with F()
+updates (see signals.py), so average ratings are read from the style row.
+popularity_score is recomputed periodically (update_style_popularity) from
+job usage, favorites and ratings over rolling windows: recent activity
+counts fully and older activity decays, so the ordering follows what is
+used now rather than what was used once. The same pass repairs rating
+aggregates that drifted (admin saves of stale rows, bulk deletes).
+"""
+from datetime import timedelta
+from typing import Dict
+
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Style, StyleRating, UserStylePreference
+
+# (days, weight): activity within the last `days` and not a shorter window
+WINDOWS = ((7, 1.0), (30, 0.5), (90, 0.25))
+
+# Points per job, per favorite and per five rating stars
+WEIGHTS = {'jobs': 1.0, 'favorites': 5.0, 'ratings': 3.0}
+
+SCALE = 10  # popularity_score is an integer: keep one decimal
+
+
+def _shift(field: str, amount: int):
+    if amount >= 0:
+        return F(field) + amount
+    # Unsigned columns: never below zero, drift is repaired by update_style_popularity
+    return Case(
+        When(**{f'{field}__gte': -amount}, then=F(field) + amount),
+        default=Value(0),
+        output_field=Style._meta.get_field(field),
+    )
+
+
+def shift_rating(style_id, rating_delta: int, count_delta: int) -> None:
+    """Move a style's rating aggregates by a rating change"""
+    updates = {}
+    if rating_delta:
+        updates['rating_sum'] = _shift('rating_sum', rating_delta)
+    if count_delta:
+        updates['rating_count'] = _shift('rating_count', count_delta)
+    if updates:
+        Style.objects.filter(pk=style_id).update(**updates)
+
+
+def _decayed(queryset, date_field: str, aggregate=Count, expression='pk') -> Dict:
+    """Per style: `aggregate(expression)` over WINDOWS, each window's increment weighted"""
+    now = timezone.now()
+    windows = {
+        f'w{days}': aggregate(expression, filter=Q(**{f'{date_field}__gte': now - timedelta(days=days)}))
+        for days, _ in WINDOWS
+    }
+    rows = queryset.filter(
+        **{f'{date_field}__gte': now - timedelta(days=WINDOWS[-1][0])}
+    ).order_by().values('style').annotate(**windows)
+    
+    scores = {}
+    for row in rows:
+        score, counted = 0.0, 0
+        for days, weight in WINDOWS:
+            total = row[f'w{days}'] or 0
+            score += (total - counted) * weight
+            counted = total
+        scores[row['style']] = score
+    return scores
+
+
+def repair_rating_aggregates() -> int:
+    """Recompute drifted rating_sum / rating_count in place; returns the styles repaired"""
+    per_style = StyleRating.objects.filter(style=OuterRef('pk')).order_by().values('style')
+    rating_sum = Coalesce(Subquery(per_style.annotate(total=Sum('rating')).values('total')), Value(0))
+    rating_count = Coalesce(Subquery(per_style.annotate(total=Count('pk')).values('total')), Value(0))
+    # One UPDATE evaluated against the ratings at write time: no stale read to overwrite F() shifts with
+    return Style.objects.exclude(rating_sum=rating_sum, rating_count=rating_count).update(
+        rating_sum=rating_sum, rating_count=rating_count
+    )
+
+
+def update_style_popularity() -> Dict:
+    """Recompute every style's popularity_score (and repair its rating aggregates)"""
+    from apps.processing.models import ProcessingJob
+    from .catalog import bump_catalog_version
+    
+    jobs = _decayed(
+        ProcessingJob.objects.filter(style__isnull=False).exclude(status__in=['failed', 'cancelled']),
+        'created_at',
+    )
+    favorites = _decayed(UserStylePreference.objects.filter(is_favorite=True), 'updated_at')
+    stars = _decayed(StyleRating.objects.all(), 'updated_at', Sum, 'rating')
+    
+    changed = []
+    styles = Style.objects.only('pk', 'popularity_score')
+    for style in styles:
+        score = round(SCALE * (
+            WEIGHTS['jobs'] * jobs.get(style.pk, 0)
+            + WEIGHTS['favorites'] * favorites.get(style.pk, 0)
+            + WEIGHTS['ratings'] * stars.get(style.pk, 0) / 5
+        ))
+        if score != style.popularity_score:
+            style.popularity_score = score
+            changed.append(style)
+    
+    Style.objects.bulk_update(changed, ['popularity_score'], batch_size=500)
+    repaired = repair_rating_aggregates()
+    if changed or repaired:
+        # Neither bulk_update nor update() sends signals
+        bump_catalog_version()
+    return {'styles': len(styles), 'updated': len(changed), 'repaired': repaired}
@@ -1,7 +1,26 @@
 from rest_framework import serializers
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
 from .models import StyleCategory, Style, StyleExample, UserStylePreference, StyleRating
 
 
+def annotate_style_list(queryset, user=None):
+    """
+    The current user's rating/favorite as annotations (rating aggregates are
+    columns of the style row), so style lists cost a fixed number of queries
+    """
+    queryset = queryset.select_related('category')
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(
+            user_favorite=Exists(UserStylePreference.objects.filter(
+                style=OuterRef('pk'), user=user, is_favorite=True
+            )),
+            user_rating_value=Subquery(StyleRating.objects.filter(
+                style=OuterRef('pk'), user=user
+            ).values('rating')[:1]),
+        )
+    return queryset
+
+
 class StyleCategorySerializer(serializers.ModelSerializer):
     """Serializer for style categories"""
     
@@ -14,8 +33,14 @@ class StyleCategorySerializer(serializers.ModelSerializer):
             'is_active', 'sort_order', 'styles_count'
         ]
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.annotate(active_styles_count=Count('styles', filter=Q(styles__is_active=True)))
+    
     def get_styles_count(self, obj):
         """Get count of active styles in this category"""
+        if getattr(obj, 'active_styles_count', None) is not None:
+            return obj.active_styles_count
         return obj.styles.filter(is_active=True).count()
 
 
@@ -59,19 +84,18 @@ class StyleSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Get average rating for this style"""
-        ratings = obj.ratings.all()
-        if ratings:
-            return sum(r.rating for r in ratings) / len(ratings)
-        return 0
+        return obj.average_rating
     
     def get_total_ratings(self, obj):
         """Get total number of ratings"""
-        return obj.ratings.count()
+        return obj.rating_count
     
     def get_user_rating(self, obj):
         """Get current user's rating for this style"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_rating_value'):
+                return obj.user_rating_value
             try:
                 rating = obj.ratings.get(user=request.user)
                 return rating.rating
@@ -83,6 +107,8 @@ class StyleSerializer(serializers.ModelSerializer):
         """Check if style is user's favorite"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_favorite'):
+                return obj.user_favorite
             try:
                 preference = obj.user_preferences.get(user=request.user)
                 return preference.is_favorite
@@ -109,15 +135,14 @@ class StyleListSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Get average rating for this style"""
-        ratings = obj.ratings.all()
-        if ratings:
-            return round(sum(r.rating for r in ratings) / len(ratings), 1)
-        return 0
+        return round(obj.average_rating, 1)
     
     def get_is_user_favorite(self, obj):
         """Check if style is user's favorite"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_favorite'):
+                return obj.user_favorite
             try:
                 preference = obj.user_preferences.get(user=request.user)
                 return preference.is_favorite
@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .models import Style, StyleCategory, StyleExample, StyleRating
+from .popularity import shift_rating
+
+
+@receiver(post_save, sender=Style)
+@receiver(post_delete, sender=Style)
+@receiver(post_save, sender=StyleCategory)
+@receiver(post_delete, sender=StyleCategory)
+@receiver(post_save, sender=StyleExample)
+@receiver(post_delete, sender=StyleExample)
+@receiver(post_save, sender=StyleRating)
+@receiver(post_delete, sender=StyleRating)
+def catalog_changed(sender, raw=False, **kwargs):
+    """Any catalog write invalidates the cached catalog responses (once committed)"""
+    if raw:
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_init, sender=StyleRating)
+def rating_loaded(sender, instance, **kwargs):
+    """Remember the counted rating, so a save can move the style's sum by the difference"""
+    instance._counted = (instance.__dict__.get('style_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_save, sender=StyleRating)
+def rating_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_style_id, old_rating = (None, None) if created else instance._counted
+    if old_rating is None and not created:
+        return  # rating deferred when loaded: left to update_style_popularity
+    if old_style_id is not None and old_style_id != instance.style_id:
+        shift_rating(old_style_id, -old_rating, -1)
+        old_rating = None
+    shift_rating(instance.style_id, instance.rating - (old_rating or 0), int(old_rating is None))
+    instance._counted = (instance.style_id, instance.rating)
+
+
+@receiver(post_delete, sender=StyleRating)
+def rating_deleted(sender, instance, **kwargs):
+    shift_rating(instance.style_id, -instance.rating, -1)
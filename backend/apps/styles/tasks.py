@@ -0,0 +1,20 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def update_style_popularity():
+    """Recompute time-decayed style popularity from jobs, favorites and ratings"""
+    try:
+        from .popularity import update_style_popularity as update
+        
+        result = update()
+        logger.info(f"Style popularity updated for {result['updated']} of {result['styles']} styles")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Style popularity update failed: {str(e)}")
+        return {'error': str(e)}
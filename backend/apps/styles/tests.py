@@ -0,0 +1,27 @@
+from config.testing import QueryCeilingTestCase
+from .models import Style, StyleCategory, StyleRating, UserStylePreference
+
+
+class ListQueryCountTests(QueryCeilingTestCase):
+    """Category, style and popular style lists"""
+    
+    def seed(self, count):
+        for _ in range(count):
+            number = StyleCategory.objects.count()
+            category = StyleCategory.objects.create(name=f'Category {number}', slug=f'category-{number}')
+            style = Style.objects.create(
+                category=category, name=f'Style {number}', slug=f'style-{number}',
+                description='test', prompt_template='{original_prompt}',
+            )
+            StyleRating.objects.create(user=self.user, style=style, rating=4)
+            StyleRating.objects.create(user=self.other, style=style, rating=5)
+            UserStylePreference.objects.create(user=self.user, style=style, is_favorite=True)
+    
+    def test_categories(self):
+        self.assertQueryCeiling('/api/v1/styles/categories/', 2)
+    
+    def test_style_list(self):
+        self.assertQueryCeiling('/api/v1/styles/', 2)
+    
+    def test_popular_styles(self):
+        self.assertQueryCeiling('/api/v1/styles/popular/', 2)
@@ -1,20 +1,22 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.throttling import ScopedRateThrottle
+from config.response_cache import cache_response
+from config.throttling import ScopedRateThrottle
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Avg, Count
+from django.db.models import Q
+from .catalog import CatalogCacheMixin
 from .models import StyleCategory, Style, StyleExample, UserStylePreference, StyleRating
 from .serializers import (
     StyleCategorySerializer, StyleSerializer, StyleListSerializer,
-    StyleExampleSerializer, UserStylePreferenceSerializer, StyleRatingSerializer
+    StyleExampleSerializer, UserStylePreferenceSerializer, StyleRatingSerializer, annotate_style_list
 )
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class StyleCategoryListView(generics.ListAPIView):
+class StyleCategoryListView(CatalogCacheMixin, generics.ListAPIView):
     """List all style categories"""
     
     serializer_class = StyleCategorySerializer
@@ -23,10 +25,12 @@ class StyleCategoryListView(generics.ListAPIView):
     throttle_scope = 'styles_list'
     
     def get_queryset(self):
-        return StyleCategory.objects.filter(is_active=True).order_by('sort_order', 'name')
+        return StyleCategorySerializer.setup_eager_loading(
+            StyleCategory.objects.filter(is_active=True)
+        ).order_by('sort_order', 'name')
 
 
-class StyleListView(generics.ListAPIView):
+class StyleListView(CatalogCacheMixin, generics.ListAPIView):
     """List styles with filtering and search"""
     
     serializer_class = StyleListSerializer
@@ -35,7 +39,7 @@ class StyleListView(generics.ListAPIView):
     throttle_scope = 'styles_list'
     
     def get_queryset(self):
-        queryset = Style.objects.filter(is_active=True).select_related('category')
+        queryset = annotate_style_list(Style.objects.filter(is_active=True), self.request.user)
         
         # Filter by category
         category_id = self.request.query_params.get('category')
@@ -69,7 +73,7 @@ class StyleListView(generics.ListAPIView):
         return queryset
 
 
-class StyleDetailView(generics.RetrieveAPIView):
+class StyleDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     """Get detailed information about a specific style"""
     
     serializer_class = StyleSerializer
@@ -78,10 +82,12 @@ class StyleDetailView(generics.RetrieveAPIView):
     throttle_scope = 'styles_detail'
     
     def get_queryset(self):
-        return Style.objects.filter(is_active=True).select_related('category').prefetch_related('examples')
+        return annotate_style_list(
+            Style.objects.filter(is_active=True), self.request.user
+        ).prefetch_related('examples')
 
 
-class PopularStylesView(generics.ListAPIView):
+class PopularStylesView(CatalogCacheMixin, generics.ListAPIView):
     """List most popular styles"""
     
     serializer_class = StyleListSerializer
@@ -90,12 +96,12 @@ class PopularStylesView(generics.ListAPIView):
     throttle_scope = 'styles_popular'
     
     def get_queryset(self):
-        return Style.objects.filter(
-            is_active=True
-        ).select_related('category').order_by('-popularity_score')[:20]
+        return annotate_style_list(
+            Style.objects.filter(is_active=True), self.request.user
+        ).order_by('-popularity_score')[:20]
 
 
-class StyleExampleListView(generics.ListAPIView):
+class StyleExampleListView(CatalogCacheMixin, generics.ListAPIView):
     """List examples for a specific style"""
     
     serializer_class = StyleExampleSerializer
@@ -163,7 +169,7 @@ def toggle_favorite_style(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-toggle_favorite_style.throttle_scope = 'styles_toggle_favorite'
+toggle_favorite_style.cls.throttle_scope = 'styles_toggle_favorite'
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -192,13 +198,10 @@ def rate_style(request, pk):
             }
         )
         
-        # Update style popularity score based on new average rating
-        avg_rating = style.ratings.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
-        rating_count = style.ratings.count()
-        
-        # Simple popularity score calculation (can be improved)
-        style.popularity_score = int(avg_rating * rating_count * 10)
-        style.save()
+        # Aggregates were moved by the rating's signal; popularity is recomputed periodically
+        style.refresh_from_db(fields=['rating_sum', 'rating_count'])
+        avg_rating = style.average_rating
+        rating_count = style.rating_count
         
         return Response({
             'rating': rating_value,
@@ -214,11 +217,12 @@ def rate_style(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-rate_style.throttle_scope = 'styles_rate'
+rate_style.cls.throttle_scope = 'styles_rate'
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 @throttle_classes([ScopedRateThrottle])
+@cache_response('style_stats')
 def style_stats(request):
     """Get general style statistics"""
     
@@ -230,8 +234,8 @@ def style_stats(request):
     }
     
     # Most popular styles
-    popular_styles = Style.objects.filter(
-        is_active=True
+    popular_styles = annotate_style_list(
+        Style.objects.filter(is_active=True), request.user
     ).order_by('-popularity_score')[:5]
     
     stats['most_popular'] = StyleListSerializer(
@@ -241,15 +245,15 @@ def style_stats(request):
     ).data
     
     # Categories with style counts
-    categories = StyleCategory.objects.filter(is_active=True).annotate(
-        style_count=Count('styles', filter=Q(styles__is_active=True))
-    ).order_by('-style_count')
+    categories = StyleCategorySerializer.setup_eager_loading(
+        StyleCategory.objects.filter(is_active=True)
+    ).order_by('-active_styles_count')
     
     stats['categories'] = StyleCategorySerializer(categories, many=True).data
     
     return Response(stats)
  
-style_stats.throttle_scope = 'styles_stats'
+style_stats.cls.throttle_scope = 'styles_stats'
 
 
 @api_view(['GET'])
@@ -272,21 +276,23 @@ def user_style_activity(request):
             if pref.is_favorite or pref.usage_count > 0
         )
         
-        recommended = Style.objects.filter(
+        recommended = annotate_style_list(Style.objects.filter(
             is_active=True,
             category_id__in=favorite_categories
-        ).exclude(
+        ), user).exclude(
             id__in=[pref.style_id for pref in preferences]
         ).order_by('-popularity_score')[:10]
     else:
         # For new users, recommend most popular styles
-        recommended = Style.objects.filter(
-            is_active=True
+        recommended = annotate_style_list(
+            Style.objects.filter(is_active=True), user
         ).order_by('-popularity_score')[:10]
     
     activity = {
         'favorite_styles': StyleListSerializer(
-            [pref.style for pref in favorite_styles], 
+            annotate_style_list(
+                Style.objects.filter(pk__in=favorite_styles.values('style')), user
+            ).order_by('name'), 
             many=True,
             context={'request': request}
         ).data,
@@ -305,4 +311,4 @@ def user_style_activity(request):
     
     return Response(activity)
  
-user_style_activity.throttle_scope = 'styles_user_activity'
+user_style_activity.cls.throttle_scope = 'styles_user_activity'
@@ -3,7 +3,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework.throttling import ScopedRateThrottle
+from config.throttling import ScopedRateThrottle
 
 from .serializers import ContactSerializer
 from .services import send_contact_email
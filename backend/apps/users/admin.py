@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
+from .authentication import invalidate_user_tokens
 from .models import User, UserProfile
 
 
@@ -89,18 +90,21 @@ class UserAdmin(BaseUserAdmin):
     def make_premium(self, request, queryset):
         """Action to make selected users premium"""
         updated = queryset.update(is_premium=True)
+        invalidate_user_tokens(queryset)
         self.message_user(request, f'{updated} users were successfully made premium.')
     make_premium.short_description = "Mark selected users as premium"
     
     def remove_premium(self, request, queryset):
         """Action to remove premium from selected users"""
         updated = queryset.update(is_premium=False)
+        invalidate_user_tokens(queryset)
         self.message_user(request, f'{updated} users were successfully removed from premium.')
     remove_premium.short_description = "Remove premium from selected users"
     
     def reset_processing_count(self, request, queryset):
         """Action to reset processing count"""
         updated = queryset.update(processing_count=0)
+        invalidate_user_tokens(queryset)
         self.message_user(request, f'Processing count reset for {updated} users.')
     reset_processing_count.short_description = "Reset processing count to 0"
 
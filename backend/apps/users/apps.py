@@ -6,3 +6,6 @@ class UsersConfig(AppConfig):
     name = 'apps.users'
     label = 'users'  # Simplified label for model references
     verbose_name = 'Users Management'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
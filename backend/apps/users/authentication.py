@@ -0,0 +1,84 @@
+"""
+Token authentication with the token -> user lookup cached.
+
+DRF's TokenAuthentication joins authtoken_token to users on every request.
+Here the resolved user is kept in the shared cache for
+TOKEN_AUTH_CACHE_SECONDS, fronted by a small in-process TTL cache of
+TOKEN_AUTH_LOCAL_CACHE_SECONDS. Entries are dropped when a token is deleted
+(logout, password change/reset) or its user is saved (see signals.py);
+admin bulk actions call invalidate_user_tokens themselves. Other processes'
+local entries are not reachable, so they expire on their own within the
+local TTL.
+"""
+import copy
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_PREFIX = 'auth-token:'
+LOCAL_MAX_ENTRIES = 10000
+
+_local = {}  # cache key -> (expires at, user)
+_local_lock = threading.Lock()
+
+
+def _cache_key(key: str) -> str:
+    # Never keep raw tokens in the cache
+    return CACHE_PREFIX + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _local_get(cache_key: str):
+    entry = _local.get(cache_key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def _local_set(cache_key: str, user) -> None:
+    ttl = settings.TOKEN_AUTH_LOCAL_CACHE_SECONDS
+    if ttl <= 0:
+        return
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            _local.clear()
+        _local[cache_key] = (time.monotonic() + ttl, user)
+
+
+def invalidate_tokens(keys) -> None:
+    """Drop cached lookups for token `keys`"""
+    cache_keys = [_cache_key(key) for key in keys]
+    if not cache_keys:
+        return
+    cache.delete_many(cache_keys)
+    with _local_lock:
+        for cache_key in cache_keys:
+            _local.pop(cache_key, None)
+
+
+def invalidate_user_tokens(users) -> None:
+    """Drop cached lookups for the tokens of `users` (instances, ids or a queryset)"""
+    invalidate_tokens(Token.objects.filter(user__in=users).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication resolving keys from the cache first"""
+    
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        user = _local_get(cache_key)
+        if user is None:
+            user = cache.get(cache_key)
+            if user is None:
+                # Raises AuthenticationFailed for unknown keys and inactive users
+                user, token = super().authenticate_credentials(key)
+                cache.set(cache_key, user, settings.TOKEN_AUTH_CACHE_SECONDS)
+            _local_set(cache_key, user)
+        
+        # Requests may modify request.user: never hand out the shared instance
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens, invalidate_user_tokens
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Logout, password change or reset: the token stops authenticating everywhere"""
+    # After commit: invalidating earlier would let a concurrent request cache the old row again
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens([key]))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    """Premium, active or profile changes: drop the cached user behind the user's tokens"""
+    if raw:
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_tokens([user_id]))
@@ -5,7 +5,7 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
 from django.conf import settings
 from django.shortcuts import redirect
-from rest_framework.throttling import ScopedRateThrottle
+from config.throttling import ScopedRateThrottle
 import secrets
 from urllib.parse import urlencode
 from .models import User, UserProfile
@@ -66,7 +66,7 @@ def login_view(request):
         serializer.errors, 
         status=status.HTTP_400_BAD_REQUEST
     )
-login_view.throttle_scope = 'auth_login'
+login_view.cls.throttle_scope = 'auth_login'
 
 
 @api_view(['GET'])
@@ -93,7 +93,7 @@ def google_oauth_start(request):
 
     auth_url = 'https://accounts.google.com/o/oauth2/v2/auth?' + urlencode(params)
     return redirect(auth_url)
-google_oauth_start.throttle_scope = 'auth_google_oauth'
+google_oauth_start.cls.throttle_scope = 'auth_google_oauth'
 
 
 @api_view(['GET'])
@@ -147,7 +147,7 @@ def google_oauth_callback(request):
         return redirect(redirect_url)
     except Exception as e:
         return Response({'error': 'OAuth callback error', 'details': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-google_oauth_callback.throttle_scope = 'auth_google_oauth'
+google_oauth_callback.cls.throttle_scope = 'auth_google_oauth'
 
 
 @api_view(['POST'])
@@ -238,7 +238,7 @@ def verify_email_view(request):
             'message': 'Email verificado correctamente'
         }, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-verify_email_view.throttle_scope = 'auth_verify_email'
+verify_email_view.cls.throttle_scope = 'auth_verify_email'
 
 
 @api_view(['POST'])
@@ -260,7 +260,7 @@ def password_reset_request_view(request):
         # Generic success message (avoid user enumeration)
         return Response({'message': 'Si el email existe, hemos enviado un código para restablecer tu contraseña.'}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-password_reset_request_view.throttle_scope = 'auth_reset_request'
+password_reset_request_view.cls.throttle_scope = 'auth_reset_request'
 
 
 @api_view(['POST'])
@@ -278,7 +278,7 @@ def password_reset_confirm_view(request):
         Token.objects.filter(user=user).delete()
         return Response({'message': 'Contraseña restablecida correctamente. Inicia sesión con tu nueva contraseña.'}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-password_reset_confirm_view.throttle_scope = 'auth_reset_confirm'
+password_reset_confirm_view.cls.throttle_scope = 'auth_reset_confirm'
 
 
 @api_view(['POST'])
@@ -295,7 +295,7 @@ def resend_verification_view(request):
             print(f"[ResendVerification] Error: {e}")
         return Response({'message': 'Código reenviado'}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-resend_verification_view.throttle_scope = 'auth_resend_verification'
+resend_verification_view.cls.throttle_scope = 'auth_resend_verification'
 
 
 @api_view(['POST'])
@@ -314,4 +314,4 @@ def google_login_view(request):
             'message': 'Login con Google exitoso'
         }, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-google_login_view.throttle_scope = 'auth_google_login'
+google_login_view.cls.throttle_scope = 'auth_google_login'
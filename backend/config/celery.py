@@ -40,6 +40,38 @@ app.conf.beat_schedule = {
         'task': 'apps.processing.tasks_cleanup.cleanup_failed_jobs_data',
         'schedule': 60.0 * 60.0 * 8,  # Every 8 hours
     },
+    'reconcile-storage-orphans': {
+        'task': 'apps.processing.tasks_cleanup.reconcile_storage_orphans',
+        'schedule': 60.0 * 60.0 * 24,  # Daily
+    },
+    'demote-cold-results': {
+        'task': 'apps.processing.tasks_cleanup.demote_cold_results',
+        'schedule': 60.0 * 60.0 * 24,  # Daily
+    },
+    'collect-unreferenced-blobs': {
+        'task': 'apps.processing.tasks_cleanup.collect_unreferenced_blobs',
+        'schedule': 60.0 * 60.0 * 24,  # Daily
+    },
+    'expire-upload-intents': {
+        'task': 'apps.images.tasks.expire_upload_intents',
+        'schedule': 60.0 * 60.0,  # Every hour
+    },
+    'expire-result-exports': {
+        'task': 'apps.processing.tasks.expire_result_exports',
+        'schedule': 60.0 * 60.0,  # Every hour
+    },
+    'reconcile-processing-stats': {
+        'task': 'apps.processing.tasks.reconcile_processing_stats',
+        'schedule': 60.0 * 60.0,  # Every hour
+    },
+    'flush-quota-counters': {
+        'task': 'apps.processing.tasks.flush_quota_counters',
+        'schedule': 60.0 * 10,  # Every 10 minutes
+    },
+    'update-style-popularity': {
+        'task': 'apps.styles.tasks.update_style_popularity',
+        'schedule': 60.0 * 60.0,  # Every hour
+    },
 }
 
 app.conf.timezone = 'UTC'
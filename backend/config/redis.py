@@ -0,0 +1,33 @@
+"""
+Shared Redis connection pools: one pool per (URL, decoding) per process,
+so request handlers and tasks reuse connections instead of opening one per
+call. redis-py resets a pool inherited across fork (Celery prefork workers).
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_redis(url: str = None, decode_responses: bool = True) -> redis.Redis:
+    """Client on the shared pool for `url` (default: REDIS_URL)"""
+    url = url or settings.REDIS_URL
+    key = (url, decode_responses)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = redis.ConnectionPool.from_url(
+                    url,
+                    decode_responses=decode_responses,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30,
+                )
+                _pools[key] = pool
+    return redis.Redis(connection_pool=pool)
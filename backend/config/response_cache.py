@@ -0,0 +1,152 @@
+"""
+Shared response cache for DRF handlers that answer every anonymous caller
+the same way.
+
+Entries hold the response data, how long it took to compute and when it
+stops being fresh; they are kept for a further stale window. Freshness is
+checked with probabilistic early expiration (XFetch): a request may decide
+to refresh shortly before expiry, the more likely the closer the entry is to
+expiring and the slower it is to compute. Only the request that takes the
+entry's lock recomputes; the others keep serving the stale copy, and on a
+cold key they wait briefly for the first result. Hits, stale hits, refreshes
+and misses are counted per endpoint (response_cache_metrics).
+
+Timeouts are per endpoint in RESPONSE_CACHE_TIMEOUTS, keys are built from
+the host, path and sorted query parameters.
+"""
+import functools
+import hashlib
+import logging
+import math
+import random
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'response-cache:'
+METRICS_KEY = 'response-cache:metrics:'
+LOCK_TIMEOUT = 30  # seconds; bounds a crashed refresher
+COLD_WAIT = 1.0  # seconds a cold miss waits for the request computing it
+COLD_POLL = 0.05
+BETA = 1.0  # XFetch eagerness; >1 refreshes earlier
+
+
+def anonymous(request) -> bool:
+    return not request.user.is_authenticated
+
+
+def anonymous_first_page(request) -> bool:
+    return anonymous(request) and request.query_params.get('page', '1') == '1'
+
+
+def _cache_key(name: str, request) -> str:
+    params = sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        for value in values
+        if value != '' and not (param == 'page' and value == '1')
+    )
+    url = f"{request.get_host()}{request.path}?{urlencode(params)}"
+    return f"{CACHE_PREFIX}{name}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def _count(name: str, outcome: str) -> None:
+    try:
+        get_redis(settings.REDIS_CACHE_URL).hincrby(METRICS_KEY + name, outcome)
+    except redis.RedisError as e:
+        logger.debug(f"Response cache metrics unavailable: {e}")
+
+
+def response_cache_metrics(name: str) -> Dict[str, int]:
+    """Counts of hit / stale / refresh / miss for an endpoint"""
+    values = get_redis(settings.REDIS_CACHE_URL).hgetall(METRICS_KEY + name)
+    return {outcome: int(count) for outcome, count in values.items()}
+
+
+def _is_fresh(entry) -> bool:
+    _, delta, fresh_until = entry
+    return time.time() - delta * BETA * math.log(1 - random.random()) < fresh_until
+
+
+def _wait_for(key: str):
+    deadline = time.monotonic() + COLD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _serve(entry, name: str, outcome: str) -> Response:
+    _count(name, outcome)
+    response = Response(entry[0])
+    response['X-Cache'] = outcome.upper()
+    return response
+
+
+def _compute(key: str, name: str, timeout: int, compute: Callable[[], Response]) -> Response:
+    started = time.monotonic()
+    response = compute()
+    delta = time.monotonic() - started
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(
+            key, (response.data, delta, time.time() + timeout),
+            timeout + settings.RESPONSE_CACHE_STALE_SECONDS,
+        )
+    return response
+
+
+def cached(name: str, request, compute: Callable[[], Response]) -> Response:
+    """The response for `request` from the `name` cache, running `compute` when due"""
+    timeout = settings.RESPONSE_CACHE_TIMEOUTS[name]
+    key = _cache_key(name, request)
+    lock_key = f"{key}:lock"
+    
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry):
+        return _serve(entry, name, 'hit')
+    
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        # Someone else is computing: serve what there is, or wait for it
+        entry = entry or _wait_for(key)
+        if entry is not None:
+            return _serve(entry, name, 'stale')
+    
+    outcome = 'refresh' if entry is not None else 'miss'
+    try:
+        response = _compute(key, name, timeout, compute)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    _count(name, outcome)
+    response['X-Cache'] = outcome.upper()
+    return response
+
+
+def cache_response(name: str, when: Optional[Callable[[Request], bool]] = anonymous):
+    """
+    Decorator for DRF function views and view handler methods: requests
+    matching `when` are served through the `name` response cache.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapped(*args, **kwargs):
+            request = next(arg for arg in args if isinstance(arg, Request))
+            if when is not None and not when(request):
+                return handler(*args, **kwargs)
+            return cached(name, request, lambda: handler(*args, **kwargs))
+        return wrapped
+    return decorator
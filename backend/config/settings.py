@@ -136,13 +136,26 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Protected media transfers: 'python' streams from Django (sendfile via the WSGI file_wrapper),
+# 'x-accel-redirect' hands off to nginx (internal location aliasing MEDIA_ROOT at the prefix),
+# 'x-sendfile' hands off to Apache/lighttpd
+MEDIA_SERVE_METHOD = config('MEDIA_SERVE_METHOD', default='python')
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Per-key (owner, public, deleted) cache for media authorization, invalidated on save
+MEDIA_AUTH_CACHE_SECONDS = config('MEDIA_AUTH_CACHE_SECONDS', default=300, cast=int)
+# Public results are published under immutable public/ keys. PUBLIC_MEDIA_URL is the CDN
+# in front of them (empty: storage URL); PUBLIC_MEDIA_ACL e.g. 'public-read' when the bucket
+# does not expose public/ through a policy or origin access
+PUBLIC_MEDIA_URL = config('PUBLIC_MEDIA_URL', default='')
+PUBLIC_MEDIA_ACL = config('PUBLIC_MEDIA_ACL', default='')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Temporary for development
@@ -152,10 +165,10 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
-    # Throttling: enable base user/anon limits and define per-scope rates
+    # Throttling: enable base user/anon limits and define per-scope rates (sliding windows in Redis)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'config.throttling.UserRateThrottle',
+        'config.throttling.AnonRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         # Base sustained limits
@@ -177,6 +190,8 @@ REST_FRAMEWORK = {
 
         # Images
         'images_upload': '6/minute',
+        'images_upload_complete': '30/minute',
+        'images_upload_chunk': '600/minute',
         'images_download': '20/minute',
         'images_public_list': '120/minute',
         'images_toggle_favorite': '60/minute',
@@ -186,6 +201,7 @@ REST_FRAMEWORK = {
 
         # Processing
         'processing_job_create': '10/minute',
+        'processing_style_fanout': '5/minute',
         'processing_job_cancel': '30/minute',
         'processing_job_results': '120/minute',
         'processing_results_list': '120/minute',
@@ -196,6 +212,9 @@ REST_FRAMEWORK = {
         'processing_visibility': '30/minute',
         'processing_rate': '30/minute',
         'processing_download': '20/minute',
+        'processing_delete': '30/minute',
+        'processing_export': '10/hour',
+        'processing_export_status': '60/minute',
         'processing_quota': '60/minute',
         'processing_stats': '60/minute',
         'processing_templates': '30/minute',
@@ -265,6 +284,82 @@ CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localho
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+CELERY_RESULT_EXPIRES = config('CELERY_RESULT_EXPIRES', default=60 * 60 * 24, cast=int)  # seconds
+
+# Redis used by the application itself (quotas, throttles); shared pools in config/redis.py
+REDIS_URL = config('REDIS_URL', default=CELERY_BROKER_URL)
+REDIS_MAX_CONNECTIONS = config('REDIS_MAX_CONNECTIONS', default=50, cast=int)
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=2.0, cast=float)  # seconds
+
+# Shared cache for throttles, sessions and application caches, so limits and cached
+# entries are the same across workers and hosts
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default=REDIS_URL)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='splashmy'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'max_connections': REDIS_MAX_CONNECTIONS,
+            'socket_timeout': REDIS_SOCKET_TIMEOUT,
+            'socket_connect_timeout': REDIS_SOCKET_TIMEOUT,
+            'health_check_interval': 30,
+        },
+    },
+}
+# Sessions only carry short-lived state (OAuth flow, admin login)
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cache')
+
+# Token -> user lookups for API authentication (apps/users/authentication.py). The local
+# layer is per process: a logout reaches other workers within TOKEN_AUTH_LOCAL_CACHE_SECONDS
+TOKEN_AUTH_CACHE_SECONDS = config('TOKEN_AUTH_CACHE_SECONDS', default=300, cast=int)
+TOKEN_AUTH_LOCAL_CACHE_SECONDS = config('TOKEN_AUTH_LOCAL_CACHE_SECONDS', default=5, cast=int)
+# Anonymous style catalog responses, keyed by catalog version (apps/styles/catalog.py)
+STYLE_CATALOG_CACHE_SECONDS = config('STYLE_CATALOG_CACHE_SECONDS', default=60 * 60, cast=int)
+# Stampede-protected responses of anonymous aggregate endpoints (config/response_cache.py):
+# fresh for the per-endpoint timeout, then served stale for up to RESPONSE_CACHE_STALE_SECONDS
+# while a single request recomputes them
+RESPONSE_CACHE_TIMEOUTS = {
+    'style_stats': 300,
+    'public_results': 30,
+    'public_images': 60,
+}
+RESPONSE_CACHE_STALE_SECONDS = config('RESPONSE_CACHE_STALE_SECONDS', default=300, cast=int)
+
+# Processing fan-out: n>1 jobs are split into concurrent n=1 OpenAI requests
+PROCESSING_FANOUT_ENABLED = config('PROCESSING_FANOUT_ENABLED', default=True, cast=bool)
+PROCESSING_FANOUT_MAX_WORKERS = config('PROCESSING_FANOUT_MAX_WORKERS', default=4, cast=int)
+
+# Style fan-out: one uploaded image previewed across many styles
+STYLE_FANOUT_MAX_STYLES = config('STYLE_FANOUT_MAX_STYLES', default=12, cast=int)
+STYLE_FANOUT_INPUT_MAX_SIZE = config('STYLE_FANOUT_INPUT_MAX_SIZE', default=1536, cast=int)  # px, longest side
+
+# Cleanup tasks: rows/keys handled per batch and wall-clock budget per run
+CLEANUP_BATCH_SIZE = config('CLEANUP_BATCH_SIZE', default=500, cast=int)
+CLEANUP_TIME_BUDGET_SECONDS = config('CLEANUP_TIME_BUDGET_SECONDS', default=240, cast=int)
+STORAGE_ORPHAN_GRACE_HOURS = config('STORAGE_ORPHAN_GRACE_HOURS', default=24, cast=int)  # unreferenced blobs younger than this are kept
+USER_STATS_RECONCILE_HOURS = config('USER_STATS_RECONCILE_HOURS', default=24, cast=int)  # stats rollup rows older than this are recounted
+
+# Storage tiering: old, undownloaded results are re-encoded and moved to a cheaper class
+STORAGE_TIERING_AGE_DAYS = config('STORAGE_TIERING_AGE_DAYS', default=30, cast=int)
+STORAGE_TIERING_IDLE_DAYS = config('STORAGE_TIERING_IDLE_DAYS', default=14, cast=int)
+STORAGE_TIERING_FORMAT = config('STORAGE_TIERING_FORMAT', default='webp')  # webp or avif
+STORAGE_TIERING_LOSSLESS = config('STORAGE_TIERING_LOSSLESS', default=True, cast=bool)  # WebP only
+STORAGE_TIERING_QUALITY = config('STORAGE_TIERING_QUALITY', default=90, cast=int)
+STORAGE_TIERING_S3_STORAGE_CLASS = config('STORAGE_TIERING_S3_STORAGE_CLASS', default='STANDARD_IA')
+
+# Redis maintenance (result-backend keys only; Kombu broker keys are never touched)
+REDIS_MAINTENANCE_TIME_BUDGET_SECONDS = config('REDIS_MAINTENANCE_TIME_BUDGET_SECONDS', default=30, cast=int)
+REDIS_MAINTENANCE_SCAN_COUNT = config('REDIS_MAINTENANCE_SCAN_COUNT', default=500, cast=int)
+REDIS_AOF_REWRITE_GROWTH_RATIO = config('REDIS_AOF_REWRITE_GROWTH_RATIO', default=2.0, cast=float)
+REDIS_AOF_REWRITE_MIN_SIZE = config('REDIS_AOF_REWRITE_MIN_SIZE', default=64 * 1024 * 1024, cast=int)  # bytes
+
+# Pipelines: chained steps hand their intermediates over on disk. The chain's links can run on
+# any worker, so the scratch dir must be shared by all of them (the default is in the mounted
+# backend directory); a step whose input is missing falls back to it in storage when it was kept.
+PIPELINE_MAX_STEPS = config('PIPELINE_MAX_STEPS', default=5, cast=int)
+PIPELINE_SCRATCH_DIR = config('PIPELINE_SCRATCH_DIR', default=os.path.join(BASE_DIR, 'pipeline-scratch'))
 
 # Environment-based feature flags
 USE_S3_STORAGE = config('USE_S3_STORAGE', default=IS_PRODUCTION, cast=bool)
@@ -276,6 +371,7 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
 AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='')
 AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default='us-east-1')
 AWS_S3_CUSTOM_DOMAIN = config('AWS_S3_CUSTOM_DOMAIN', default='')
+AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default='')  # S3-compatible endpoint (e.g. MinIO), empty for AWS
 AWS_DEFAULT_ACL = config('AWS_DEFAULT_ACL', default='private')
 AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
@@ -293,6 +389,16 @@ else:
     # Local storage for development
     DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Storage engine tuning (apps.images.storage)
+STORAGE_S3_MAX_POOL_CONNECTIONS = config('STORAGE_S3_MAX_POOL_CONNECTIONS', default=32, cast=int)
+STORAGE_S3_MAX_ATTEMPTS = config('STORAGE_S3_MAX_ATTEMPTS', default=5, cast=int)
+STORAGE_S3_RETRY_MODE = config('STORAGE_S3_RETRY_MODE', default='standard')  # standard or adaptive (exponential backoff with jitter)
+STORAGE_S3_CONNECT_TIMEOUT = config('STORAGE_S3_CONNECT_TIMEOUT', default=5, cast=int)  # seconds
+STORAGE_S3_READ_TIMEOUT = config('STORAGE_S3_READ_TIMEOUT', default=30, cast=int)  # seconds
+STORAGE_MULTIPART_THRESHOLD = config('STORAGE_MULTIPART_THRESHOLD', default=16 * 1024 * 1024, cast=int)  # bytes
+STORAGE_MULTIPART_CHUNKSIZE = config('STORAGE_MULTIPART_CHUNKSIZE', default=8 * 1024 * 1024, cast=int)  # bytes
+STORAGE_MAX_CONCURRENCY = config('STORAGE_MAX_CONCURRENCY', default=8, cast=int)  # threads per multipart transfer
+
 # Amazon Rekognition for content moderation
 AWS_REKOGNITION_REGION = config('AWS_REKOGNITION_REGION', default='us-east-1')
 CONTENT_MODERATION_CONFIDENCE_THRESHOLD = config('CONTENT_MODERATION_CONFIDENCE_THRESHOLD', default=80.0, cast=float)
@@ -300,8 +406,24 @@ ALLOWED_MODERATION_LABELS = config('ALLOWED_MODERATION_LABELS', default='Suggest
 
 # File upload settings
 MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE', default=10485760, cast=int)  # 10MB
+UPLOAD_INTENT_EXPIRY_SECONDS = config('UPLOAD_INTENT_EXPIRY_SECONDS', default=900, cast=int)  # direct uploads: time to send the bytes
+
+# Resumable chunked uploads (parts go to S3 multipart uploads, or to CHUNKED_UPLOAD_DIR locally).
+# The Celery worker joins local parts, so CHUNKED_UPLOAD_DIR must be shared with it (the default
+# sits next to MEDIA_ROOT in the mounted backend directory) and must not be served
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=100 * 1024 * 1024, cast=int)  # 100MB
+CHUNKED_UPLOAD_CHUNK_SIZE = config('CHUNKED_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)  # 5MB, the S3 part minimum
+CHUNKED_UPLOAD_EXPIRY_SECONDS = config('CHUNKED_UPLOAD_EXPIRY_SECONDS', default=86400, cast=int)  # since the last chunk
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=os.path.join(BASE_DIR, 'chunked-uploads'))
 ALLOWED_IMAGE_EXTENSIONS = config('ALLOWED_IMAGE_EXTENSIONS', default='jpg,jpeg,png,gif,webp').split(',')
 
+# ZIP exports: streamed when small, built in the background (and kept EXPORT_EXPIRY_HOURS) when large
+EXPORT_STREAM_MAX_FILES = config('EXPORT_STREAM_MAX_FILES', default=200, cast=int)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=256 * 1024, cast=int)
+EXPORT_READ_AHEAD_CHUNKS = config('EXPORT_READ_AHEAD_CHUNKS', default=8, cast=int)
+EXPORT_EXPIRY_HOURS = config('EXPORT_EXPIRY_HOURS', default=48, cast=int)
+
 # Rate limiting
 DAILY_UPLOAD_LIMIT_FREE = config('DAILY_UPLOAD_LIMIT_FREE', default=10, cast=int)
 DAILY_UPLOAD_LIMIT_PREMIUM = config('DAILY_UPLOAD_LIMIT_PREMIUM', default=100, cast=int)
+DAILY_PROCESSING_LIMIT_FREE = config('DAILY_PROCESSING_LIMIT_FREE', default=5, cast=int)  # per job type; premium is unlimited
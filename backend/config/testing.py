@@ -0,0 +1,82 @@
+"""
+Shared scaffolding for the apps' API tests: an authenticated client on a
+local cache, row factories, and the query-count and selected-column
+assertions the list and detail endpoints are held to.
+"""
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_image(user, **fields):
+    from apps.images.models import Image
+    
+    key = f"images/uploads/{user.pk}/{uuid.uuid4()}.png"
+    return Image.objects.create(
+        user=user, original_image=key, original_filename='test.png', file_size=1024,
+        width=64, height=64, format='PNG', is_content_safe=True, s3_key=key, **fields
+    )
+
+
+def heavy_columns():
+    """Columns of every model's HEAVY_FIELDS"""
+    from apps.images.models import Image
+    from apps.processing.models import ProcessingJob, ProcessingResult
+    
+    return [
+        model._meta.get_field(name).column
+        for model in (Image, ProcessingJob, ProcessingResult)
+        for name in model.HEAVY_FIELDS
+    ]
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class APITestCase(TestCase):
+    """API client authenticated as `user`; `other` is a second user"""
+    
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.other = User.objects.create_user('other@example.com', 'other', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class QueryCeilingTestCase(APITestCase):
+    """List endpoints run the same number of queries however many rows they return"""
+    
+    def seed(self, count):
+        """Create `count` more rows for the endpoints under test"""
+        raise NotImplementedError
+    
+    def assertQueryCeiling(self, url, queries, count=5):
+        """`url` runs `queries` queries with `count` rows and again with twice as many"""
+        for _ in range(2):
+            self.seed(count)
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+
+class HeavyColumnTestCase(APITestCase):
+    """Reads never select a model's HEAVY_FIELDS"""
+    
+    def assertNoHeavyColumns(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        columns = heavy_columns()
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                selected = query['sql'].split(' FROM ')[0]
+                for column in columns:
+                    self.assertNotIn(column, selected, f"{url} selects {column}")
@@ -0,0 +1,100 @@
+"""
+Sliding-window rate throttles shared by every worker through Redis.
+
+DRF's throttles keep a list of request timestamps per client in the cache
+and rewrite it on every request. These keep two integer counters per
+client instead (the current and the previous fixed window) and estimate the
+rolling count as
+
+    previous * (1 - elapsed / duration) + current
+
+which costs one small Lua script per check regardless of the rate. The
+classes are drop-in replacements for DRF's and read the same
+DEFAULT_THROTTLE_RATES; if Redis cannot be reached the request is allowed.
+"""
+import logging
+
+import redis
+from django.conf import settings
+from rest_framework import throttling
+
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS: current window counter, previous window counter.
+# ARGV: limit, window duration (s), weight of the previous window.
+# Returns {allowed, current count, previous count}.
+_HIT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[3]) + current + 1 > tonumber(ARGV[1]) then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+end
+return {1, current, previous}
+"""
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """SimpleRateThrottle with a sliding-window counter in place of the history list"""
+    
+    def get_redis(self) -> redis.Redis:
+        return get_redis(settings.REDIS_CACHE_URL)
+    
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        
+        window, offset = divmod(self.timer(), self.duration)
+        window = int(window)
+        weight = 1 - offset / self.duration
+        try:
+            client = self.get_redis()
+            allowed, current, previous = client.register_script(_HIT)(
+                keys=[f"{self.key}:{window}", f"{self.key}:{window - 1}"],
+                args=[self.num_requests, self.duration, weight],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Throttle check skipped for {self.key}: {e}")
+            return True
+        
+        if allowed:
+            return self.throttle_success()
+        self._wait = self._seconds_until_allowed(int(current), int(previous), offset)
+        return self.throttle_failure()
+    
+    def _seconds_until_allowed(self, current: int, previous: int, offset: float) -> float:
+        excess = previous * (1 - offset / self.duration) + current + 1 - self.num_requests
+        remaining = self.duration - offset
+        if previous and previous * remaining / self.duration >= excess:
+            # The previous window's share decays enough before this window ends
+            return excess * self.duration / previous
+        # Otherwise wait for this window to become the previous one and decay in turn
+        excess = current + 1 - self.num_requests
+        return remaining + (max(excess, 0) * self.duration / current if current else 0)
+    
+    def throttle_success(self):
+        return True
+    
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, SlidingWindowRateThrottle):
+    """DRF's class comes first: it resolves the view's rate, then defers to the window check"""
+
+
+class UserRateThrottle(throttling.UserRateThrottle, SlidingWindowRateThrottle):
+    pass
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, SlidingWindowRateThrottle):
+    pass